@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Compare IniTokenizer with configparser on generated INI files.
+
+Usage:
+    python benchmarks/bench_ini_parser.py [--keys 1000 10000 100000] [--repeat 5]
+"""
+import argparse
+import configparser
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from configmodel.IniTokenizer import IniTokenizer  # noqa: E402
+
+KEYS_PER_SECTION = 100
+
+
+def generate_ini_file(filename, key_count):
+    with open(filename, "w") as f:
+        for key_index in range(key_count):
+            if key_index % KEYS_PER_SECTION == 0:
+                f.write(f"\n[section_{key_index // KEYS_PER_SECTION}]\n")
+            f.write(f"parameter_{key_index} = value of parameter {key_index}\n")
+
+
+def parse_configparser(filename):
+    ini = configparser.ConfigParser()
+    ini.read(filename)
+    # read values the same way as SerializerIni did
+    return sum(1 for section in ini.sections() for option in ini[section] if ini[section][option] is not None)
+
+
+def parse_tokenizer(filename, use_mmap=False):
+    return sum(1 for _ in IniTokenizer.parse_file(filename, use_mmap).iter_values())
+
+
+def measure(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'keys':>8} {'configparser':>14} {'tokenizer':>12} {'tokenizer+mmap':>16} {'speedup':>8}")
+    with tempfile.TemporaryDirectory(prefix="bench_ini_parser_") as temp_dir:
+        for key_count in args.keys:
+            filename = os.path.join(temp_dir, f"config_{key_count}.ini")
+            generate_ini_file(filename, key_count)
+            assert parse_configparser(filename) == parse_tokenizer(filename) == key_count
+            configparser_time = measure(lambda: parse_configparser(filename), args.repeat)
+            tokenizer_time = measure(lambda: parse_tokenizer(filename), args.repeat)
+            mmap_time = measure(lambda: parse_tokenizer(filename, use_mmap=True), args.repeat)
+            print(f"{key_count:>8} {configparser_time * 1000:>12.1f}ms {tokenizer_time * 1000:>10.1f}ms "
+                  f"{mmap_time * 1000:>14.1f}ms {configparser_time / tokenizer_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Measure loading of many INI files of the same model: serially, by ConfigLoader in a thread pool and in a process pool,
+with and without writing default values to the files.
+
+Every file contains values of half of the fields, so default values of the other half are written.
+Every run loads a fresh copy of the files.
+
+Usage:
+    python benchmarks/bench_loader.py [--files 2000] [--fields 50] [--workers 4] [--repeat 3]
+"""
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from configmodel import ConfigModel  # noqa: E402
+from configmodel.ConfigLoader import ConfigLoader  # noqa: E402
+
+
+def create_model_class(field_count):
+    return type("TenantConfig", (ConfigModel,), {f"field_{index}": f"default {index}" for index in range(field_count)})
+
+
+def create_files(directory, file_count, field_count):
+    os.makedirs(directory)
+    for file_index in range(file_count):
+        with open(os.path.join(directory, f"tenant_{file_index}.ini"), "w") as f:
+            f.write("[Global]\n")
+            for index in range(0, field_count, 2):
+                f.write(f"field_{index} = tenant {file_index} value {index}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--fields", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    model_class = create_model_class(args.fields)
+
+    def load_serially(filenames, write_default_values):
+        models = []
+        for filename in filenames:
+            model = model_class()
+            model._initialize_config(filename, write_default_values=write_default_values)
+            models.append(model)
+        return models
+
+    def load_by_loader(executor):
+        return lambda filenames, write_default_values: ConfigLoader(
+            model_class, executor=executor, max_workers=args.workers, write_default_values=write_default_values).load(filenames)
+
+    methods = [("serial", load_serially), ("threads", load_by_loader(ConfigLoader.THREAD)),
+               ("processes", load_by_loader(ConfigLoader.PROCESS))]
+    print(f"{args.files} files, {args.fields} fields, {args.workers} workers")
+    print(f"{'method':>10} {'default values':>15} {'time':>10} {'per file':>10}")
+    with tempfile.TemporaryDirectory(prefix="bench_loader_") as temp_dir:
+        source_dir = os.path.join(temp_dir, "source")
+        create_files(source_dir, args.files, args.fields)
+        for write_default_values in [True, False]:
+            for name, method in methods:
+                best = float("inf")
+                for run in range(args.repeat):
+                    run_dir = os.path.join(temp_dir, f"{name}_{write_default_values}_{run}")
+                    shutil.copytree(source_dir, run_dir)
+                    filenames = [os.path.join(run_dir, f"tenant_{index}.ini") for index in range(args.files)]
+                    gc.collect()
+                    start_time = time.perf_counter()
+                    result = method(filenames, write_default_values)
+                    best = min(best, time.perf_counter() - start_time)
+                    del result
+                mode = "written" if write_default_values else "skipped"
+                print(f"{name:>10} {mode:>15} {best * 1000:>8.0f}ms {best / args.files * 1e6:>8.0f}us")
+
+
+if __name__ == "__main__":
+    main()
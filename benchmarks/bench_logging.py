@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Measure the cost of logging on the hottest path (SerializerIni.get_value) when debug messages are disabled.
+
+SerializerIni doesn't log reads. It is compared with reads logged by a disabled logger (lazy arguments),
+guarded by logger.isEnabledFor() and with the eagerly formatted message of the former Log class.
+
+Usage:
+    python benchmarks/bench_logging.py [--reads 1000000] [--repeat 9]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from configmodel import ConfigModel  # noqa: E402
+from configmodel.Logger import logger  # noqa: E402
+from configmodel.SerializerIni import SerializerIni  # noqa: E402
+
+
+class SerializerIniLazyLogging(SerializerIni):
+
+    def get_value(self, path):
+        logger.debug("Getting value of field '%s'", path)
+        return super().get_value(path)
+
+
+class SerializerIniGuardedLogging(SerializerIni):
+
+    def get_value(self, path):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Getting value of field '%s'", path)
+        return super().get_value(path)
+
+
+class SerializerIniEagerLogging(SerializerIni):
+    logging_enabled = False
+
+    def get_value(self, path):
+        message = f"Getting value of field '{path}'"
+        if self.logging_enabled:
+            print(message)
+        return super().get_value(path)
+
+
+class AppConfig(ConfigModel):
+    font_size = 12
+
+    class GoogleApi(ConfigModel):
+        client_id = "<client id>"
+
+    photos_api = GoogleApi()
+
+
+def measure(functions, repeat):
+    """
+    Get the best time of each function, functions are run in turns so that they are equally affected by noise
+    """
+    best = [float("inf")] * len(functions)
+    for _ in range(repeat):
+        for index, function in enumerate(functions):
+            start_time = time.perf_counter()
+            function()
+            best[index] = min(best[index], time.perf_counter() - start_time)
+    return best
+
+
+def read_values(serializer, reads):
+    path = ["photos_api", "client_id"]
+    get_value = serializer.get_value
+    for _ in range(reads):
+        get_value(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reads", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+
+    # default configuration of applications which don't configure logging
+    assert not logger.isEnabledFor(logging.DEBUG)
+
+    print(f"{'serializer':>30} {'time':>10} {'per read':>10} {'overhead':>9}")
+    serializer_classes = [SerializerIni, SerializerIniLazyLogging, SerializerIniGuardedLogging, SerializerIniEagerLogging]
+    with tempfile.TemporaryDirectory(prefix="bench_logging_") as temp_dir:
+        functions = []
+        for serializer_class in serializer_classes:
+            serializer = serializer_class(os.path.join(temp_dir, serializer_class.__name__ + ".ini"))
+            AppConfig(serializer)
+            functions.append(lambda serializer=serializer: read_values(serializer, args.reads))
+        timings = measure(functions, args.repeat)
+        for serializer_class, duration in zip(serializer_classes, timings):
+            print(f"{serializer_class.__name__:>30} {duration * 1000:>8.1f}ms {duration / args.reads * 1e9:>8.1f}ns "
+                  f"{(duration / timings[0] - 1) * 100:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of ConfigModel on synthetic models (see model_generator.py).
+
+Measures attribute read and write throughput, cold and warm initialization, write_default_values_from_model(),
+commit latency versus file size and memory per field
+(of the first instance of a model class and of further instances). Only the API available since the first release is used,
+so the suite can measure older revisions too (see compare_revisions.py).
+
+Usage:
+    python benchmarks/bench_suite.py [--src DIR] [--scale 1.0] [--repeat 5] [--json results.json] [--filter read]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# size of models by shape (number of fields of wide models, depth of deep models, instances of many-instance models)
+SIZES = {"wide": 1000, "deep": 50, "many": 200}
+COMMIT_SIZES = [100, 1000, 10000]
+READS_PER_FIELD = 100
+
+# units of results, throughput is better when higher
+OPS_PER_SECOND = "ops/s"
+MILLISECONDS = "ms"
+BYTES_PER_FIELD = "B/field"
+
+
+def measure(function, repeat, setup=None):
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start_time = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+class BenchmarkSuite:
+
+    def __init__(self, temp_dir, scale, repeat):
+        import model_generator
+        self.generator = model_generator
+        self.temp_dir = temp_dir
+        self.scale = scale
+        self.repeat = repeat
+        self._file_index = 0
+
+    def _new_filename(self):
+        self._file_index += 1
+        return os.path.join(self.temp_dir, f"config_{self._file_index}.ini")
+
+    def _get_size(self, shape):
+        return max(1, int(SIZES[shape] * self.scale))
+
+    @staticmethod
+    def _release(config):
+        """
+        Write pending changes and release the serializer, so the next model reads the file again
+        """
+        serializer = config._serializer
+        if getattr(serializer, "_timer", None) is not None and hasattr(serializer, "_flush_delayed_write"):
+            serializer._flush_delayed_write()
+        gc.collect()
+
+    def _create_config(self, shape):
+        size = self._get_size(shape)
+        model_class = self.generator.generate_model(shape, size)
+        filename = self._new_filename()
+        config = model_class(filename)
+        fields = [self.generator.get_parent_and_name(config, path) for path in self.generator.get_field_paths(shape, size)]
+        return model_class, filename, config, fields
+
+    def bench_read(self, shape):
+        _, _, config, fields = self._create_config(shape)
+
+        def read():
+            for _ in range(READS_PER_FIELD):
+                for parent, name in fields:
+                    getattr(parent, name)
+
+        duration = measure(read, self.repeat)
+        return len(fields) * READS_PER_FIELD / duration, OPS_PER_SECOND
+
+    def bench_write(self, shape):
+        """
+        Writes to cache, files are written by the delayed write timer
+        """
+        _, _, config, fields = self._create_config(shape)
+        config._serializer._set_delayed_write(True, 60)
+
+        def write():
+            for value_index in range(10):
+                for parent, name in fields:
+                    setattr(parent, name, value_index)
+
+        duration = measure(write, self.repeat)
+        self._release(config)
+        return len(fields) * 10 / duration, OPS_PER_SECOND
+
+    def bench_cold_init(self, shape):
+        """
+        Initialize model with a new file
+        """
+        model_class = self.generator.generate_model(shape, self._get_size(shape))
+        filenames = []
+        duration = measure(lambda: model_class(filenames[-1]), self.repeat, setup=lambda: filenames.append(self._new_filename()))
+        return duration * 1000, MILLISECONDS
+
+    def bench_warm_init(self, shape):
+        """
+        Initialize model with an existing file containing all values
+        """
+        model_class, filename, config, _ = self._create_config(shape)
+        self._release(config)
+        del config
+        duration = measure(lambda: model_class(filename), self.repeat, setup=gc.collect)
+        return duration * 1000, MILLISECONDS
+
+    def bench_write_default_values(self, shape):
+        """
+        write_default_values_from_model() of a new serializer with an existing file
+        """
+        from configmodel.SerializerBase import SerializerBase
+        _, filename, config, _ = self._create_config(shape)
+        default_values = [SerializerBase.FieldDefaultValue(field.get_path(), field.definition.default_value)
+                          for field in config._get_all_fields_recursive()]
+        serializer_class = type(config._serializer)
+        serializers = []
+        duration = measure(lambda: serializers[-1].write_default_values_from_model(default_values), self.repeat,
+                           setup=lambda: serializers.append(serializer_class(filename)))
+        return duration * 1000, MILLISECONDS
+
+    def bench_commit(self, size):
+        """
+        Commit a single changed value of a wide model with size fields
+        """
+        model_class = self.generator.generate_wide(size)
+        config = model_class(self._new_filename())
+        serializer = config._serializer
+
+        def change_value():
+            serializer.set_cached_value(["field_0"], time.perf_counter(), is_dirty=True)
+
+        duration = measure(serializer._commit_delayed_write, self.repeat, setup=change_value)
+        return duration * 1000, MILLISECONDS
+
+    def bench_memory(self, shape):
+        """
+        Memory allocated by the model and its serializer per field
+        """
+        size = self._get_size(shape)
+        model_class = self.generator.generate_model(shape, size)
+        field_count = len(self.generator.get_field_paths(shape, size))
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start_size = tracemalloc.get_traced_memory()[0]
+            config = model_class(self._new_filename())
+            gc.collect()
+            allocated_size = tracemalloc.get_traced_memory()[0] - start_size
+        finally:
+            tracemalloc.stop()
+        del config
+        return allocated_size / field_count, BYTES_PER_FIELD
+
+    def bench_instance_memory(self, shape):
+        """
+        Memory allocated by another instance of an already used model class and its serializer per field
+        """
+        size = self._get_size(shape)
+        model_class = self.generator.generate_model(shape, size)
+        field_count = len(self.generator.get_field_paths(shape, size))
+        first_config = model_class(self._new_filename())
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start_size = tracemalloc.get_traced_memory()[0]
+            config = model_class(self._new_filename())
+            gc.collect()
+            allocated_size = tracemalloc.get_traced_memory()[0] - start_size
+        finally:
+            tracemalloc.stop()
+        del config, first_config
+        return allocated_size / field_count, BYTES_PER_FIELD
+
+    def get_benchmarks(self):
+        """
+        Get list of (name, function)
+        """
+        benchmarks = []
+        for benchmark in ["read", "write", "cold_init", "warm_init", "write_default_values", "memory", "instance_memory"]:
+            for shape in self.generator.SHAPES:
+                function = getattr(self, "bench_" + benchmark)
+                benchmarks.append((f"{benchmark}/{shape}/{self._get_size(shape)}", lambda function=function, shape=shape: function(shape)))
+        for size in COMMIT_SIZES:
+            size = max(1, int(size * self.scale))
+            benchmarks.append((f"commit/wide/{size}", lambda size=size: self.bench_commit(size)))
+        return benchmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--src", default=os.path.join(BENCHMARKS_DIR, "..", "src"), help="source directory of configmodel")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply sizes of models")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to JSON file")
+    parser.add_argument("--filter", help="run only benchmarks containing this text")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.src))
+    sys.path.insert(0, BENCHMARKS_DIR)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_suite_") as temp_dir:
+        suite = BenchmarkSuite(temp_dir, args.scale, args.repeat)
+        for name, function in suite.get_benchmarks():
+            if args.filter and args.filter not in name:
+                continue
+            try:
+                value, unit = function()
+            except Exception as e:
+                print(f"{name:<40} failed: {e!r}")
+                continue
+            results[name] = {"value": value, "unit": unit}
+            print(f"{name:<40} {value:>14,.1f} {unit}")
+            sys.stdout.flush()
+            gc.collect()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Compare benchmark results (bench_suite.py) of two git revisions.
+
+Sources of the revisions are exported by `git archive`, the benchmark suite of the current working tree is used
+for both of them. Without the second revision the working tree is compared.
+
+Usage:
+    python benchmarks/compare_revisions.py BASE_REVISION [REVISION] [-- bench_suite.py options]
+    python benchmarks/compare_revisions.py HEAD~5 HEAD -- --scale 0.5 --filter init
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# units of results which are better when higher
+HIGHER_IS_BETTER_UNITS = {"ops/s"}
+
+
+def export_sources(revision, target_dir):
+    """
+    Extract src directory of revision to target_dir, returns path of extracted src directory
+    """
+    archive = subprocess.run(["git", "archive", "--format=tar", revision, "src"], cwd=REPOSITORY_DIR,
+                             stdout=subprocess.PIPE, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(target_dir, filter="data")
+        else:
+            tar.extractall(target_dir)
+    return os.path.join(target_dir, "src")
+
+
+def run_suite(src_dir, json_filename, suite_args):
+    print(f"Running benchmarks of {src_dir}")
+    subprocess.run([sys.executable, os.path.join(BENCHMARKS_DIR, "bench_suite.py"), "--src", src_dir, "--json", json_filename] + suite_args,
+                   check=True)
+    with open(json_filename) as f:
+        return json.load(f)
+
+
+def print_comparison(base_name, base_results, name, results):
+    print()
+    print(f"{'benchmark':<40} {base_name:>16} {name:>16} {'change':>8}")
+    for benchmark, base_result in base_results.items():
+        result = results.get(benchmark)
+        if result is None:
+            print(f"{benchmark:<40} {base_result['value']:>16,.1f} {'-':>16}")
+            continue
+        base_value, value = base_result["value"], result["value"]
+        if base_result["unit"] in HIGHER_IS_BETTER_UNITS:
+            speedup = value / base_value if base_value else float("inf")
+        else:
+            speedup = base_value / value if value else float("inf")
+        print(f"{benchmark:<40} {base_value:>16,.1f} {value:>16,.1f} {speedup:>7.2f}x  {result['unit']}")
+    for benchmark in results:
+        if benchmark not in base_results:
+            print(f"{benchmark:<40} {'-':>16} {results[benchmark]['value']:>16,.1f}")
+    print("\nchange > 1.00x means the second revision is faster (or uses less memory)")
+
+
+def main():
+    argv = sys.argv[1:]
+    suite_args = []
+    if "--" in argv:
+        suite_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base_revision")
+    parser.add_argument("revision", nargs="?", help="default: working tree")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="compare_revisions_") as temp_dir:
+        base_src = export_sources(args.base_revision, os.path.join(temp_dir, "base"))
+        base_results = run_suite(base_src, os.path.join(temp_dir, "base.json"), suite_args)
+        if args.revision is None:
+            src = os.path.join(REPOSITORY_DIR, "src")
+        else:
+            src = export_sources(args.revision, os.path.join(temp_dir, "revision"))
+        results = run_suite(src, os.path.join(temp_dir, "revision.json"), suite_args)
+    print_comparison(args.base_revision, base_results, args.revision or "working tree", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Generate synthetic config models of different shapes for benchmarks.
+
+Shapes:
+    wide  - single model with `size` fields
+    deep  - chain of `size` nested models, each with FIELDS_PER_LEVEL fields
+    many  - `size` instances of the same nested model, each with FIELDS_PER_INSTANCE fields
+"""
+
+FIELDS_PER_LEVEL = 4
+FIELDS_PER_INSTANCE = 8
+SHAPES = ["wide", "deep", "many"]
+
+
+def _default_value(index):
+    # mix of supported types
+    return ["value %d" % index, index, index / 2, index % 2 == 0][index % 4]
+
+
+def _create_class(name, attributes):
+    from configmodel import ConfigModel
+    return type(name, (ConfigModel,), attributes)
+
+
+def generate_wide(size):
+    return _create_class("WideConfig", {f"field_{index}": _default_value(index) for index in range(size)})
+
+
+def generate_deep(size):
+    child = None
+    for level in reversed(range(size)):
+        attributes = {f"field_{index}": _default_value(index) for index in range(FIELDS_PER_LEVEL)}
+        if child is not None:
+            attributes["child"] = child()
+        child = _create_class(f"Level{level}Config", attributes)
+    return child
+
+
+def generate_many(size):
+    item_class = _create_class("ItemConfig", {f"field_{index}": _default_value(index) for index in range(FIELDS_PER_INSTANCE)})
+    return _create_class("ManyConfig", {f"item_{index}": item_class() for index in range(size)})
+
+
+def generate_model(shape, size):
+    """
+    Generate config model class of the shape, see get_field_paths() for its fields
+    """
+    return {"wide": generate_wide, "deep": generate_deep, "many": generate_many}[shape](size)
+
+
+def get_field_paths(shape, size):
+    """
+    Get paths of all fields of the generated model, as lists of attribute names
+    """
+    if shape == "wide":
+        return [[f"field_{index}"] for index in range(size)]
+    if shape == "deep":
+        return [["child"] * level + [f"field_{index}"] for level in range(size) for index in range(FIELDS_PER_LEVEL)]
+    return [[f"item_{item}", f"field_{index}"] for item in range(size) for index in range(FIELDS_PER_INSTANCE)]
+
+
+def get_parent_and_name(config, path):
+    """
+    Get the model containing the field and the name of the field, so it can be read by getattr(parent, name)
+    """
+    for name in path[:-1]:
+        config = getattr(config, name)
+    return config, path[-1]
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Stress test and throughput of ConfigModel used from many threads.
+
+For every thread count, reader and writer threads (the same number by default) use a single model for a while,
+and a committer thread flushes pending changes in the background (delayed writes are enabled too).
+Every writer increments its own field. Afterwards the file is read again and verified:
+the last value of every writer must be written (no lost updates) and the file must be readable (no corruption).
+Readers verify that values of fields never go back.
+
+Works with free-threaded builds of Python (python3.13t), where threads really run in parallel.
+
+Usage:
+    python benchmarks/stress_concurrency.py [--threads 1 2 4 8 16 32] [--duration 1.0] [--extension .ini]
+    python benchmarks/stress_concurrency.py --readers 16 --writers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from configmodel import ConfigModel  # noqa: E402
+from configmodel.SerializersFactory import SerializersFactory  # noqa: E402
+
+COMMIT_INTERVAL_SECONDS = 0.005
+DELAY_SECONDS = 0.01
+# fields read by every reader in a loop
+READ_FIELD_COUNT = 8
+
+
+def create_model_class(writer_count):
+    attributes = {f"writer_{index}": 0 for index in range(writer_count)}
+    attributes.update({f"field_{index}": index for index in range(READ_FIELD_COUNT)})
+    return type("StressConfig", (ConfigModel,), attributes)
+
+
+class StressRun:
+
+    def __init__(self, filename, reader_count, writer_count, duration):
+        self.filename = filename
+        self.reader_count = reader_count
+        self.writer_count = writer_count
+        self.duration = duration
+        self.model_class = create_model_class(writer_count)
+        self.config = self.model_class(filename)
+        self.config._serializer._set_delayed_write(True, DELAY_SECONDS)
+        self.stop_event = threading.Event()
+        self.start_barrier = threading.Barrier(reader_count + writer_count + 2)
+        self.reads = [0] * reader_count
+        self.last_written = [0] * writer_count
+        self.commits = 0
+        self.errors = []
+
+    def _reader(self, index):
+        config = self.config
+        names = [f"writer_{writer}" for writer in range(self.writer_count)] + [f"field_{field}" for field in range(READ_FIELD_COUNT)]
+        last_values = {}
+        reads = 0
+        self.start_barrier.wait()
+        while not self.stop_event.is_set():
+            for name in names:
+                value = int(getattr(config, name))
+                if value < last_values.get(name, 0):
+                    self.errors.append(f"reader {index}: {name} went back from {last_values[name]} to {value}")
+                last_values[name] = value
+            reads += len(names)
+        self.reads[index] = reads
+
+    def _writer(self, index):
+        config = self.config
+        name = f"writer_{index}"
+        value = 0
+        self.start_barrier.wait()
+        while not self.stop_event.is_set():
+            value += 1
+            setattr(config, name, value)
+        self.last_written[index] = value
+
+    def _committer(self):
+        serializer = self.config._serializer
+        self.start_barrier.wait()
+        while not self.stop_event.is_set():
+            serializer.flush()
+            self.commits += 1
+            time.sleep(COMMIT_INTERVAL_SECONDS)
+
+    def _run_thread(self, target, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            self.errors.append(f"{target.__name__}{args}: {e!r}")
+            self.stop_event.set()
+
+    def run(self):
+        threads = [threading.Thread(target=self._run_thread, args=(self._committer,))]
+        for index in range(self.reader_count):
+            threads.append(threading.Thread(target=self._run_thread, args=(self._reader, index)))
+        for index in range(self.writer_count):
+            threads.append(threading.Thread(target=self._run_thread, args=(self._writer, index)))
+        for thread in threads:
+            thread.start()
+        self.start_barrier.wait()
+        start_time = time.perf_counter()
+        time.sleep(self.duration)
+        self.stop_event.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start_time
+        self.config._serializer.flush()
+        self._verify_file()
+        return elapsed
+
+    def _verify_file(self):
+        """
+        Read the file by a new serializer (not shared with the model) and compare it with values written last
+        """
+        serializer = SerializersFactory.get_serializer_class(self.filename)(self.filename)
+        try:
+            serializer.reload()
+        except Exception as e:
+            self.errors.append(f"file is corrupted: {e!r}")
+            return
+        for index, last_written in enumerate(self.last_written):
+            value = serializer.get_value([f"writer_{index}"])
+            if value is None or int(value) != last_written:
+                self.errors.append(f"lost update: writer_{index} is {value} in the file, last written value is {last_written}")
+
+
+def get_thread_counts(args, parser):
+    """
+    Get list of (readers, writers) of runs. Readers and writers default to --threads,
+    a single number of readers (or writers) is used with every number of writers (or readers).
+    """
+    readers = args.readers if args.readers is not None else args.threads
+    writers = args.writers if args.writers is not None else args.threads
+    if len(readers) == 1:
+        readers = readers * len(writers)
+    elif len(writers) == 1:
+        writers = writers * len(readers)
+    if len(readers) != len(writers):
+        parser.error("--readers and --writers must have the same number of values (or a single value)")
+    thread_counts = list(zip(readers, writers))
+    if any(min(counts) < 0 or sum(counts) == 0 for counts in thread_counts):
+        parser.error("numbers of readers and writers must not be negative, and at least one thread is required")
+    return thread_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="numbers of readers and writers (shorthand for the same --readers and --writers)")
+    parser.add_argument("--readers", type=int, nargs="+", help="numbers of reader threads (default: --threads)")
+    parser.add_argument("--writers", type=int, nargs="+", help="numbers of writer threads (default: --threads)")
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds per thread count")
+    parser.add_argument("--extension", default=".ini", help="format of the config file (.ini, .json, .toml, .sqlite)")
+    args = parser.parse_args()
+    thread_counts = get_thread_counts(args, parser)
+
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if is_gil_enabled else 'disabled'}, {args.extension} file")
+    print(f"{'readers':>8} {'writers':>8} {'reads/s':>14} {'writes/s':>14} {'commits':>8} {'errors':>7}")
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="stress_concurrency_") as temp_dir:
+        for reader_count, writer_count in thread_counts:
+            filename = os.path.join(temp_dir, f"config_{reader_count}_{writer_count}{args.extension}")
+            stress_run = StressRun(filename, reader_count, writer_count, args.duration)
+            elapsed = stress_run.run()
+            print(f"{reader_count:>8} {writer_count:>8} {sum(stress_run.reads) / elapsed:>14,.0f} "
+                  f"{sum(stress_run.last_written) / elapsed:>14,.0f} {stress_run.commits:>8} {len(stress_run.errors):>7}")
+            for error in stress_run.errors[:10]:
+                print(f"    {error}")
+            failed = failed or bool(stress_run.errors)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import configparser
+import functools
+import itertools
+from collections import Counter
+
+
+class ConfigCollection:
+    """
+    Values of many instances of the same config model class stored by columns (a list of values per field path).
+
+    Queries over all instances (mask(), filter(), aggregate(), value_counts()) work on whole columns
+    instead of reading attributes of every instance. Columns are kept up to date by change listeners
+    of the instances, close() removes them (or use the collection as a context manager).
+    Rows are read-only views of values of the instances, e.g. ``collection[0].photos_api.client_id``.
+
+    Paths are dotted names of values in the config files, e.g. ``"photos_api.client_id"``.
+    Values are converted to types of default values of the fields (INI files store strings),
+    so columns of fields with bool, int or float default values don't mix types.
+    """
+
+    class Row:
+        """
+        Read-only view of values of a single instance (or of its nested model)
+        """
+        __slots__ = ("_collection", "_index", "_schema")
+
+        def __init__(self, collection, index, schema):
+            self._collection = collection
+            self._index = index
+            self._schema = schema
+
+        def __getattr__(self, name):
+            field = self._schema.fields.get(name)
+            if field is None:
+                raise AttributeError(f"{self._schema.model_class.__name__} has no field '{name}'")
+            if field.schema is not None:
+                return ConfigCollection.Row(self._collection, self._index, field.schema)
+            return self._collection._columns[field][self._index]
+
+        def _get_model(self):
+            """
+            Get the model instance of this row
+            """
+            return self._collection.models[self._index]
+
+        def __repr__(self):
+            return f"Row({self._index}, {self._schema.model_class.__name__})"
+
+    def __init__(self, model_class, models=()):
+        self.model_class = model_class
+        self._schema = model_class._get_root_schema()
+        # {SchemaField: list of values of all models}
+        self._columns = {field: [] for field in self._schema.value_fields_by_path.values()}
+        self.models = []
+        # (serializer, listener) of all models
+        self._listeners = []
+        for model in models:
+            self.add(model)
+
+    def add(self, model):
+        """
+        Add model instance of the model class (root model bound to a config file), returns index of its row
+        """
+        if model._schema is not self._schema:
+            raise ValueError(f"{model.__class__.__name__} is not a root model of {self.model_class.__name__} bound to a config file")
+        index = len(self.models)
+        serializer = model._get_serializer()
+        # values changed while they are read are written by the listener
+        listener = functools.partial(self._on_value_changed, index)
+        serializer.add_change_listener(listener)
+        self._listeners.append((serializer, listener))
+        self.models.append(model)
+        for field, column in self._columns.items():
+            column.append(self._convert_value(serializer.get_value(field.path), field.definition.default_value))
+        return index
+
+    def _on_value_changed(self, index, change):
+        field = self._schema.value_fields_by_path.get(tuple(change.path))
+        if field is None:
+            # value is not a part of the model
+            return
+        column = self._columns[field]
+        if index < len(column):
+            column[index] = self._convert_value(change.value, field.definition.default_value)
+
+    @staticmethod
+    def _convert_value(value, default_value):
+        """
+        Convert string value to the type of the default value, values which can't be converted are kept
+        """
+        if not isinstance(value, str) or isinstance(default_value, str):
+            return value
+        try:
+            if isinstance(default_value, bool):
+                return configparser.ConfigParser.BOOLEAN_STATES[value.lower()]
+            if isinstance(default_value, (int, float)):
+                return type(default_value)(value)
+        except (KeyError, ValueError):
+            pass
+        return value
+
+    def close(self):
+        """
+        Stop updating values of the collection
+        """
+        for serializer, listener in self._listeners:
+            serializer.remove_change_listener(listener)
+        self._listeners.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.models)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.models)
+        if not 0 <= index < len(self.models):
+            raise IndexError("ConfigCollection index out of range")
+        return self.Row(self, index, self._schema)
+
+    def __iter__(self):
+        return (self.Row(self, index, self._schema) for index in range(len(self.models)))
+
+    def _get_column(self, path):
+        if isinstance(path, str):
+            path = path.split(".")
+        field = self._schema.value_fields_by_path.get(tuple(path))
+        if field is None:
+            raise KeyError(f"{self.model_class.__name__} has no field '{'.'.join(path)}'")
+        return self._columns[field]
+
+    def column(self, path):
+        """
+        Get list of values of the field of all models
+        """
+        return list(self._get_column(path))
+
+    def mask(self, path, predicate):
+        """
+        Get list of booleans, True for models whose value of the field matches the predicate.
+        Predicate is either a function of the value or a value compared by equality.
+        Masks can be combined, e.g. ``[a and b for a, b in zip(mask_a, mask_b)]``.
+        """
+        column = self._get_column(path)
+        if callable(predicate):
+            return [bool(predicate(value)) for value in column]
+        return [value == predicate for value in column]
+
+    def select(self, mask):
+        """
+        Get rows of models selected by the mask
+        """
+        return [self.Row(self, index, self._schema) for index in itertools.compress(range(len(self.models)), mask)]
+
+    def filter(self, path, predicate):
+        """
+        Get rows of models whose value of the field matches the predicate (see mask())
+        """
+        return self.select(self.mask(path, predicate))
+
+    def aggregate(self, path, function, mask=None):
+        """
+        Apply function to the list of values of the field (e.g. max, sum or statistics.mean),
+        only values of models selected by the mask are used if it's set
+        """
+        column = self._get_column(path)
+        if mask is not None:
+            return function(list(itertools.compress(column, mask)))
+        return function(list(column))
+
+    def value_counts(self, path, mask=None):
+        """
+        Get distribution of values of the field as collections.Counter
+        """
+        column = self._get_column(path)
+        if mask is not None:
+            return Counter(itertools.compress(column, mask))
+        return Counter(column)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+
+class ConfigDiff:
+    """
+    Structural diff between two sets of config values.
+
+    Values are arranged into a tree by their paths, and every node holds a hash of its content (Merkle tree).
+    Subtrees with equal hashes are skipped, so comparing costs work proportional to the differences.
+    """
+
+    class _Missing:
+        def __repr__(self):
+            return "MISSING"
+
+    # old or new value of a change when the value doesn't exist
+    MISSING = _Missing()
+
+    class Change:
+        """
+        Single changed value
+        """
+        def __init__(self, path, old_value, new_value):
+            self.path = path
+            self.old_value = old_value
+            self.new_value = new_value
+
+        @property
+        def is_added(self):
+            return self.old_value is ConfigDiff.MISSING
+
+        @property
+        def is_removed(self):
+            return self.new_value is ConfigDiff.MISSING
+
+        def __eq__(self, other):
+            if not isinstance(other, ConfigDiff.Change):
+                return NotImplemented
+            return (self.path, self.old_value, self.new_value) == (other.path, other.old_value, other.new_value)
+
+        def __repr__(self):
+            return f"Change({self.path}, {self.old_value!r} -> {self.new_value!r})"
+
+    class HashTree:
+        """
+        Tree of values by path. Node hashes are computed lazily and invalidated by set_value().
+        """
+        def __init__(self):
+            self.children = {}
+            self.value = ConfigDiff.MISSING
+            self._digest = None
+
+        def set_value(self, path, value):
+            """
+            Set value and invalidate hashes of all nodes along the path
+            """
+            node = self
+            node._digest = None
+            for name in path:
+                child = node.children.get(name)
+                if child is None:
+                    child = node.children[name] = ConfigDiff.HashTree()
+                node = child
+                node._digest = None
+            node.value = value
+
+        @property
+        def digest(self):
+            if self._digest is None:
+                # values are compared as strings, as they are stored in config files
+                h = hashlib.blake2b(digest_size=16)
+                if self.value is not ConfigDiff.MISSING:
+                    h.update(b"=" + str(self.value).encode())
+                for name in sorted(self.children):
+                    h.update(name.encode() + b"\0" + self.children[name].digest)
+                self._digest = h.digest()
+            return self._digest
+
+        def iter_values(self, path=None):
+            """
+            Iterate over (path, value) of all values in this subtree
+            """
+            if path is None:
+                path = []
+            if self.value is not ConfigDiff.MISSING:
+                yield path, self.value
+            for name, child in self.children.items():
+                yield from child.iter_values(path + [name])
+
+    @classmethod
+    def build_tree(cls, values):
+        """
+        Build hash tree from iterable of (path, value)
+        """
+        tree = cls.HashTree()
+        for path, value in values:
+            tree.set_value(path, value)
+        return tree
+
+    @classmethod
+    def compare_trees(cls, old_tree, new_tree):
+        """
+        Get list of changes turning old tree into new tree
+        """
+        changes = []
+        cls._compare_nodes(old_tree, new_tree, [], changes)
+        return changes
+
+    @classmethod
+    def diff(cls, old_values, new_values):
+        """
+        Get list of changes turning old values into new values (iterables of (path, value))
+        """
+        return cls.compare_trees(cls.build_tree(old_values), cls.build_tree(new_values))
+
+    @classmethod
+    def _compare_nodes(cls, old_node, new_node, path, changes):
+        if old_node is None:
+            changes.extend(cls.Change(p, cls.MISSING, v) for p, v in new_node.iter_values(path))
+            return
+        if new_node is None:
+            changes.extend(cls.Change(p, v, cls.MISSING) for p, v in old_node.iter_values(path))
+            return
+        if old_node.digest == new_node.digest:
+            # nothing changed in this subtree
+            return
+        old_value, new_value = old_node.value, new_node.value
+        if old_value is cls.MISSING or new_value is cls.MISSING:
+            if old_value is not new_value:
+                changes.append(cls.Change(path, old_value, new_value))
+        elif str(old_value) != str(new_value):
+            changes.append(cls.Change(path, old_value, new_value))
+        for name, old_child in old_node.children.items():
+            cls._compare_nodes(old_child, new_node.children.get(name), path + [name], changes)
+        for name, new_child in new_node.children.items():
+            if name not in old_node.children:
+                cls._compare_nodes(None, new_child, path + [name], changes)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import concurrent.futures
+import os
+
+from configmodel.Logger import logger
+from configmodel.SerializerBase import SerializerBase
+from configmodel.SerializerCachedBase import SerializerCachedBase
+from configmodel.SerializersFactory import SerializersFactory
+
+
+class ConfigLoader:
+    """
+    Loads many config files of the same model class in parallel, e.g. a config file per tenant.
+
+    Files are parsed by a pool of threads or processes. Processes parse files in parallel even if threads are limited
+    by the GIL, only parsed values are sent back to create the models. All models share the schema of the model class.
+    """
+    THREAD = "thread"
+    PROCESS = "process"
+
+    # files parsed by a task of the pool, if chunk_size is not set
+    MAX_CHUNK_SIZE = 64
+
+    class LoadError(Exception):
+        """
+        Raised by load() if a file can't be loaded and fail_fast is set
+        """
+        def __init__(self, filename, error):
+            super().__init__(f"Failed to load config file {filename}: {error!r}")
+            self.filename = filename
+            self.error = error
+
+    class Result:
+        """
+        Returned by load()
+        """
+        def __init__(self):
+            # {filename: model} in order of the filenames passed to load()
+            self.models = {}
+            # {filename: exception} of files which couldn't be loaded
+            self.errors = {}
+
+        def __repr__(self):
+            return f"Result(models={len(self.models)}, errors={len(self.errors)})"
+
+    def __init__(self, model_class, executor=THREAD, max_workers=None, fail_fast=True, write_default_values=True, chunk_size=None):
+        """
+        :param model_class: ConfigModel class of all files
+        :param executor: "thread", "process" or an instance of concurrent.futures.Executor
+        :param max_workers: size of the pool created by the loader, default of concurrent.futures if None
+        :param fail_fast: raise LoadError for the first file which can't be loaded, otherwise errors are collected
+        :param write_default_values: write values missing in files, otherwise default values are only used in memory
+        :param chunk_size: number of files parsed by a task of the pool
+        """
+        self.model_class = model_class
+        self.executor = executor
+        self.max_workers = max_workers
+        self.fail_fast = fail_fast
+        self.write_default_values = write_default_values
+        self.chunk_size = chunk_size
+
+    def load(self, filenames):
+        """
+        Load config files, returns ConfigLoader.Result
+        """
+        filenames = list(dict.fromkeys(filenames))
+        if isinstance(self.executor, concurrent.futures.Executor):
+            return self._load(self.executor, filenames)
+        if self.executor == self.THREAD:
+            executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+        elif self.executor == self.PROCESS:
+            executor = concurrent.futures.ProcessPoolExecutor(self.max_workers)
+        else:
+            raise ValueError(f"Unknown executor: {self.executor!r}, use '{self.THREAD}', '{self.PROCESS}' or concurrent.futures.Executor")
+        with executor:
+            return self._load(executor, filenames)
+
+    def _load(self, executor, filenames):
+        in_processes = isinstance(executor, concurrent.futures.ProcessPoolExecutor)
+        chunks = self._split(filenames, self._get_chunk_size(executor, len(filenames)))
+        logger.debug("Loading %d config files of %s in %s", len(filenames), self.model_class.__name__, type(executor).__name__)
+        if in_processes:
+            schema = self.model_class._get_root_schema()
+            default_values = [(field.path, field.value) for field in schema.default_values]
+            futures = {}
+            for chunk in chunks:
+                # serializer class is resolved here, the serializer could be registered only in this process
+                files = [(filename, SerializersFactory.get_serializer_class(filename)) for filename in chunk]
+                future = executor.submit(self._read_files, files, default_values, self.write_default_values)
+                futures[future] = chunk
+        else:
+            futures = {executor.submit(self._create_models, chunk): chunk for chunk in chunks}
+        models = {}
+        errors = {}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    outcomes = future.result()
+                except Exception as e:
+                    # e.g. the pool is broken, all files of the task failed
+                    outcomes = [(filename, None, e) for filename in futures[future]]
+                for filename, outcome, error in outcomes:
+                    if error is None and in_processes:
+                        # outcome is list of values read by the worker process
+                        outcome, error = self._create_model(filename, outcome)
+                    if error is None:
+                        models[filename] = outcome
+                        continue
+                    if self.fail_fast:
+                        raise self.LoadError(filename, error) from error
+                    errors[filename] = error
+        finally:
+            for future in futures:
+                future.cancel()
+        result = self.Result()
+        result.models = {filename: models[filename] for filename in filenames if filename in models}
+        result.errors = {filename: errors[filename] for filename in filenames if filename in errors}
+        return result
+
+    def _get_chunk_size(self, executor, file_count):
+        if self.chunk_size is not None:
+            return self.chunk_size
+        worker_count = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+        # several tasks per worker, so workers finishing early get more work
+        return max(1, min(self.MAX_CHUNK_SIZE, file_count // (worker_count * 4)))
+
+    @staticmethod
+    def _split(filenames, chunk_size):
+        return [filenames[index:index + chunk_size] for index in range(0, len(filenames), chunk_size)]
+
+    def _create_model(self, filename, stored_values=None):
+        """
+        Create model of a file, values are read from the file unless stored_values are passed
+
+        :return: (model, None) or (None, exception)
+        """
+        try:
+            model = self.model_class()
+            if stored_values is None:
+                model._initialize_config(filename, write_default_values=self.write_default_values)
+            else:
+                model._initialize_config(filename, write_default_values=False, stored_values=stored_values)
+        except Exception as e:
+            return None, e
+        return model, None
+
+    def _create_models(self, filenames):
+        """
+        Task of the thread pool
+        """
+        outcomes = []
+        for filename in filenames:
+            model, error = self._create_model(filename)
+            outcomes.append((filename, model, error))
+            if error is not None and self.fail_fast:
+                break
+        return outcomes
+
+    @staticmethod
+    def _read_files(files, default_values, write_default_values):
+        """
+        Task of the process pool, reads values of list of (filename, serializer class).
+        Returns list of (filename, list of (path, value) or None, exception or None).
+        """
+        default_values = [SerializerBase.FieldDefaultValue(path, value) for path, value in default_values]
+        outcomes = []
+        for filename, serializer_class in files:
+            if serializer_class is None or not issubclass(serializer_class, SerializerCachedBase):
+                # unknown extension (reported by the model) or values are not cached, the model reads the file
+                outcomes.append((filename, None, None))
+                continue
+            try:
+                serializer = serializer_class(filename)
+                if write_default_values:
+                    serializer.write_default_values_from_model(default_values)
+                else:
+                    serializer.read_values_from_model(default_values)
+                values = [(cached_value.path, cached_value.value) for cached_value in serializer._cached_values.values()]
+            except Exception as e:
+                outcomes.append((filename, None, e))
+                continue
+            outcomes.append((filename, values, None))
+        return outcomes
@@ -1,45 +1,80 @@
 # -*- coding: utf-8 -*-
-import copy
+import threading
+import weakref
 from typing import Dict, Any, Union, List
 
+from configmodel.ConfigDiff import ConfigDiff
 from configmodel.FieldBase import FieldBase
-from configmodel.Logger import Log
+from configmodel.Logger import logger
+from configmodel.ProfilingHooks import ProfilingHooks
 from configmodel.SerializerBase import SerializerBase
 from configmodel.SerializersFactory import SerializersFactory
 from configmodel.Utils import pascal_case_to_snake_case
 
 
-class FieldInstance:
-    serializer: Union[SerializerBase, None]
-    name: Union[str, None]
-    definition: Union[FieldBase, Any, None]
+class SchemaField:
+    """
+    Field of a config model class, shared by all instances of the class (see ModelSchema)
+    """
+    __slots__ = ("name", "path", "definition", "schema", "is_static")
+
+    name: str
+    path: List[str]
+    definition: Union[FieldBase, None]
+
+    def __init__(self, name, path, definition=None, schema=None, is_static=False):
+        # name of the field in the config file
+        self.name = name
+        # path of the field in the root model, passed to serializers (must not be modified)
+        self.path = path
+        # definition of a value field, None for nested models
+        self.definition = definition
+        # ModelSchema of a nested model, None for value fields
+        self.schema = schema
+        # nested model is a class definition, its static instance is used (see ConfigModel._decorated_as_static_field)
+        self.is_static = is_static
 
-    def __init__(self):
-        self.parent_field = None
-        self.serializer = None
-        self.name = None
-        self.definition = None
+    def get_path(self):
+        """
+        Get path to this field
+        """
+        return list(self.path)
 
-    def get_value(self):
-        assert self.serializer is not None, "Serializer is not set. This is a bug in ConfigModel library, please report it."
-        assert self.name is not None, "Field name is not set. This is a bug in ConfigModel library, please report it."
-        return self.serializer.get_value(self.get_path())
 
-    def set_value(self, value):
-        assert self.serializer is not None, "Serializer is not set. This is a bug in ConfigModel library, please report it."
-        assert self.name is not None, "Field name is not set. This is a bug in ConfigModel library, please report it."
-        self.serializer.set_value(self.get_path(), value)
+class ModelSchema:
+    """
+    Layout of fields of a config model class placed at a path of the root model: names, paths,
+    default values and nested models. The schema of a root model class is built once and shared
+    by all instances of the class, instances keep only the serializer holding their values.
+    """
 
-    def get_path(self):
+    def __init__(self, model_class, path):
+        self.model_class = model_class
+        # path of the model in the root model
+        self.path = path
+        # key of the model in versions and nested models of the root model instance
+        self.key = tuple(path)
+        # fields by attribute name
+        self.fields: Dict[str, SchemaField] = {}
+        # set for root models only
+        self.default_values: Union[List[SerializerBase.FieldDefaultValue], None] = None
+        self.value_fields_by_path: Union[Dict[tuple, SchemaField], None] = None
+        self.static_fields: Union[List[SchemaField], None] = None
+
+    def iter_fields_recursive(self):
         """
-        Get path to this field
+        Iterate through fields of this model and nested models (depth-first)
         """
-        path = []
-        if self.parent_field is not None:
-            path = self.parent_field.get_path()
-        if self.name is not None:
-            path.append(self.name)
-        return path
+        for field in self.fields.values():
+            yield field
+            if field.schema is not None:
+                yield from field.schema.iter_fields_recursive()
+
+    def iter_value_fields(self):
+        """
+        Iterate through value fields of this model and nested models
+        """
+        return (field for field in self.iter_fields_recursive() if field.schema is None)
 
 
 class MetaConfigModel(type):
@@ -58,6 +93,9 @@ class MetaConfigModel(type):
             return super().__getattribute__(name)
         # noinspection PyProtectedMember
         if instance._fields is None or name not in instance._fields:
+            if name in ConfigModel.__dict__:
+                # public method of ConfigModel (e.g. aflush()), bind it to the registered instance
+                return instance.__getattribute__(name)
             return super().__getattribute__(name)
         return instance.__getattribute__(name)
 
@@ -83,23 +121,44 @@ class ConfigModel(metaclass=MetaConfigModel):
     Base class for Config Models
     """
 
-    def __init__(self, filename=None, **kwargs):
+    # root schemas of model classes are built once, even if instances are created by several threads
+    _schema_lock = threading.Lock()
+
+    def __init__(self, filename=None):
         # check if class was already registered as config
         if self._get_instance() is not None:
             class_name = self.__class__.__name__
             raise Exception(f"{class_name} is already registered using class decorator. "
                             f"Creating instances is not allowed. Remove decorator to create instances of {class_name}.")
         self._serializer = None
+        # fields of the schema by attribute name (shared by all instances), None until bound to a config file
         self._fields = None
-        self._field_instance = None
-
-        # check if "field_instance" attribute is in kwargs
-        if "field_instance" in kwargs:
-            self._field_instance = kwargs["field_instance"]
+        self._schema = None
+        # root model instance this model belongs to
+        self._root = None
 
         if filename is not None:
             self._initialize_config(filename)
 
+    def _bind(self, root, schema):
+        """
+        Bind this model (root or nested) to the config file of the root model instance
+        """
+        self._root = root
+        self._schema = schema
+        self._serializer = root._serializer
+        self._fields = schema.fields
+
+    @property
+    def _version(self):
+        """
+        Incremented every time a field of this model (or nested models) is changed
+        """
+        root = self._root
+        if root is None:
+            return 0
+        return root._versions.get(self._schema.key, 0)
+
     def __getattribute__(self, name):
         if name.startswith("_"):
             return super().__getattribute__(name)
@@ -107,19 +166,15 @@ class ConfigModel(metaclass=MetaConfigModel):
         if fields is None:
             return super().__getattribute__(name)
         # check if this is a field
-        if name in fields:
-            # this is a field
-            field: FieldInstance = fields[name]
-            # check if this is a nested class
-            if isinstance(field.definition, ConfigModel):
-                # this is a nested class instance
-                return field.definition
-
-            assert isinstance(field.definition, FieldBase), "Unknown type of field definition. This is a bug in ConfigModel library, please report it."
-            # this is a field definition
-            # must return the value
-            return field.get_value()
-        return super().__getattribute__(name)
+        field: SchemaField = fields.get(name)
+        if field is None:
+            return super().__getattribute__(name)
+        # check if this is a nested class
+        if field.schema is not None:
+            return self._get_nested_model(field)
+        # this is a field definition
+        # must return the value
+        return self._serializer.get_value(field.path)
 
     def __setattr__(self, name, value):
         if name.startswith("_"):
@@ -130,34 +185,191 @@ class ConfigModel(metaclass=MetaConfigModel):
             super().__setattr__(name, value)
             return
         # check if this is a field
-        if name in fields:
-            # this is a field
-            field: FieldInstance = fields[name]
-            # check if this is a nested class
-            if isinstance(field.definition, ConfigModel):
-                # this is a nested class instance
-                raise Exception("Nested class instances are read-only")
-
-            assert isinstance(field.definition, FieldBase), "Unknown type of field definition. This is a bug in ConfigModel library, please report it."
-            # this is a field definition
-            # must set the value
-            field.set_value(value)
+        field: SchemaField = fields.get(name)
+        if field is None:
+            super().__setattr__(name, value)
+            return
+        # check if this is a nested class
+        if field.schema is not None:
+            # this is a nested class instance
+            raise Exception("Nested class instances are read-only")
+        # this is a field definition
+        # must set the value
+        self._serializer.set_value(field.path, value)
+
+    def _initialize_config(self, filename, write_default_values=True, stored_values=None):
+        """
+        Initialize config model.
+        Filename can be also a serializer instance (e.g. SerializerLayered).
+        If write_default_values is False, missing values are not written to the config file on initialization,
+        stored_values (list of (path, value)) are used instead of reading the file (see ConfigLoader).
+        """
+        if isinstance(filename, SerializerBase):
+            self._serializer = filename
+        else:
+            self._serializer = SerializersFactory.get_serializer_by_filename(filename)
+        if SerializersFactory.metrics_enabled:
+            from configmodel.SerializerMetrics import SerializerMetrics
+            SerializerMetrics.attach(self._serializer)
+        if ProfilingHooks.is_enabled():
+            ProfilingHooks.attach(self._serializer)
+
+        ProfilingHooks.call(ProfilingHooks.INITIALIZE_FIELDS, self._initialize_fields, (write_default_values, stored_values),
+                            self._serializer.filename, model=self.__class__.__name__)
+
+        # keep versions of models up to date. Serializers are shared by all models of the file,
+        # so the listener must not keep the model alive, it is removed when the model is collected.
+        on_value_changed = weakref.WeakMethod(self._on_value_changed)
+
+        def _on_value_changed(change):
+            method = on_value_changed()
+            if method is not None:
+                method(change)
+
+        self._serializer.add_change_listener(_on_value_changed)
+        weakref.finalize(self, self._serializer.remove_change_listener, _on_value_changed).atexit = False
+
+    def _on_value_changed(self, change):
+        """
+        Increment versions of all models containing the changed field
+        """
+        versions = self._versions
+        path = tuple(change.path)
+        if path not in self._schema.value_fields_by_path:
+            # value is not a part of the model
+            versions[()] = versions.get((), 0) + 1
             return
-        super().__setattr__(name, value)
+        # every parent path of a field is a path of a model
+        for length in range(len(path)):
+            key = path[:length]
+            versions[key] = versions.get(key, 0) + 1
+
+    def _get_nested_model(self, field: SchemaField):
+        """
+        Get instance of a nested model, nested models of root instances are created on first access
+        """
+        root = self._root
+        if field.is_static:
+            static_instance = field.schema.model_class._get_instance()
+            if static_instance is not None and static_instance._root is root:
+                return static_instance
+        nested_models = root._nested_models
+        nested_model = nested_models.get(field.schema.key)
+        if nested_model is None:
+            model_class = field.schema.model_class
+            nested_model = model_class.__new__(model_class)
+            nested_model._bind(root, field.schema)
+            nested_model = nested_models.setdefault(field.schema.key, nested_model)
+        return nested_model
+
+    def _get_serializer(self) -> SerializerBase:
+        """
+        Get serializer of the config file this model (or nested model) belongs to
+        """
+        if self._serializer is None:
+            raise Exception(f"{self.__class__.__name__} is not bound to a config file")
+        return self._serializer
+
+    def _get_path(self):
+        """
+        Get path to this model. Path of the root model is empty.
+        """
+        if self._schema is None:
+            return []
+        return list(self._schema.path)
+
+    def _get_field(self, name) -> SchemaField:
+        """
+        Get field of a value field (not a nested model)
+        """
+        if self._fields is None or name not in self._fields:
+            raise AttributeError(f"{self.__class__.__name__} has no field '{name}'")
+        field: SchemaField = self._fields[name]
+        if field.schema is not None:
+            raise Exception("Nested class instances are read-only")
+        return field
+
+    def reload(self):
+        """
+        Reload values changed in the config file by other programs
+        """
+        self._get_serializer().reload()
+
+    def _get_hash_tree(self):
+        """
+        Get ConfigDiff.HashTree of values of this model
+        """
+        tree = self._get_serializer().get_hash_tree()
+        for name in self._get_path():
+            tree = tree.children.get(name)
+            if tree is None:
+                return ConfigDiff.HashTree()
+        return tree
+
+    def diff(self, other):
+        """
+        Get list of ConfigDiff.Change turning values of this model into values of other model.
+        Paths of changes are relative to the models, so it's possible to compare nested models,
+        e.g. ``cfg.photos_api.diff(cfg.maps_api)``.
+        """
+        return ConfigDiff.compare_trees(self._get_hash_tree(), other._get_hash_tree())
+
+    def patch(self, changes):
+        """
+        Apply changes returned by diff() to this model. All values are written in a single commit.
+        Removed values are ignored, values can't be removed from config files.
+        """
+        path = self._get_path()
+        self._get_serializer().set_values(
+            (path + change.path, change.new_value) for change in changes if not change.is_removed
+        )
 
-    def _initialize_config(self, filename):
+    def stats(self):
         """
-        Initialize config model
+        Get SerializerMetrics.Stats of the config file of this model, reads and writes are limited to this model.
+        Returns None if metrics are not enabled (see SerializersFactory.metrics_enabled).
         """
-        pass
-        self._serializer = SerializersFactory.get_serializer_by_filename(filename)
+        metrics = self._get_serializer()._metrics
+        if metrics is None:
+            return None
+        return metrics.get_stats(self._get_path())
 
-        root_field_instance = FieldInstance()
-        root_field_instance.parent_field = None
-        root_field_instance.name = None
-        root_field_instance.definition = None
-        root_field_instance.serializer = self._serializer
-        self._initialize_fields(root_field_instance)
+    async def aset(self, name, value):
+        """
+        Set value of a field without blocking the running event loop.
+        Writing to the config file is offloaded to the executor of the loop.
+        """
+        field = self._get_field(name)
+        await self._serializer.aset_value(field.path, value)
+
+    async def aflush(self):
+        """
+        Write pending changes to the config file without blocking the running event loop
+        """
+        await self._get_serializer().aflush()
+
+    async def changes(self):
+        """
+        Asynchronous iterator of changes of this model (including nested models).
+        Yields SerializerBase.ValueChange objects.
+        """
+        serializer = self._get_serializer()
+        path = self._get_path()
+        import asyncio
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def _on_change(change):
+            if change.path[:len(path)] == path:
+                # listeners may be called from other threads
+                loop.call_soon_threadsafe(queue.put_nowait, change)
+
+        serializer.add_change_listener(_on_change)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            serializer.remove_change_listener(_on_change)
 
     @classmethod
     def _get_instance(cls):
@@ -175,7 +387,7 @@ class ConfigModel(metaclass=MetaConfigModel):
         Set this class as the main config model
         and allows to get/set values by using static attributes
         """
-        Log.debug(f"Registering config file: {filename}")
+        logger.debug("Registering config file: %s", filename)
         cls._instance = cls(filename)
 
     @classmethod
@@ -183,11 +395,21 @@ class ConfigModel(metaclass=MetaConfigModel):
         """
         Set this class as a static field
         """
-        Log.debug(f"Registering static field: {field_name}")
-        field_instance = FieldInstance()
-        field_instance.name = field_name
-        cls._instance = cls(field_instance=field_instance)
-        field_instance.definition = cls._instance
+        logger.debug("Registering static field: %s", field_name)
+        instance = cls()
+        # name of the field in the parent model
+        instance._static_field_name = field_name
+        cls._instance = instance
+
+    @staticmethod
+    def _get_class_attribute(cls, name):
+        """
+        Get attribute from __dict__ of the class or its bases without invoking descriptors
+        """
+        for base_class in cls.__mro__:
+            if name in base_class.__dict__:
+                return base_class.__dict__[name]
+        return None
 
     @classmethod
     def __iter_class_attributes(cls):
@@ -215,6 +437,9 @@ class ConfigModel(metaclass=MetaConfigModel):
                 continue
             if attr_name in returned_fields:
                 continue
+            # skip public methods of ConfigModel (unless overridden by a field)
+            if attr_name in ConfigModel.__dict__ and cls._get_class_attribute(cls, attr_name) is ConfigModel.__dict__[attr_name]:
+                continue
             default_value = getattr(cls, attr_name, None)
             # annotated_type = None
             # if hasattr(cls, "__annotations__"):
@@ -222,49 +447,53 @@ class ConfigModel(metaclass=MetaConfigModel):
             returned_fields.add(attr_name)
             yield attr_name, default_value, None
 
-    def _get_all_fields_recursive(self) -> List[FieldInstance]:
+    def _get_all_fields_recursive(self) -> List[SchemaField]:
         """
-        Get all fields recursively
+        Get all value fields recursively
         """
-        assert self._fields is not None, "Fields are not initialized. This is a bug in ConfigModel library, please report it."
+        assert self._schema is not None, "Fields are not initialized. This is a bug in ConfigModel library, please report it."
+        return list(self._schema.iter_value_fields())
 
-        all_fields = []
-        for field_name, field in self._fields.items():
-            if isinstance(field.definition, ConfigModel):
-                nested_fields = field.definition._get_all_fields_recursive()
-                assert nested_fields is not None, "Nested fields are None. This is a bug in ConfigModel library, please report it."
-                all_fields += nested_fields
-            else:
-                assert isinstance(field.definition, FieldBase), "Unknown type of field definition. This is a bug in ConfigModel library, please report it."
-                all_fields.append(field)
-        return all_fields
-
-    def _initialize_fields(self, this_field: FieldInstance):
+    @classmethod
+    def _get_root_schema(cls) -> ModelSchema:
         """
-        Initialize fields
+        Get schema of this class used as the root model, built on first use and shared by all instances
         """
-        assert self._fields is None, "Attempt to initialize fields twice. This is a bug in ConfigModel library, please report it."
-        self._fields = {}
+        schema = cls.__dict__.get("_root_schema")
+        if schema is not None:
+            return schema
+        with ConfigModel._schema_lock:
+            schema = cls.__dict__.get("_root_schema")
+            if schema is None:
+                schema = cls._build_schema([])
+                schema.default_values = [SerializerBase.FieldDefaultValue(field.path, field.definition.default_value)
+                                         for field in schema.iter_value_fields()]
+                schema.value_fields_by_path = {tuple(field.path): field for field in schema.iter_value_fields()}
+                schema.static_fields = [field for field in schema.iter_fields_recursive() if field.is_static]
+                cls._root_schema = schema
+        return schema
 
-        # set this field instance
-        self._field_instance = this_field
+    @classmethod
+    def _build_schema(cls, path) -> ModelSchema:
+        """
+        Build schema of this class placed at path of the root model
+        """
+        schema = ModelSchema(cls, path)
         # get all static fields from class
-        for attr_name, default_value, annotated_type in self.__iter_class_attributes():
-            # Log.debug(f"attr_name: {attr_name}")
+        for attr_name, default_value, annotated_type in cls.__iter_class_attributes():
 
-            assert attr_name not in self._fields, "Field name is already initialized. This is a bug in ConfigModel library, please report it."
+            assert attr_name not in schema.fields, "Field name is already initialized. This is a bug in ConfigModel library, please report it."
 
-            new_field_instance = FieldInstance()
-            new_field_instance.parent_field = this_field
-            new_field_instance.name = attr_name
-            new_field_instance.serializer = this_field.serializer
+            field_name = attr_name
+            definition = None
+            nested_class = None
+            is_static = False
 
             # deduce field definition
             if isinstance(default_value, FieldBase):
-                # just use the field definition
-                # create a copy of the field definition, because the one in the class is static
-                new_field_instance.definition = copy.deepcopy(default_value)
-                new_field_instance.name = default_value.name
+                # just use the field definition, it's shared by all instances
+                definition = default_value
+                field_name = default_value.name
             elif isinstance(default_value, type) and issubclass(default_value, ConfigModel):
                 # this is a nested class definition (not an instance)
                 nested_class_definition = default_value
@@ -272,11 +501,11 @@ class ConfigModel(metaclass=MetaConfigModel):
                 decorated_field_name = None
                 decorated_instance = nested_class_definition._get_instance()
                 if decorated_instance is not None:
-                    decorated_field_name = decorated_instance._field_instance.name
+                    decorated_field_name = decorated_instance._static_field_name
                 # second, check if an instance of this class was created by user (not allowed if a decorator was used)
                 user_created_instance = None
                 user_created_instance_field_name = None
-                for chk_attr_name, chk_attr_default_value, _ in self.__iter_class_attributes():
+                for chk_attr_name, chk_attr_default_value, _ in cls.__iter_class_attributes():
                     if isinstance(chk_attr_default_value, nested_class_definition):
                         user_created_instance = chk_attr_default_value
                         user_created_instance_field_name = chk_attr_name
@@ -286,62 +515,64 @@ class ConfigModel(metaclass=MetaConfigModel):
                 assert decorated_field_name is None or user_created_instance is None, \
                     "{parent_class_name} has both '@nested_field' decorator and nested instance of {nested_class_name} (named '{field_name}'). " \
                     "Either remove decorator or '{field_name}' definition".format(
-                        parent_class_name=self.__name__,
+                        parent_class_name=cls.__name__,
                         nested_class_name=nested_class_definition.__name__,
                         field_name=user_created_instance_field_name
                     )
 
                 if decorated_field_name is not None:
                     # use the field name from the decorator
-                    new_field_instance.name = decorated_field_name
-                    # update field definition in class instance, because parent class was not set in decorator
-                    decorated_instance._field_instance = new_field_instance
+                    field_name = decorated_field_name
                 elif user_created_instance is not None:
                     # skip this field, it will be initialized by the nested class instance
                     continue
                 else:
                     # field name is not defined, use the class name (converted to snake case)
-                    snake_case_class_name = pascal_case_to_snake_case(nested_class_definition.__name__)
-                    new_field_instance.name = snake_case_class_name
-                    nested_class_definition._decorated_as_static_field(field_name=snake_case_class_name)
-                    decorated_instance = nested_class_definition._get_instance()
-                    # update field definition in class instance, because parent class was not set in decorator
-                    decorated_instance._field_instance = new_field_instance
-                # set the field definition
-                new_field_instance.definition = decorated_instance
-                # initialize nested class fields
-                decorated_instance._initialize_fields(new_field_instance)
+                    field_name = pascal_case_to_snake_case(nested_class_definition.__name__)
+                    nested_class_definition._decorated_as_static_field(field_name=field_name)
+                nested_class = nested_class_definition
+                is_static = True
             elif isinstance(default_value, ConfigModel):
-                # this is a nested config instance
-                nested_config_static_instance = default_value
-                # create a copy of the nested config instance, because the one in the class is static
-                nested_config_instance = copy.deepcopy(nested_config_static_instance)
-                new_field_instance.definition = nested_config_instance
-                # initialize nested class fields
-                nested_config_instance._initialize_fields(new_field_instance)
+                # this is a nested config instance, its fields are defined by its class
+                nested_class = type(default_value)
             elif isinstance(default_value, (str, int, float, bool)):
                 # create a field definition
-                new_field_instance.definition = FieldBase(name=attr_name, default_value=default_value)
+                definition = FieldBase(name=attr_name, default_value=default_value)
             elif default_value is None:
                 # default type is string
-                new_field_instance.definition = FieldBase(name=attr_name, default_value="")
+                definition = FieldBase(name=attr_name, default_value="")
             else:
                 # currently not supported
                 raise Exception("Unsupported type of field definition in class {class_name}. Field '{field_name}' has unsupported type: {field_type}".format(
-                    class_name=self.__class__.__name__,
+                    class_name=cls.__name__,
                     field_name=attr_name,
                     field_type=type(default_value)
                 ))
-                pass
             # finished deducing field definition
-            # check if field definition was set
-            assert new_field_instance.definition is not None, "Field definition is not set. This is a bug in ConfigModel library, please report it."
-            # add field to the list
-            self._fields[attr_name] = new_field_instance
-        serializer = self._serializer
-        if serializer is not None:
-            default_values = []
-            for field_instance in self._get_all_fields_recursive():
-                default_value = SerializerBase.FieldDefaultValue(field_instance.get_path(), field_instance.definition.default_value)
-                default_values.append(default_value)
-            serializer.write_default_values_from_model(default_values)
+            field_path = path + [field_name]
+            if nested_class is not None:
+                # initialize nested class fields
+                schema.fields[attr_name] = SchemaField(field_name, field_path, schema=nested_class._build_schema(field_path), is_static=is_static)
+            else:
+                schema.fields[attr_name] = SchemaField(field_name, field_path, definition=definition)
+        return schema
+
+    def _initialize_fields(self, write_default_values=True, stored_values=None):
+        """
+        Initialize fields
+        """
+        assert self._fields is None, "Attempt to initialize fields twice. This is a bug in ConfigModel library, please report it."
+        schema = self._get_root_schema()
+        # changes of versions of this model and nested models (by path of the model)
+        self._versions = {}
+        # nested models created on first access (by path of the model)
+        self._nested_models = {}
+        self._bind(self, schema)
+        # bind static instances of nested classes to the latest root instance, so they can be used by class attributes
+        # (e.g. RootConfig.NestedConfig.value), earlier root instances get their own nested models
+        for field in schema.static_fields:
+            field.schema.model_class._get_instance()._bind(self, field.schema)
+        if write_default_values:
+            self._serializer.write_default_values_from_model(schema.default_values)
+        else:
+            self._serializer.read_values_from_model(schema.default_values, stored_values)
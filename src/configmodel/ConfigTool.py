@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+import concurrent.futures
+import configparser
+import fnmatch
+import functools
+import importlib
+import locale
+import os
+import stat
+import tempfile
+
+from configmodel.IniTokenizer import IniTokenizer
+from configmodel.Logger import logger
+from configmodel.SerializerIni import SerializerIni
+
+
+class ConfigTool:
+    """
+    Offline validation, migration and dump of INI files of a config model (python -m configmodel).
+
+    Files are processed by a pool of processes. Workers get only paths and default values of the model,
+    results are yielded in order of the files as soon as they are ready. Migrated files are replaced atomically.
+    """
+    DEFAULT_PATTERN = "*.ini"
+
+    # files processed by a task of the pool
+    MAX_CHUNK_SIZE = 64
+
+    class FileResult:
+        """
+        Result of processing a single file
+        """
+        def __init__(self, filename):
+            self.filename = filename
+            # validate: descriptions of invalid values
+            self.problems = []
+            # migrate: descriptions of changes (made or planned in dry run)
+            self.changes = []
+            # dump: {path: value}, path is joined by dots
+            self.values = None
+            # description of the exception if the file couldn't be processed
+            self.error = None
+
+        @property
+        def ok(self):
+            return self.error is None and not self.problems
+
+        def __repr__(self):
+            return f"FileResult({self.filename!r}, problems={len(self.problems)}, changes={len(self.changes)}, error={self.error!r})"
+
+    def __init__(self, model_class=None, max_workers=None):
+        """
+        :param model_class: ConfigModel class of the files, required for validate() and migrate()
+        :param max_workers: number of processes, default of concurrent.futures if None, files are processed
+            in the calling process if 1
+        """
+        self.model_class = model_class
+        self.max_workers = max_workers
+
+    @staticmethod
+    def import_model_class(name):
+        """
+        Import ConfigModel class by name "module:Class" (nested classes are separated by dots)
+        """
+        from configmodel.ConfigModel import ConfigModel
+        module_name, _, class_name = name.partition(":")
+        if not module_name or not class_name:
+            raise ValueError(f"Model must be given as module:Class, got {name!r}")
+        model_class = importlib.import_module(module_name)
+        for attribute in class_name.split("."):
+            model_class = getattr(model_class, attribute)
+        if not isinstance(model_class, type) or not issubclass(model_class, ConfigModel):
+            raise ValueError(f"{name} is not a ConfigModel class")
+        return model_class
+
+    @staticmethod
+    def find_files(paths, pattern=DEFAULT_PATTERN):
+        """
+        Get files of paths, directories are searched recursively for files matching the pattern
+        """
+        filenames = []
+        for path in paths:
+            if not os.path.isdir(path):
+                filenames.append(path)
+                continue
+            found = []
+            for directory, _, names in os.walk(path):
+                found.extend(os.path.join(directory, name) for name in names if fnmatch.fnmatch(name, pattern))
+            filenames.extend(sorted(found))
+        return list(dict.fromkeys(filenames))
+
+    def validate(self, filenames, require_all=False):
+        """
+        Check that files have only values of fields of the model, and that values can be converted
+        to types of default values. Yields FileResult of every file.
+
+        :param require_all: values missing in a file are problems, otherwise default values are used
+        """
+        return self._run("_validate", filenames, {"require_all": require_all})
+
+    def migrate(self, filenames, renames=(), add_defaults=False, drop_unknown=False, dry_run=False):
+        """
+        Rewrite files to match the model. Yields FileResult of every file.
+
+        :param renames: list of (old path, new path), values of fields and nested models are moved
+            (paths are lists or strings joined by dots)
+        :param add_defaults: write default values of fields missing in files
+        :param drop_unknown: remove values which are not fields of the model (after renaming)
+        :param dry_run: only describe the changes
+        """
+        renames = [(self._split_path(old_path), self._split_path(new_path)) for old_path, new_path in renames]
+        return self._run("_migrate", filenames,
+                         {"renames": renames, "add_defaults": add_defaults, "drop_unknown": drop_unknown, "dry_run": dry_run})
+
+    def dump(self, filenames, include_defaults=False):
+        """
+        Read values of files. Yields FileResult of every file.
+
+        :param include_defaults: add default values of the model missing in files
+        """
+        return self._run("_dump", filenames, {"include_defaults": include_defaults})
+
+    @staticmethod
+    def _split_path(path):
+        return path.split(".") if isinstance(path, str) else list(path)
+
+    def _get_fields(self):
+        """
+        Get {(section, option): default value} of value fields of the model, None if there is no model
+        """
+        if self.model_class is None:
+            return None
+        fields = {}
+        for default_value in self.model_class._get_root_schema().default_values:
+            fields[self._path_to_location(default_value.path)] = default_value.value
+        return fields
+
+    def _run(self, operation, filenames, options):
+        filenames = list(filenames)
+        fields = self._get_fields()
+        if fields is None and operation != "_dump":
+            raise ValueError("Model class is required to validate or migrate files")
+        task = functools.partial(self._process_file, operation, fields, options)
+        logger.debug("Running %s on %d files", operation, len(filenames))
+        return self._iter_results(task, filenames)
+
+    def _iter_results(self, task, filenames):
+        if self.max_workers == 1 or len(filenames) <= 1:
+            yield from map(task, filenames)
+            return
+        with concurrent.futures.ProcessPoolExecutor(self.max_workers) as executor:
+            worker_count = executor._max_workers
+            # several tasks per worker, so workers finishing early get more work
+            chunk_size = max(1, min(self.MAX_CHUNK_SIZE, len(filenames) // (worker_count * 4)))
+            yield from executor.map(task, filenames, chunksize=chunk_size)
+
+    @staticmethod
+    def _process_file(operation, fields, options, filename):
+        """
+        Task of the pool, exceptions are reported in the result
+        """
+        result = ConfigTool.FileResult(filename)
+        try:
+            if not os.path.isfile(filename):
+                raise FileNotFoundError(f"No such file: {filename}")
+            document = IniTokenizer.load(filename, SerializerIni.mmap_enabled)
+            getattr(ConfigTool, operation)(result, document, fields, **options)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        return result
+
+    @staticmethod
+    def _location_to_path(section, option):
+        path = option.split(".")
+        if section != SerializerIni.DEFAULT_SECTION:
+            path.insert(0, section)
+        return path
+
+    @staticmethod
+    def _path_to_location(path):
+        location = SerializerIni._get_parameter_location(path)
+        return location.section, location.parameter.lower()
+
+    @staticmethod
+    def _format_location(location):
+        return ".".join(ConfigTool._location_to_path(*location))
+
+    @staticmethod
+    def _check_type(value, default_value):
+        """
+        Get name of the type of the default value if the value can't be converted to it, otherwise None
+        """
+        try:
+            if isinstance(default_value, bool):
+                if value.lower() not in configparser.ConfigParser.BOOLEAN_STATES:
+                    raise ValueError(value)
+            elif isinstance(default_value, int):
+                int(value)
+            elif isinstance(default_value, float):
+                float(value)
+        except ValueError:
+            return type(default_value).__name__
+        return None
+
+    @staticmethod
+    def _check_layout(document):
+        """
+        Values of DEFAULT section are inherited by all sections, so they would be reported (and migrated)
+        once per section, while they are stored only once
+        """
+        if document.has_default_values():
+            raise ValueError("[DEFAULT] section is not supported, its values are inherited by all sections")
+
+    @staticmethod
+    def _validate(result, document, fields, require_all):
+        ConfigTool._check_layout(document)
+        found = set()
+        for section, option, value in document.iter_values():
+            location = (section, option.lower())
+            found.add(location)
+            if location not in fields:
+                result.problems.append(f"unknown key: {ConfigTool._format_location(location)}")
+                continue
+            type_name = ConfigTool._check_type(value, fields[location])
+            if type_name is not None:
+                result.problems.append(f"invalid value of {ConfigTool._format_location(location)}: {value!r} is not {type_name}")
+        if require_all:
+            for location in fields:
+                if location not in found:
+                    result.problems.append(f"missing key: {ConfigTool._format_location(location)}")
+
+    @staticmethod
+    def _rename_path(path, renames):
+        """
+        Get new path of the value, None if it isn't renamed
+        """
+        for old_path, new_path in renames:
+            if path[:len(old_path)] == old_path:
+                return new_path + path[len(old_path):]
+        return None
+
+    @staticmethod
+    def _migrate(result, document, fields, renames, add_defaults, drop_unknown, dry_run):
+        ConfigTool._check_layout(document)
+        values = {(section, option.lower()): value for section, option, value in document.iter_values()}
+        removed = []
+        # {location: value} written to the file
+        added = {}
+        for location, value in values.items():
+            new_path = ConfigTool._rename_path(ConfigTool._location_to_path(*location), renames)
+            if new_path is None:
+                continue
+            new_location = ConfigTool._path_to_location(new_path)
+            if new_location == location:
+                continue
+            removed.append(location)
+            if new_location in added or (new_location in values and new_location not in removed):
+                result.changes.append(f"removed {ConfigTool._format_location(location)}, "
+                                      f"{ConfigTool._format_location(new_location)} already exists")
+                continue
+            added[new_location] = value
+            result.changes.append(f"renamed {ConfigTool._format_location(location)} to {ConfigTool._format_location(new_location)}")
+        present = [location for location in values if location not in removed] + list(added)
+        if drop_unknown:
+            for location in present:
+                if location in fields:
+                    continue
+                if location in added:
+                    del added[location]
+                else:
+                    removed.append(location)
+                result.changes.append(f"dropped unknown key {ConfigTool._format_location(location)}")
+        if add_defaults:
+            present = set(present)
+            for location, default_value in fields.items():
+                if location not in present:
+                    added[location] = str(default_value)
+                    result.changes.append(f"added default value of {ConfigTool._format_location(location)}")
+        if dry_run or not (removed or added):
+            return
+        lines = None
+        if removed:
+            lines = document.remove_options(removed)
+            document = IniTokenizer.load_lines(lines)
+        if added:
+            lines = document.set_values([(section, option, value) for (section, option), value in added.items()])
+        ConfigTool._write_atomically(result.filename, lines)
+
+    @staticmethod
+    def _dump(result, document, fields, include_defaults):
+        values = {}
+        for section, option, value in document.iter_values():
+            values[ConfigTool._format_location((section, option.lower()))] = value
+        if include_defaults and fields is not None:
+            for location, default_value in fields.items():
+                values.setdefault(ConfigTool._format_location(location), default_value)
+        result.values = values
+
+    @staticmethod
+    def _write_atomically(filename, lines):
+        """
+        Write lines to a temporary file next to the file and replace the file by it,
+        so readers never see a partially written file
+        """
+        directory = os.path.dirname(os.path.abspath(filename))
+        file_descriptor, temp_filename = tempfile.mkstemp(prefix=os.path.basename(filename) + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(file_descriptor, "w", encoding=locale.getpreferredencoding(False)) as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_filename, stat.S_IMODE(os.stat(filename).st_mode))
+            os.replace(temp_filename, filename)
+        except BaseException:
+            os.unlink(temp_filename)
+            raise
+        logger.debug("Migrated config file: %s", filename)
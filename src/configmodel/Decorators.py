@@ -1,8 +1,7 @@
 # -*- coding: utf-8 -*-
-import inspect
 import os
 
-from configmodel.Logger import Log
+from configmodel.Logger import logger
 
 from configmodel import ConfigModel
 
@@ -11,7 +10,7 @@ def config_file(filename):
     """
     Decorator for ConfigModel classes to set the config file
     """
-    Log.debug("config_file decorator called, filename: %s" % filename)
+    logger.debug("config_file decorator called, filename: %s", filename)
 
     def decorator(cls):
         """
@@ -20,6 +19,7 @@ def config_file(filename):
         # check if file path is relative
         if not os.path.isabs(filename):
             # file must be relative to the same directory as the script using the decorator
+            import inspect
             client_script_path = inspect.getfile(cls)
             client_script_dir = os.path.dirname(client_script_path)
             abs_file_path = os.path.join(client_script_dir, filename)
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+import configparser
+import io
+import locale
+import mmap
+import os
+import re
+
+
+class IniTokenizer:
+    """
+    Single-pass INI parser, compatible with default settings of configparser.ConfigParser
+    (full line comments, multiline values, lowercase option names).
+
+    Unlike configparser, it keeps line numbers of sections and options,
+    so values can be changed in place without rewriting the rest of the file (including comments).
+    Syntax it doesn't handle the same way as configparser (DEFAULT section, interpolation, errors)
+    raises UnsupportedSyntax, callers should fall back to configparser.
+    """
+    COMMENT_PREFIXES = ("#", ";")
+    DEFAULT_SECTION = "DEFAULT"
+
+    class UnsupportedSyntax(Exception):
+        pass
+
+    class Option:
+        __slots__ = ("name", "value", "first_line", "last_line")
+
+        def __init__(self, name, value, first_line, last_line):
+            self.name = name
+            self.value = value
+            # indexes of first and last line of the value (including continuation lines)
+            self.first_line = first_line
+            self.last_line = last_line
+
+    class Section:
+        __slots__ = ("name", "header_line", "end_line", "indent", "options")
+
+        def __init__(self, name, header_line, indent):
+            self.name = name
+            self.header_line = header_line
+            # index of the line after the last option, new options are inserted there
+            self.end_line = header_line + 1
+            # indentation of the last option, new options must have the same indentation
+            self.indent = indent
+            self.options = {}
+
+    class Document:
+        """
+        Parsed INI file
+        """
+        def __init__(self, lines, sections):
+            self.lines = lines
+            self.sections = sections
+
+        def has_option(self, section, option):
+            section = self.sections.get(section)
+            return section is not None and option.lower() in section.options
+
+        def has_default_values(self):
+            """
+            Check if the file has options in DEFAULT section, which configparser adds to all sections
+            """
+            # files with DEFAULT section are parsed by ConfigParserDocument
+            return False
+
+        def iter_values(self):
+            """
+            Iterate over (section, option, value) of all options
+            """
+            for section in self.sections.values():
+                for option in section.options.values():
+                    yield section.name, option.name, option.value
+
+        def set_values(self, values):
+            """
+            Set values from iterable of (section, option, value) and get new lines of the file.
+            Changed options are replaced in place, new options are appended to their sections.
+            """
+            replaced_lines = {}
+            appended_lines = {}
+            new_sections = {}
+            for section_name, option_name, value in values:
+                # values are validated the same way as in configparser
+                IniTokenizer._INTERPOLATION.before_set(None, section_name, option_name, value)
+                option_name = option_name.lower()
+                section = self.sections.get(section_name)
+                if section is None:
+                    new_sections.setdefault(section_name, {})[option_name] = IniTokenizer.format_option(option_name, value)
+                    continue
+                option = section.options.get(option_name)
+                if option is None:
+                    text = IniTokenizer.format_option(option_name, value, section.indent)
+                    appended_lines.setdefault(section.end_line, {})[option_name] = text
+                    continue
+                line = self.lines[option.first_line]
+                text = IniTokenizer.format_option(option_name, value, line[:len(line) - len(line.lstrip())])
+                replaced_lines[option.first_line] = text
+                for line_index in range(option.first_line + 1, option.last_line + 1):
+                    replaced_lines[line_index] = ""
+
+            lines = []
+            for line_index, line in enumerate(self.lines):
+                if line_index in appended_lines:
+                    for text in appended_lines[line_index].values():
+                        lines.extend(text.splitlines(keepends=True))
+                if line_index in replaced_lines:
+                    lines.extend(replaced_lines[line_index].splitlines(keepends=True))
+                else:
+                    lines.append(line)
+            if len(self.lines) in appended_lines:
+                if lines and not lines[-1].endswith("\n"):
+                    lines[-1] += "\n"
+                for text in appended_lines[len(self.lines)].values():
+                    lines.extend(text.splitlines(keepends=True))
+            for section_name, options in new_sections.items():
+                if lines and not lines[-1].endswith("\n"):
+                    lines[-1] += "\n"
+                if lines and lines[-1].strip():
+                    lines.append("\n")
+                lines.append(f"[{section_name}]\n")
+                for text in options.values():
+                    lines.extend(text.splitlines(keepends=True))
+            return lines
+
+        def remove_options(self, options):
+            """
+            Remove options from iterable of (section, option) and get new lines of the file.
+            Sections left without options are removed with their headers, the rest of the file is preserved.
+            """
+            removed_lines = set()
+            removed_options = {}
+            for section_name, option_name in options:
+                section = self.sections.get(section_name)
+                if section is None:
+                    continue
+                option = section.options.get(option_name.lower())
+                if option is None:
+                    continue
+                removed_options.setdefault(section_name, set()).add(option.name)
+                removed_lines.update(range(option.first_line, option.last_line + 1))
+            removed_sections = set()
+            for section_name, option_names in removed_options.items():
+                section = self.sections[section_name]
+                if len(option_names) == len(section.options):
+                    removed_sections.add(section_name)
+                    removed_lines.update(range(section.header_line, section.end_line))
+            lines = [line for line_index, line in enumerate(self.lines) if line_index not in removed_lines]
+            # indented lines after removed lines could become continuation lines of other options
+            expected_values = [(section, option, value) for section, option, value in self.iter_values()
+                               if option not in removed_options.get(section, ())]
+            try:
+                document = IniTokenizer.parse_lines(lines)
+            except IniTokenizer.UnsupportedSyntax:
+                document = None
+            if document is None or list(document.iter_values()) != expected_values or \
+                    any(section in document.sections for section in removed_sections):
+                return IniTokenizer.ConfigParserDocument(self.lines).remove_options(options)
+            return lines
+
+    class ConfigParserDocument:
+        """
+        Same interface as Document, but backed by configparser.
+        Used for files with syntax not supported by IniTokenizer.
+        """
+        def __init__(self, lines):
+            self.ini = configparser.ConfigParser()
+            self.ini.read_string("".join(lines))
+
+        def has_option(self, section, option):
+            return self.ini.has_option(section, option)
+
+        def has_default_values(self):
+            return bool(self.ini.defaults())
+
+        def iter_values(self):
+            for section in self.ini.sections():
+                for option in self.ini[section]:
+                    yield section, option, self.ini[section][option]
+
+        def set_values(self, values):
+            for section, option, value in values:
+                if not self.ini.has_section(section):
+                    self.ini.add_section(section)
+                self.ini.set(section, option, value)
+            return self._get_lines()
+
+        def remove_options(self, options):
+            for section, option in options:
+                if self.ini.has_section(section):
+                    self.ini.remove_option(section, option)
+                    if not self.ini.options(section):
+                        self.ini.remove_section(section)
+            return self._get_lines()
+
+        def _get_lines(self):
+            output = io.StringIO()
+            self.ini.write(output)
+            return output.getvalue().splitlines(keepends=True)
+
+    _INTERPOLATION = configparser.BasicInterpolation()
+
+    # section headers which are not indented (such lines can't be continuation lines)
+    _SECTION_HEADER_RE = re.compile(rb"^\[([^\r\n]+)\][^\]\r\n]*$", re.MULTILINE)
+    _INDENTED_SECTION_HEADER_RE = re.compile(rb"^[ \t]+\[", re.MULTILINE)
+
+    @staticmethod
+    def format_option(name, value, indent=""):
+        """
+        Format option line(s) the same way as configparser does
+        """
+        value = str(value).replace("\n", "\n" + indent + "\t")
+        return f"{indent}{name} = {value}\n"
+
+    @classmethod
+    def read_lines(cls, filename, use_mmap=False):
+        """
+        Read lines of a file. Missing file is treated as empty.
+        """
+        encoding = locale.getpreferredencoding(False)
+        try:
+            if not use_mmap or os.path.getsize(filename) == 0:
+                with open(filename, "r", encoding=encoding) as f:
+                    return f.readlines()
+            with open(filename, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                    return [line.decode(encoding).replace("\r\n", "\n") for line in iter(mapped_file.readline, b"")]
+        except FileNotFoundError:
+            return []
+
+    @classmethod
+    def load(cls, filename, use_mmap=False):
+        """
+        Parse INI file, fall back to configparser if the syntax is not supported
+
+        :rtype: IniTokenizer.Document | IniTokenizer.ConfigParserDocument
+        """
+        return cls.load_lines(cls.read_lines(filename, use_mmap))
+
+    @classmethod
+    def load_lines(cls, lines):
+        """
+        Parse lines of INI file, fall back to configparser if the syntax is not supported
+
+        :rtype: IniTokenizer.Document | IniTokenizer.ConfigParserDocument
+        """
+        try:
+            return cls.parse_lines(lines)
+        except cls.UnsupportedSyntax:
+            return cls.ConfigParserDocument(lines)
+
+    @classmethod
+    def parse_file(cls, filename, use_mmap=False):
+        """
+        Parse INI file
+
+        :rtype: IniTokenizer.Document
+        """
+        return cls.parse_lines(cls.read_lines(filename, use_mmap))
+
+    @classmethod
+    def build_section_index(cls, filename):
+        """
+        Find byte ranges of all sections of INI file without parsing it.
+
+        :return: dictionary {section name: (start offset, end offset)},
+            or None if sections can't be parsed separately (e.g. the file has indented section headers)
+        """
+        encoding = locale.getpreferredencoding(False)
+        try:
+            with open(filename, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return {}
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                    if cls._INDENTED_SECTION_HEADER_RE.search(mapped_file):
+                        return None
+                    index = {}
+                    last_section = None
+                    for match in cls._SECTION_HEADER_RE.finditer(mapped_file):
+                        if last_section is None:
+                            # only comments and empty lines are allowed before the first section
+                            try:
+                                cls.parse_lines(mapped_file[:match.start()].decode(encoding).splitlines(keepends=True))
+                            except cls.UnsupportedSyntax:
+                                return None
+                        else:
+                            index[last_section] = (index[last_section][0], match.start())
+                        last_section = match.group(1).decode(encoding)
+                        if last_section == cls.DEFAULT_SECTION or last_section in index:
+                            return None
+                        index[last_section] = (match.start(), len(mapped_file))
+                    if last_section is None and mapped_file[:].strip():
+                        return None
+                    return index
+        except FileNotFoundError:
+            return {}
+
+    @classmethod
+    def parse_section(cls, filename, section, start, end):
+        """
+        Parse single section of INI file, using byte range from build_section_index()
+
+        :rtype: IniTokenizer.Document
+        """
+        encoding = locale.getpreferredencoding(False)
+        with open(filename, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                lines = mapped_file[start:end].decode(encoding).replace("\r\n", "\n").splitlines(keepends=True)
+        document = cls.parse_lines(lines)
+        if list(document.sections) != [section]:
+            raise cls.UnsupportedSyntax(f"Section [{section}] not found at offset {start}")
+        return document
+
+    @classmethod
+    def parse_lines(cls, lines):
+        """
+        Parse lines of INI file
+
+        :rtype: IniTokenizer.Document
+        """
+        sections = {}
+        section = None
+        option = None
+        # lines of the current value, joined at the end of the value
+        value_lines = None
+        indent_level = 0
+        for line_index, line in enumerate(lines):
+            value = line.strip()
+            if not value or value.startswith(cls.COMMENT_PREFIXES):
+                if not value and value_lines is not None:
+                    # empty lines are part of multiline values, trailing ones are stripped when joined
+                    value_lines.append("")
+                continue
+            cur_indent_level = len(line) - len(line.lstrip())
+            if option is not None and cur_indent_level > indent_level:
+                # continuation line
+                value_lines.append(value)
+                option.last_line = line_index
+                section.end_line = line_index + 1
+                continue
+            indent_level = cur_indent_level
+            if option is not None:
+                option.value = "\n".join(value_lines).rstrip()
+                option = None
+                value_lines = None
+            if value.startswith("[") and value.rfind("]") > 1:
+                # section header
+                section_name = value[1:value.rfind("]")]
+                if section_name == cls.DEFAULT_SECTION or section_name in sections:
+                    raise cls.UnsupportedSyntax(f"Section [{section_name}] in line {line_index + 1}")
+                section = sections[section_name] = cls.Section(section_name, line_index, line[:cur_indent_level])
+                continue
+            if section is None:
+                raise cls.UnsupportedSyntax(f"Missing section header in line {line_index + 1}")
+            # option
+            delimiter_index = min((index for index in (value.find("="), value.find(":")) if index >= 0), default=-1)
+            option_name = value[:delimiter_index].rstrip().lower()
+            if delimiter_index < 0 or not option_name or option_name in section.options:
+                raise cls.UnsupportedSyntax(f"Invalid option in line {line_index + 1}")
+            option_value = value[delimiter_index + 1:].strip()
+            option = section.options[option_name] = cls.Option(option_name, None, line_index, line_index)
+            value_lines = [option_value]
+            section.end_line = line_index + 1
+            section.indent = line[:cur_indent_level]
+        if option is not None:
+            option.value = "\n".join(value_lines).rstrip()
+        for section in sections.values():
+            for option in section.options.values():
+                if "%" in option.value:
+                    raise cls.UnsupportedSyntax("Interpolation is not supported")
+        return cls.Document(lines, sections)
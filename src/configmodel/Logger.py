@@ -1,18 +1,10 @@
 # -*- coding: utf-8 -*-
-
-class Log:
-
-    logging_enabled = False
-
-    @classmethod
-    def debug(cls, message):
-        if not cls.logging_enabled:
-            return
-        print("DEBUG: %s" % message)
-
-    @classmethod
-    def error(cls, message):
-        if not cls.logging_enabled:
-            return
-        print("ERROR: %s" % message)
-
+import logging
+
+# All messages of the package are logged by this logger (or its children), configure it to see them, e.g.
+# logging.basicConfig() and logging.getLogger("configmodel").setLevel(logging.DEBUG).
+# Arguments are passed separately (logger.debug("Reading %s", filename)) so messages are formatted only when logged.
+# Hot paths (getting and setting values) don't log, even a disabled logger call costs as much as a cached read;
+# expensive arguments must be guarded by logger.isEnabledFor(logging.DEBUG).
+logger = logging.getLogger("configmodel")
+logger.addHandler(logging.NullHandler())
@@ -3,7 +3,10 @@
 
 class MixinCachedValues:
     """
-    Mixin for caching values
+    Mixin for caching values.
+
+    Values are set and committed from different threads without locks: set_cached_value() replaces the cached value
+    instead of modifying it, so a commit never clears the dirty flag of a value it didn't write.
     """
     class CachedValue:
         """
@@ -34,6 +37,33 @@ class MixinCachedValues:
             for cached_value in self._cached_values.values():
                 cached_value.is_dirty = False
 
+    def _take_dirty_values(self):
+        """
+        Get dirty values to be written {full name: value} and set them not dirty.
+        Values set after this call are dirty, so they are written by the next commit.
+        """
+        # reset the flag first, it's set after the value by set_cached_value()
+        self._is_dirty = False
+        dirty_values = {}
+        if self._cached_values:
+            # copy items, values could be added from other threads
+            for full_name, cached_value in list(self._cached_values.items()):
+                if cached_value.is_dirty:
+                    cached_value.is_dirty = False
+                    dirty_values[full_name] = cached_value.value
+        return dirty_values
+
+    def _restore_dirty_values(self, dirty_values):
+        """
+        Set values returned by _take_dirty_values() dirty again, if they could not be written
+        """
+        for full_name in dirty_values:
+            cached_value = self._cached_values.get(full_name)
+            if cached_value is not None:
+                cached_value.is_dirty = True
+        if dirty_values:
+            self._is_dirty = True
+
     def get_cached_value(self, path):
         """
         Get cached value
@@ -50,16 +80,12 @@ class MixinCachedValues:
         """
         Set cached value
         """
-        if is_dirty:
-            self._is_dirty = True
         if self._cached_values is None:
             self._cached_values = {}
-        full_name = self._path_to_str(path)
-        if full_name not in self._cached_values:
-            self._cached_values[full_name] = self.CachedValue(path, value, is_dirty)
-        else:
-            self._cached_values[full_name].value = value
-            self._cached_values[full_name].is_dirty = is_dirty
+        self._cached_values[self._path_to_str(path)] = self.CachedValue(path, value, is_dirty)
+        # set after the value, a commit running in another thread resets the flag before it takes dirty values
+        if is_dirty:
+            self._is_dirty = True
 
     def assign_cached_values(self, cached_values):
         """
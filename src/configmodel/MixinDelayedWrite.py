@@ -1,25 +1,63 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import atexit
 import threading
 import time
 
 
+class PendingTimers:
+    """
+    Timers which must be fired at exit, so pending changes are committed.
+    A single atexit handler fires all of them. Timers are removed when they fire or are cancelled,
+    so they don't accumulate in long-running processes.
+    """
+    _timers = set()
+    _lock = threading.Lock()
+    _exit_handler_registered = False
+
+    @classmethod
+    def add(cls, timer):
+        with cls._lock:
+            if not cls._exit_handler_registered:
+                atexit.register(cls._fire_all)
+                cls._exit_handler_registered = True
+            cls._timers.add(timer)
+
+    @classmethod
+    def remove(cls, timer):
+        with cls._lock:
+            cls._timers.discard(timer)
+
+    @classmethod
+    def _fire_all(cls):
+        with cls._lock:
+            timers = list(cls._timers)
+        for timer in timers:
+            timer._on_exit()
+
+
 class InterruptibleTimer:
     """
     Performs a callback after a specified timeout.
     The timer can be restarted by calling prolong() method.
     """
-    def __init__(self, timeout_seconds, callback):
+    def __init__(self, timeout_seconds, callback, start=True):
         self.callback = callback
         self.thread = threading.Thread(target=self._target)
         self.event = threading.Event()
         self.lock = threading.Lock()
         self.end_time = time.time() + timeout_seconds
 
-        # register atexit handler to make sure that changes are committed at exit
-        atexit.register(self._on_exit)
+        if start:
+            self.start()
 
-        # start timer
+    def start(self):
+        """
+        Start the timer thread. Starting a thread is slow when other threads are busy, so the timer can be created
+        (and restarted) before it is started by start=False.
+        """
+        # make sure that changes are committed at exit
+        PendingTimers.add(self)
         self.thread.start()
 
     def _target(self):
@@ -34,6 +72,8 @@ class InterruptibleTimer:
             with self.lock:
                 if self.callback is None:
                     break
+        # fired or cancelled timer doesn't need to be fired at exit
+        PendingTimers.remove(self)
 
     def _fire_callback(self):
         with self.lock:
@@ -45,10 +85,12 @@ class InterruptibleTimer:
         # Reset the event and add extra time to the timeout
         self.end_time = time.time() + timeout_seconds
         self.event.clear()
+        return True
 
     def cancel(self):
         with self.lock:
             self.callback = None
+        PendingTimers.remove(self)
         self.event.set()
 
     def _on_exit(self):
@@ -60,6 +102,94 @@ class InterruptibleTimer:
         self.thread.join()
 
 
+class LoopTimer:
+    """
+    Same as InterruptibleTimer, but scheduled on a running asyncio event loop instead of a thread.
+    The callback is executed in the default executor of the loop, so it never blocks the loop.
+    Handles of the loop are changed only in the thread of the loop.
+    """
+    def __init__(self, loop, timeout_seconds, callback, start=True):
+        self.loop = loop
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.timeout_seconds = timeout_seconds
+        self.handle = None
+
+        if start:
+            self.start()
+
+    def start(self):
+        if self.handle is None and self.callback is not None:
+            # make sure that changes are committed at exit
+            PendingTimers.add(self)
+            self._call_in_loop(self._schedule, self.timeout_seconds)
+
+    def _on_expired(self):
+        self.handle = None
+        self.loop.run_in_executor(None, self._fire_callback)
+
+    def _fire_callback(self):
+        with self.lock:
+            if self.callback is not None:
+                self.callback()
+                self.callback = None
+        # fired timer doesn't need to be fired at exit
+        PendingTimers.remove(self)
+
+    def is_usable(self):
+        """
+        Check that the loop of the timer is running, a timer of a closed (or stopped) loop would never fire
+        """
+        return not self.loop.is_closed() and self.loop.is_running()
+
+    def restart(self, timeout_seconds):
+        """
+        Restart the timer, returns False if the timer can't be restarted because its loop is not running
+        """
+        return self.is_usable() and self._call_in_loop(self._schedule, timeout_seconds)
+
+    def cancel(self):
+        with self.lock:
+            self.callback = None
+        PendingTimers.remove(self)
+        if not (self.is_usable() and self._call_in_loop(self._unschedule)):
+            # loop is not running, its handles can't be used anymore
+            self._unschedule()
+
+    def _call_in_loop(self, function, *args):
+        """
+        Call function in the thread of the loop, returns False if the loop was closed meanwhile
+        """
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            function(*args)
+            return True
+        try:
+            self.loop.call_soon_threadsafe(function, *args)
+        except RuntimeError:
+            return False
+        return True
+
+    def _schedule(self, timeout_seconds):
+        self._unschedule()
+        if self.callback is not None:
+            self.handle = self.loop.call_later(timeout_seconds, self._on_expired)
+
+    def _unschedule(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+    def _on_exit(self):
+        """
+        Fire immediately (the loop is most likely not running anymore)
+        """
+        self._fire_callback()
+
+
 class MixinDelayedWrite:
     """
     Mixin for delayed write
@@ -70,6 +200,8 @@ class MixinDelayedWrite:
         self._delayed_write_enabled = delayed_write_enabled
         self._delay_seconds = delay_seconds
         self._timer = None
+        # writers of several threads could create timers at the same time, flush could remove the timer meanwhile
+        self._timer_lock = threading.Lock()
 
     def _set_delayed_write(self, delayed_write_enabled, delay_seconds=DEFAULT_DELAY_SECONDS):
         """
@@ -86,18 +218,73 @@ class MixinDelayedWrite:
             # fire immediately
             self._commit_delayed_write()
         else:
-            # restart timer
-            if self._timer is None:
-                self._timer = InterruptibleTimer(self._delay_seconds, self._on_timer_expired)
-            else:
-                self._timer.restart(self._delay_seconds)
+            # restart timer. Restarting a timer which has just fired (or was cancelled by flush) is harmless,
+            # its commit follows and includes the value set before this call.
+            timer = self._timer
+            if timer is not None and timer.restart(self._delay_seconds):
+                return
+            with self._timer_lock:
+                timer = self._timer
+                if timer is not None:
+                    if timer.restart(self._delay_seconds):
+                        return
+                    # event loop of the timer is closed (e.g. by asyncio.run()), the new timer commits its changes too
+                    timer.cancel()
+                self._timer = timer = self._create_timer()
+            # other writers don't wait for the timer thread to be started
+            timer.start()
+
+    async def _arestart_delayed_timer(self):
+        """
+        Same as _restart_delayed_timer(), but an immediate write is offloaded to the executor of the running loop
+        """
+        if not self._delayed_write_enabled or self._delay_seconds <= 0:
+            await asyncio.get_running_loop().run_in_executor(None, self._commit_delayed_write)
+        else:
+            self._restart_delayed_timer()
+
+    def _create_timer(self):
+        """
+        Create timer, which is not started yet. If called from a running event loop, the timer is scheduled on this loop.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # no running event loop, use a thread
+            return InterruptibleTimer(self._delay_seconds, self._on_timer_expired, start=False)
+        return LoopTimer(loop, self._delay_seconds, self._on_timer_expired, start=False)
 
     def _on_timer_expired(self):
         """
         On timer expired
         """
+        # the timer can't be restarted after it has fired, next write will create a new one
+        with self._timer_lock:
+            self._timer = None
         self._commit_delayed_write()
 
+    def _flush_delayed_write(self):
+        """
+        Cancel pending timer and commit immediately
+        """
+        with self._timer_lock:
+            timer = self._timer
+            self._timer = None
+        if timer is not None:
+            timer.cancel()
+        self._commit_delayed_write()
+
+    async def _aflush_delayed_write(self):
+        """
+        Cancel pending timer and commit in the executor of the running loop
+        """
+        with self._timer_lock:
+            timer = self._timer
+            self._timer = None
+        if timer is not None:
+            timer.cancel()
+        await asyncio.get_running_loop().run_in_executor(None, self._commit_delayed_write)
+
     def _commit_delayed_write(self):
         """
         Commit delayed write.
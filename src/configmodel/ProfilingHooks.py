@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import weakref
+
+
+class ProfilingHooks:
+    """
+    Hooks called before and after operations of config models and serializers, e.g. to trace slow commits.
+
+    Hooks must be added before config models are initialized, serializers of models initialized without hooks
+    are not instrumented and don't pay anything for them. Methods of a serializer are wrapped only once,
+    hooks of a single serializer (e.g. SerializerMetrics) are called by the same wrappers as hooks added by add_hook().
+    """
+
+    # operations passed to hooks
+    INITIALIZE_FIELDS = "initialize_fields"
+    WRITE_DEFAULT_VALUES = "write_default_values"
+    COMMIT = "commit"
+    RELOAD = "reload"
+    GET_VALUE = "get_value"
+    SET_VALUE = "set_value"
+    SET_VALUES = "set_values"
+    ASET_VALUE = "aset_value"
+    RESTART_TIMER = "restart_timer"
+
+    class Event:
+        """
+        Operation passed to Hook.before() and Hook.after()
+        """
+        def __init__(self, operation, filename, model=None, path=None, values=None):
+            self.operation = operation
+            self.filename = filename
+            # name of the model class (initialize_fields only)
+            self.model = model
+            # path of the value (get_value, set_value and aset_value only)
+            self.path = path
+            # list of (path, value) (set_values only)
+            self.values = values
+            # time.perf_counter() when the operation started and its duration in seconds, set after before() hooks
+            self.start_time = None
+            self.duration = None
+            # exception raised by the operation
+            self.error = None
+            # hooks can keep their data here between before() and after()
+            self.context = {}
+
+        def __repr__(self):
+            return f"Event({self.operation}, {self.filename!r}, model={self.model}, path={self.path})"
+
+    class Hook:
+        """
+        Base class of hooks. Hooks may be called from any thread, after() is called even if the operation failed.
+        """
+        def before(self, event):
+            pass
+
+        def after(self, event):
+            pass
+
+    class CProfileHook(Hook):
+        """
+        Profile selected operations (commits, loads and initialization of models by default) by cProfile.
+        Nested operations are profiled once, as a part of the outermost one.
+
+        cProfile profiles only the thread which enabled it, so every thread gets its own profile,
+        get_stats() merges them. Python 3.12+ allows only one active profiler in the process, operations
+        of other threads running at the same time are not profiled there.
+        """
+        DEFAULT_OPERATIONS = ("initialize_fields", "write_default_values", "commit", "reload")
+
+        def __init__(self, operations=DEFAULT_OPERATIONS):
+            self.operations = frozenset(operations)
+            self._profiles = []
+            self._lock = threading.Lock()
+            # depth of nested operations and profile of the current thread
+            self._local = threading.local()
+
+        def before(self, event):
+            if event.operation not in self.operations:
+                return
+            local = self._local
+            depth = getattr(local, "depth", 0)
+            local.depth = depth + 1
+            if depth > 0:
+                return
+            profile = getattr(local, "profile", None)
+            if profile is None:
+                import cProfile
+                local.profile = profile = cProfile.Profile()
+                with self._lock:
+                    self._profiles.append(profile)
+            try:
+                profile.enable()
+                local.enabled = True
+            except ValueError:
+                # another thread is profiled (Python 3.12+)
+                local.enabled = False
+
+        def after(self, event):
+            if event.operation not in self.operations:
+                return
+            local = self._local
+            local.depth -= 1
+            if local.depth == 0 and local.enabled:
+                local.profile.disable()
+
+        def get_stats(self):
+            """
+            Get pstats.Stats of profiled operations of all threads
+            """
+            import pstats
+            with self._lock:
+                profiles = list(self._profiles)
+            return pstats.Stats(*profiles)
+
+    class TracerHook(Hook):
+        """
+        Emit a span for every operation to a tracer compatible with OpenTelemetry API:
+        tracer.start_span(name, attributes=...) returns a span with set_attribute(), end()
+        and optionally record_exception().
+        """
+        SPAN_NAME_PREFIX = "configmodel."
+
+        def __init__(self, tracer, operations=None):
+            self.tracer = tracer
+            # all operations by default
+            self.operations = frozenset(operations) if operations is not None else None
+
+        def before(self, event):
+            if self.operations is not None and event.operation not in self.operations:
+                return
+            attributes = {"configmodel.file": str(event.filename)}
+            if event.model is not None:
+                attributes["configmodel.model"] = event.model
+            if event.path is not None:
+                attributes["configmodel.path"] = ".".join(event.path)
+            event.context[self] = self.tracer.start_span(self.SPAN_NAME_PREFIX + event.operation, attributes=attributes)
+
+        def after(self, event):
+            span = event.context.pop(self, None)
+            if span is None:
+                return
+            span.set_attribute("configmodel.duration", event.duration)
+            if event.error is not None and hasattr(span, "record_exception"):
+                span.record_exception(event.error)
+            span.end()
+
+    # hooks are replaced (not modified) by add_hook() and remove_hook(), so they can be iterated without lock
+    _hooks = ()
+    _attached_serializers = weakref.WeakSet()
+    _lock = threading.Lock()
+
+    @classmethod
+    def add_hook(cls, hook):
+        with cls._lock:
+            cls._hooks = cls._hooks + (hook,)
+
+    @classmethod
+    def remove_hook(cls, hook):
+        with cls._lock:
+            cls._hooks = tuple(added_hook for added_hook in cls._hooks if added_hook is not hook)
+
+    @classmethod
+    def is_enabled(cls):
+        return bool(cls._hooks)
+
+    @classmethod
+    def call(cls, operation, function, args=(), filename=None, model=None, path=None):
+        """
+        Call function(*args) between before() and after() hooks
+        """
+        hooks = cls._hooks
+        if not hooks:
+            return function(*args)
+        return cls._call_hooks(hooks, cls.Event(operation, filename, model, path), function, args)
+
+    @staticmethod
+    def _call_hooks(hooks, event, function, args):
+        for hook in hooks:
+            hook.before(event)
+        event.start_time = time.perf_counter()
+        try:
+            return function(*args)
+        except BaseException as e:
+            event.error = e
+            raise
+        finally:
+            event.duration = time.perf_counter() - event.start_time
+            for hook in reversed(hooks):
+                hook.after(event)
+
+    @staticmethod
+    async def _acall_hooks(hooks, event, function, args):
+        """
+        Same as _call_hooks(), but awaits the coroutine function
+        """
+        for hook in hooks:
+            hook.before(event)
+        event.start_time = time.perf_counter()
+        try:
+            return await function(*args)
+        except BaseException as e:
+            event.error = e
+            raise
+        finally:
+            event.duration = time.perf_counter() - event.start_time
+            for hook in reversed(hooks):
+                hook.after(event)
+
+    @classmethod
+    def attach(cls, serializer, hook=None):
+        """
+        Replace methods of serializer instance by wrappers calling hooks, methods are replaced only once.
+        Hooks added by add_hook() are called for all attached serializers, the hook passed here only for this serializer.
+        """
+        with cls._lock:
+            if hook is not None:
+                serializer._hooks = serializer._hooks + (hook,)
+            if serializer in cls._attached_serializers:
+                return
+            cls._attached_serializers.add(serializer)
+        filename = serializer.filename
+        get_value = serializer.get_value
+        set_value = serializer.set_value
+        set_values = serializer.set_values
+        aset_value = serializer.aset_value
+        reload = serializer.reload
+        write_default_values_from_model = serializer.write_default_values_from_model
+
+        def hooked_call(operation, function, args, path=None, values=None):
+            hooks = cls._hooks + serializer._hooks
+            if not hooks:
+                return function(*args)
+            return cls._call_hooks(hooks, cls.Event(operation, filename, path=path, values=values), function, args)
+
+        def hooked_get_value(path):
+            return hooked_call(cls.GET_VALUE, get_value, (path,), path=path)
+
+        def hooked_set_value(path, value):
+            hooked_call(cls.SET_VALUE, set_value, (path, value), path=path)
+
+        def hooked_set_values(values):
+            values = list(values)
+            hooked_call(cls.SET_VALUES, set_values, (values,), values=values)
+
+        async def hooked_aset_value(path, value):
+            hooks = cls._hooks + serializer._hooks
+            if not hooks:
+                await aset_value(path, value)
+                return
+            await cls._acall_hooks(hooks, cls.Event(cls.ASET_VALUE, filename, path=path), aset_value, (path, value))
+
+        def hooked_reload():
+            hooked_call(cls.RELOAD, reload, ())
+
+        def hooked_write_default_values_from_model(default_values):
+            hooked_call(cls.WRITE_DEFAULT_VALUES, write_default_values_from_model, (default_values,))
+
+        serializer.get_value = hooked_get_value
+        serializer.set_value = hooked_set_value
+        serializer.set_values = hooked_set_values
+        serializer.aset_value = hooked_aset_value
+        serializer.reload = hooked_reload
+        serializer.write_default_values_from_model = hooked_write_default_values_from_model
+
+        if hasattr(serializer, "_commit_delayed_write"):
+            commit_delayed_write = serializer._commit_delayed_write
+            restart_delayed_timer = serializer._restart_delayed_timer
+
+            def hooked_commit_delayed_write():
+                hooked_call(cls.COMMIT, commit_delayed_write, ())
+
+            def hooked_restart_delayed_timer():
+                hooked_call(cls.RESTART_TIMER, restart_delayed_timer, ())
+
+            serializer._commit_delayed_write = hooked_commit_delayed_write
+            serializer._restart_delayed_timer = hooked_restart_delayed_timer
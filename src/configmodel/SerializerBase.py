@@ -3,14 +3,33 @@ from typing import List
 
 
 class SerializerBase:
+    # SerializersFactory creates a single instance for all models using the same file
+    shared_by_filename = True
+
+    # SerializerMetrics collecting metrics of this serializer, if enabled (see SerializersFactory.metrics_enabled)
+    _metrics = None
+    # ProfilingHooks.Hook instances called only for this serializer (see ProfilingHooks.attach())
+    _hooks = ()
 
     class FieldDefaultValue:
         def __init__(self, path, value):
             self.path = path
             self.value = value
 
+    class ValueChange:
+        """
+        Passed to change listeners when a value is changed
+        """
+        def __init__(self, path, value):
+            self.path = path
+            self.value = value
+
+        def __repr__(self):
+            return f"ValueChange({self.path}, {self.value!r})"
+
     def __init__(self, filename):
         self.filename = filename
+        self._change_listeners = []
 
     def set_value(self, path, value):
         raise NotImplementedError
@@ -18,8 +37,89 @@ class SerializerBase:
     def get_value(self, path):
         raise NotImplementedError
 
+    def set_values(self, values):
+        """
+        Set multiple values from iterable of (path, value).
+        Serializers which write values to storage should override it to write all values at once.
+        """
+        for path, value in values:
+            self.set_value(path, value)
+
+    def get_hash_tree(self):
+        """
+        Get ConfigDiff.HashTree of all values
+        """
+        raise NotImplementedError
+
     def write_default_values_from_model(self, default_values: List[FieldDefaultValue]):
         """
         Initialize default values
         """
         raise NotImplementedError
+
+    def read_values_from_model(self, default_values: List[FieldDefaultValue], stored_values=None):
+        """
+        Initialize default values like write_default_values_from_model(), but without writing them to storage.
+        Values already read from storage (list of (path, value), e.g. by another process) can be passed,
+        so the storage is not read again. Serializers which never write default values don't need to override it.
+        """
+        self.write_default_values_from_model(default_values)
+
+    def set_model_schema(self, default_values: List[FieldDefaultValue]):
+        """
+        Called with default values of the model by serializers combining other serializers (SerializerLayered)
+        instead of write_default_values_from_model(). Default values must not be written.
+        """
+        pass
+
+    def reload(self):
+        """
+        Read values changed in the storage by other programs.
+        Change listeners are notified about every changed value.
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Write pending changes immediately.
+        Serializers which don't delay writes have nothing to do here.
+        """
+        pass
+
+    async def aflush(self):
+        """
+        Same as flush(), but doesn't block the running event loop
+        """
+        import asyncio
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    async def aset_value(self, path, value):
+        """
+        Same as set_value(), but doesn't block the running event loop
+        """
+        import asyncio
+        await asyncio.get_running_loop().run_in_executor(None, self.set_value, path, value)
+
+    def add_change_listener(self, listener):
+        """
+        Add a callable which receives ValueChange every time a value is changed.
+        Listeners may be called from any thread.
+        """
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        """
+        Remove listener added by add_change_listener()
+        """
+        self._change_listeners.remove(listener)
+
+    def _notify_change(self, path, value):
+        """
+        Notify change listeners
+        """
+        if not self._change_listeners:
+            return
+        change = SerializerBase.ValueChange(path, value)
+        # copy the list, listeners could be removed from other threads
+        for listener in tuple(self._change_listeners):
+            listener(change)
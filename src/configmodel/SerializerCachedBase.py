@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import threading
+
+from configmodel.ConfigDiff import ConfigDiff
+from configmodel.MixinCachedValues import MixinCachedValues
+from configmodel.MixinDelayedWrite import MixinDelayedWrite
+from configmodel.SerializerBase import SerializerBase
+
+
+class SerializerCachedBase(SerializerBase, MixinCachedValues, MixinDelayedWrite):
+    """
+    Base class for serializers, which keep all values in cache and write changed values on (delayed) commit.
+    Derived classes implement _commit_delayed_write(), write_default_values_from_model() and reload().
+    """
+
+    def __init__(self, filename):
+        SerializerBase.__init__(self, filename)
+        MixinCachedValues.__init__(self)
+        MixinDelayedWrite.__init__(self, delayed_write_enabled=False)
+        # built on demand by get_hash_tree()
+        self._hash_tree = None
+        # commits are started by timers, flush() and immediate writes of any thread, they must not interleave
+        self._commit_lock = threading.RLock()
+
+    def set_value(self, path, value):
+        if not path:
+            raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
+        # set cached value
+        self.set_cached_value(path, value, is_dirty=True)
+        self._notify_change(path, value)
+        # initiate delayed write
+        self._restart_delayed_timer()
+
+    def set_values(self, values):
+        """
+        Set multiple values from iterable of (path, value), all values are written in a single commit
+        """
+        for path, value in values:
+            if not path:
+                raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
+            self.set_cached_value(path, value, is_dirty=True)
+            self._notify_change(path, value)
+        # initiate delayed write
+        self._restart_delayed_timer()
+
+    async def aset_value(self, path, value):
+        if not path:
+            raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
+        # set cached value, only writing to file is offloaded from the event loop
+        self.set_cached_value(path, value, is_dirty=True)
+        self._notify_change(path, value)
+        # initiate delayed write
+        await self._arestart_delayed_timer()
+
+    def flush(self):
+        if not self._is_dirty and self._timer is None:
+            # nothing to write, but wait for a commit running in another thread (e.g. of an expired timer)
+            with self._commit_lock:
+                return
+        self._flush_delayed_write()
+
+    async def aflush(self):
+        if not self._is_dirty and self._timer is None and self._commit_lock.acquire(blocking=False):
+            # nothing to write and no commit is running
+            self._commit_lock.release()
+            return
+        await self._aflush_delayed_write()
+
+    def get_value(self, path):
+        if not path:
+            raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
+        return self.get_cached_value(path)
+
+    def _notify_change(self, path, value):
+        if self._hash_tree is not None:
+            self._hash_tree.set_value(path, value)
+        super()._notify_change(path, value)
+
+    def get_hash_tree(self):
+        """
+        Get ConfigDiff.HashTree of cached values. The tree is kept up to date when values are changed.
+        """
+        if self._hash_tree is None:
+            cached_values = self._cached_values or {}
+            self._hash_tree = ConfigDiff.build_tree((cached_value.path, cached_value.value) for cached_value in cached_values.values())
+        return self._hash_tree
+
+    def _read_stored_values(self):
+        """
+        Read all values from storage as cached values {full name: CachedValue}
+        """
+        raise NotImplementedError()
+
+    def read_values_from_model(self, default_values, stored_values=None):
+        """
+        Read values from storage (unless stored_values are passed), default values of missing values are only cached.
+        They are written to storage by the next commit of serializers, which write values missing in storage.
+        """
+        if stored_values is None:
+            cached_values = self._read_stored_values()
+        else:
+            cached_values = {self._path_to_str(path): self.CachedValue(path, value, False) for path, value in stored_values}
+        for field in default_values:
+            full_name = self._path_to_str(field.path)
+            if full_name not in cached_values:
+                cached_values[full_name] = self.CachedValue(field.path, field.value, False)
+        self.assign_cached_values(cached_values)
+
+    def assign_cached_values(self, cached_values):
+        super().assign_cached_values(cached_values)
+        self._hash_tree = None
+
+    @contextlib.contextmanager
+    def _committing_dirty_values(self):
+        """
+        Context of a commit, yields dirty values to be written {full name: value}.
+        Values set while they are being written stay dirty, values which could not be written are dirty again.
+        """
+        with self._commit_lock:
+            dirty_values = self._take_dirty_values()
+            try:
+                yield dirty_values
+            except BaseException:
+                self._restore_dirty_values(dirty_values)
+                raise
+
+    def _merge_reloaded_values(self, cached_values):
+        """
+        Update cache with values read from storage and notify change listeners.
+        Values changed by the application, but not written yet, are preserved.
+        """
+        if self._cached_values is None:
+            self._cached_values = {}
+        for full_name, stored_value in cached_values.items():
+            cached_value = self._cached_values.get(full_name)
+            if cached_value is not None:
+                if cached_value.is_dirty or cached_value.value == stored_value.value or str(cached_value.value) == str(stored_value.value):
+                    continue
+                cached_value.value = stored_value.value
+            elif self._cached_values.setdefault(full_name, stored_value) is not stored_value:
+                # value was set by another thread in the meantime
+                continue
+            self._notify_change(stored_value.path, stored_value.value)
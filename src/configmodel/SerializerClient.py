@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+import itertools
+import json
+import socket
+import struct
+import threading
+
+from configmodel.ConfigDiff import ConfigDiff
+from configmodel.Logger import logger
+from configmodel.SerializerBase import SerializerBase
+
+
+class SerializerClient(SerializerBase):
+    """
+    Client of config server (python -m configmodel.server), filename is path of the server socket.
+
+    All values are cached locally and updated by changes pushed by the server,
+    so reads don't cross the socket. Writes are sent to the server, which writes them to the config file.
+    The connection is kept open and reconnected on the next request if the server was restarted.
+    """
+    REQUEST_TIMEOUT = 10.0
+
+    _LENGTH = struct.Struct("!I")
+
+    class Request:
+        def __init__(self, request_id, on_reply=None):
+            self.id = request_id
+            self.event = threading.Event()
+            self.reply = None
+            # called by the receiving thread with a successful reply, before replies of later requests
+            self.on_reply = on_reply
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        # {full name: (path, value)}
+        self._values = {}
+        self._default_values = []
+        self._socket = None
+        self._file = None
+        self._request_ids = itertools.count(1)
+        # {request id: Request} waiting for reply
+        self._requests = {}
+        # only one thread connects and writes requests at a time, replies are awaited without the lock
+        self._lock = threading.RLock()
+
+    @classmethod
+    def send_message(cls, file, message):
+        data = json.dumps(message, separators=(",", ":"), default=str).encode("utf-8")
+        file.write(cls._LENGTH.pack(len(data)) + data)
+        file.flush()
+
+    @classmethod
+    def receive_message(cls, file):
+        """
+        Read one message, None if the connection was closed
+        """
+        header = file.read(cls._LENGTH.size)
+        if len(header) < cls._LENGTH.size:
+            return None
+        length, = cls._LENGTH.unpack(header)
+        data = file.read(length)
+        if len(data) < length:
+            return None
+        return json.loads(data.decode("utf-8"))
+
+    def _connect(self):
+        """
+        Connect and send default values, called with the lock held. Returns the request of default values.
+        """
+        logger.debug("Connecting to config server: %s", self.filename)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(self.filename)
+        self._file = self._socket.makefile("rwb")
+        threading.Thread(target=self._receive_messages, args=(self._file,), daemon=True).start()
+        # values could be changed while disconnected
+        return self._write_request("defaults", [[value.path, value.value] for value in self._default_values],
+                                   self._on_defaults_reply)
+
+    def _disconnect(self, file):
+        with self._lock:
+            if self._file is not file:
+                return
+            try:
+                # wakes up the receiving thread
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                self._file.close()
+            except OSError:
+                # data of a request which couldn't be sent is flushed on close
+                pass
+            self._socket.close()
+            self._file = None
+            self._socket = None
+            requests = list(self._requests.values())
+            self._requests.clear()
+        # wake up threads waiting for replies
+        for request in requests:
+            request.event.set()
+
+    def _receive_messages(self, file):
+        try:
+            while True:
+                message = self.receive_message(file)
+                if message is None:
+                    break
+                if message.get("op") == "changed":
+                    self._apply_changes(message["values"])
+                    continue
+                request = self._requests.pop(message.get("id"), None)
+                if request is not None:
+                    if request.on_reply is not None and "error" not in message:
+                        request.on_reply(message)
+                    request.reply = message
+                    request.event.set()
+        except (OSError, ValueError):
+            pass
+        self._disconnect(file)
+
+    def _write_request(self, op, values=None, on_reply=None):
+        """
+        Send request without waiting for the reply, called with the lock held
+        """
+        request = self.Request(next(self._request_ids), on_reply)
+        message = {"id": request.id, "op": op}
+        if values is not None:
+            message["values"] = values
+        self._requests[request.id] = request
+        try:
+            self.send_message(self._file, message)
+        except OSError:
+            self._requests.pop(request.id, None)
+            raise
+        return request
+
+    def _wait_for_reply(self, request, op):
+        if not request.event.wait(self.REQUEST_TIMEOUT):
+            self._requests.pop(request.id, None)
+            raise TimeoutError(f"Config server didn't reply to '{op}' in {self.REQUEST_TIMEOUT} seconds: {self.filename}")
+        if request.reply is None:
+            raise ConnectionError(f"Connection to config server was closed: {self.filename}")
+        if "error" in request.reply:
+            raise Exception(f"Config server failed to process '{op}': {request.reply['error']}")
+        return request.reply
+
+    def _send_request(self, op, values=None):
+        connect_request = None
+        with self._lock:
+            if self._file is None:
+                connect_request = self._connect()
+            request = self._write_request(op, values)
+        # the receiving thread must be able to disconnect while waiting, so the lock is not held here
+        if connect_request is not None:
+            self._wait_for_reply(connect_request, "defaults")
+        return self._wait_for_reply(request, op)
+
+    def _on_defaults_reply(self, reply):
+        self._assign_values(reply["values"])
+
+    def _assign_values(self, values):
+        self._values = dict((".".join(path), (path, value)) for path, value in values)
+
+    def _apply_changes(self, values):
+        for path, value in values:
+            full_name = ".".join(path)
+            old_value = self._values.get(full_name)
+            self._values[full_name] = (path, value)
+            if old_value is None or old_value[1] != value:
+                self._notify_change(path, value)
+
+    def get_value(self, path):
+        if not path:
+            raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
+        path_value = self._values.get(".".join(path))
+        if path_value is None:
+            return None
+        return path_value[1]
+
+    def set_value(self, path, value):
+        self.set_values([(path, value)])
+
+    def set_values(self, values):
+        """
+        Set multiple values from iterable of (path, value), all values are sent in a single request
+        """
+        values = [[list(path), value] for path, value in values]
+        for path, value in values:
+            if not path:
+                raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
+        # the local cache is updated by changes pushed by the server before the reply
+        self._send_request("set", values)
+
+    def flush(self):
+        self._send_request("flush")
+
+    def reload(self):
+        self._send_request("reload")
+
+    def get_hash_tree(self):
+        return ConfigDiff.build_tree(self._values.values())
+
+    def write_default_values_from_model(self, default_values):
+        self._default_values += default_values
+        with self._lock:
+            if self._file is None:
+                # all default values are sent when connected
+                request = self._connect()
+            else:
+                request = self._write_request("defaults", [[value.path, value.value] for value in default_values],
+                                              self._on_defaults_reply)
+        self._wait_for_reply(request, "defaults")
+
+    def close(self):
+        """
+        Close connection to the server
+        """
+        with self._lock:
+            file = self._file
+        if file is not None:
+            self._disconnect(file)
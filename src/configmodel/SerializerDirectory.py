@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import concurrent.futures
+import fnmatch
+import os
+import threading
+
+from configmodel.Logger import logger
+from configmodel.SerializerLayered import SerializerLayered
+
+
+class SerializerDirectory(SerializerLayered):
+    """
+    Config directory of drop-in fragments (e.g. app.d/*.ini), optionally on top of a base file.
+    Fragments are layers merged in lexical order of their names, the override file is the highest layer
+    and all values are written to it. get_layer() returns the fragment providing a value.
+
+    Fragments are parsed concurrently. Reload parses only fragments whose modification time or size was changed,
+    and fragments added to or removed from the directory.
+
+    Usage: AppConfig("/etc/app.d") or AppConfig(SerializerDirectory("/etc/app.d", base_filename="/usr/share/app/app.ini"))
+    """
+    # name of the override file in the directory, if override_filename is not set
+    OVERRIDE_FILENAME = "override.ini"
+    DEFAULT_PATTERN = "*.ini"
+
+    def __init__(self, directory, base_filename=None, override_filename=None, pattern=DEFAULT_PATTERN, max_workers=None):
+        """
+        :param directory: directory of fragments
+        :param base_filename: file with the lowest priority, e.g. shipped with the application
+        :param override_filename: file with the highest priority, values are written to it
+        :param pattern: pattern of names of fragments
+        :param max_workers: number of threads parsing fragments, default of concurrent.futures if None
+        """
+        self.directory = directory
+        self.base_filename = base_filename
+        self.override_filename = override_filename or os.path.join(directory, self.OVERRIDE_FILENAME)
+        self.pattern = pattern
+        self.max_workers = max_workers
+        # {filename: (modification time, size)} of loaded layers, None if the file doesn't exist
+        self._layer_stats = {}
+        # layers are changed by reload(), which could be called from several threads
+        self._layers_lock = threading.Lock()
+        self._model_default_values = []
+        override_layer = self._create_layer(self.override_filename)
+        base_layers = [self._create_layer(base_filename)] if base_filename is not None else []
+        fragment_layers = [self._create_layer(filename) for filename in self._find_fragments()]
+        super().__init__(base_layers + fragment_layers + [override_layer])
+
+    @staticmethod
+    def _create_layer(filename):
+        from configmodel.SerializersFactory import SerializersFactory
+        serializer_class = SerializersFactory.get_serializer_class(filename)
+        if serializer_class is None:
+            raise Exception(f"Unknown file extension for filename: {filename}")
+        return serializer_class(filename)
+
+    def _find_fragments(self):
+        """
+        Get sorted filenames of fragments in the directory
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        override_filename = os.path.abspath(self.override_filename)
+        filenames = []
+        for name in sorted(names):
+            filename = os.path.join(self.directory, name)
+            if fnmatch.fnmatch(name, self.pattern) and os.path.abspath(filename) != override_filename and os.path.isfile(filename):
+                filenames.append(filename)
+        return filenames
+
+    @staticmethod
+    def _get_stat(filename):
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reload_layers(self, layers):
+        """
+        Parse files of layers concurrently
+        """
+        def reload_layer(layer):
+            # stat is taken first, so the file changed while it's parsed is parsed again by the next reload
+            stat = self._get_stat(layer.filename)
+            layer.reload()
+            return layer.filename, stat
+
+        if len(layers) <= 1:
+            results = [reload_layer(layer) for layer in layers]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+                results = list(executor.map(reload_layer, layers))
+        self._layer_stats.update(results)
+
+    def _load_layers(self, default_values):
+        self._model_default_values = default_values
+        os.makedirs(self.directory, exist_ok=True)
+        for layer in self.layers:
+            layer.set_model_schema(default_values)
+        self._reload_layers(self.layers)
+        for layer in self.layers:
+            layer.add_change_listener(self._on_layer_changed)
+        self._layers_loaded = True
+        logger.debug("Loaded %d layers of config directory: %s", len(self.layers), self.directory)
+
+    def get_fragments(self):
+        """
+        Get filenames of fragments in lexical order (without the base and the override file)
+        """
+        start = 1 if self.base_filename is not None else 0
+        return [layer.filename for layer in self.layers[start:-1]]
+
+    def reload(self):
+        """
+        Parse changed, added and removed fragments, the base and the override file if they were changed
+        """
+        if not self._layers_loaded:
+            return
+        with self._layers_lock:
+            fragment_filenames = self._find_fragments()
+            base_filenames = [self.base_filename] if self.base_filename is not None else []
+            read_only_filenames = base_filenames + fragment_filenames
+            old_layers = {layer.filename: layer for layer in self.layers[:-1]}
+            # layers of changed files are replaced by new ones, so values removed from the files are removed too
+            replaced_layers = [layer for filename, layer in old_layers.items()
+                               if filename not in read_only_filenames or self._get_stat(filename) != self._layer_stats.get(filename)]
+            replaced_filenames = {layer.filename for layer in replaced_layers}
+            new_layers = [self._create_layer(filename) for filename in read_only_filenames
+                          if filename not in old_layers or filename in replaced_filenames]
+            logger.debug("Reloading config directory %s: %d files removed or changed, %d files parsed",
+                         self.directory, len(replaced_layers), len(new_layers))
+            for layer in new_layers:
+                layer.set_model_schema(self._model_default_values)
+            self._reload_layers(new_layers)
+            if replaced_layers or new_layers:
+                layers_by_filename = dict(old_layers)
+                layers_by_filename.update((layer.filename, layer) for layer in new_layers)
+                with self._resolve_lock:
+                    self.layers = [layers_by_filename[filename] for filename in read_only_filenames] + [self.write_layer]
+                for layer in replaced_layers:
+                    layer.remove_change_listener(self._on_layer_changed)
+                    if layer.filename not in read_only_filenames:
+                        self._layer_stats.pop(layer.filename, None)
+                paths = {}
+                for layer in replaced_layers + new_layers:
+                    for path, _ in layer.get_hash_tree().iter_values():
+                        paths[".".join(path)] = path
+                for path in paths.values():
+                    self._resolve_value(path)
+                for layer in new_layers:
+                    layer.add_change_listener(self._on_layer_changed)
+            if self._get_stat(self.write_layer.filename) != self._layer_stats.get(self.write_layer.filename):
+                # changed values are resolved again by listeners, values set by the application are preserved
+                self._reload_layers([self.write_layer])
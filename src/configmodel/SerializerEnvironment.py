@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import os
+import warnings
+
+from configmodel.ConfigDiff import ConfigDiff
+from configmodel.Logger import logger
+from configmodel.SerializerBase import SerializerBase
+
+
+class SerializerEnvironment(SerializerBase):
+    """
+    Reads values from environment variables, usually as a layer of SerializerLayered.
+    Variable names consist of the prefix and upper case names of the path separated by "__",
+    e.g. APP_PHOTOS_API__CLIENT_ID sets photos_api.client_id.
+
+    Names of variables are computed once from the model. Variables are read when the model is initialized
+    and by refresh(), values are converted to types of default values.
+    Variables with the prefix, which don't match any field, are reported as a warning (or exception if strict).
+    Values can't be changed by the application.
+    """
+    SEPARATOR = "__"
+    TRUE_VALUES = ("1", "true", "yes", "on")
+    FALSE_VALUES = ("0", "false", "no", "off")
+
+    def __init__(self, prefix="APP", environ=None, strict=False):
+        super().__init__(None)
+        self.prefix = prefix.upper() + "_"
+        # os.environ is used if not set
+        self.environ = environ
+        self.strict = strict
+        # {variable name: (path, type of default value)}
+        self._fields_by_name = {}
+        # {full name: (path, value)} of default values, used only if this is the only serializer of the model
+        self._default_values = {}
+        # {full name: (path, value)} of values read from variables
+        self._values = {}
+        self.unknown_variables = []
+
+    def get_variable_name(self, path):
+        return self.prefix + self.SEPARATOR.join(name.upper() for name in path)
+
+    def set_model_schema(self, default_values):
+        for default_value in default_values:
+            self._fields_by_name[self.get_variable_name(default_value.path)] = (default_value.path, type(default_value.value))
+
+    def _convert_value(self, name, value, value_type):
+        try:
+            if value_type is bool:
+                if value.lower() in self.TRUE_VALUES:
+                    return True
+                if value.lower() in self.FALSE_VALUES:
+                    return False
+                raise ValueError(f"expected one of {', '.join(self.TRUE_VALUES + self.FALSE_VALUES)}")
+            if value_type in (int, float):
+                return value_type(value)
+        except ValueError as e:
+            raise ValueError(f"Invalid value of environment variable {name}='{value}': {e}") from None
+        return value
+
+    def refresh(self):
+        """
+        Read environment variables again, change listeners are notified about changed values
+        """
+        environ = os.environ if self.environ is None else self.environ
+        values = {}
+        unknown_variables = []
+        for name, value in environ.items():
+            if not name.startswith(self.prefix):
+                continue
+            field = self._fields_by_name.get(name)
+            if field is None:
+                unknown_variables.append(name)
+                continue
+            path, value_type = field
+            logger.debug("Using environment variable %s for field '%s'", name, path)
+            values[".".join(path)] = (path, self._convert_value(name, value, value_type))
+        self.unknown_variables = sorted(unknown_variables)
+        if self.unknown_variables:
+            message = f"Unknown environment variables with prefix {self.prefix}: {', '.join(self.unknown_variables)}"
+            if self.strict:
+                raise Exception(message)
+            warnings.warn(message)
+
+        old_values = self._values
+        self._values = values
+        for full_name, (path, value) in values.items():
+            old_value = old_values.get(full_name)
+            if old_value is None or old_value[1] != value:
+                self._notify_change(path, value)
+        for full_name, (path, value) in old_values.items():
+            if full_name not in values:
+                default_value = self._default_values.get(full_name)
+                self._notify_change(path, None if default_value is None else default_value[1])
+
+    def reload(self):
+        self.refresh()
+
+    def get_value(self, path):
+        if not path:
+            raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
+        full_name = ".".join(path)
+        path_value = self._values.get(full_name) or self._default_values.get(full_name)
+        if path_value is None:
+            return None
+        return path_value[1]
+
+    def set_value(self, path, value):
+        raise Exception(f"Value of '{'.'.join(path)}' can't be changed, environment variables are read-only")
+
+    def get_hash_tree(self):
+        values = dict(self._default_values)
+        values.update(self._values)
+        return ConfigDiff.build_tree(values.values())
+
+    def write_default_values_from_model(self, default_values):
+        for default_value in default_values:
+            self._default_values[".".join(default_value.path)] = (default_value.path, default_value.value)
+        self.set_model_schema(default_values)
+        self.refresh()
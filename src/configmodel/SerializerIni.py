@@ -1,16 +1,34 @@
 # -*- coding: utf-8 -*-
-import configparser
+import hashlib
+import marshal
 import os
+import tempfile
 
-from configmodel.Logger import Log
-from configmodel.MixinCachedValues import MixinCachedValues
-from configmodel.MixinDelayedWrite import MixinDelayedWrite
-from configmodel.SerializerBase import SerializerBase
+from configmodel.ConfigDiff import ConfigDiff
+from configmodel.IniTokenizer import IniTokenizer
+from configmodel.Logger import logger
+from configmodel.SerializerCachedBase import SerializerCachedBase
 
 
-class SerializerIni(SerializerBase, MixinCachedValues, MixinDelayedWrite):
+class SerializerIni(SerializerCachedBase):
     DEFAULT_SECTION = "Global"
 
+    # Store parsed values in a binary file next to the INI file ("<filename>.cache"),
+    # so the INI file is parsed only if it was changed or the model was changed.
+    # Must be set before config models are initialized.
+    sidecar_cache_enabled = False
+    SIDECAR_CACHE_SUFFIX = ".cache"
+    SIDECAR_CACHE_FORMAT = 1
+
+    # Read INI files through a memory-mapped view instead of buffered reads
+    mmap_enabled = False
+
+    # Parse only sections used by the model on load, other sections are parsed on first access.
+    # Byte ranges of sections can be stored next to the INI file ("<filename>.index").
+    lazy_loading_enabled = False
+    section_index_persistent = False
+    SECTION_INDEX_SUFFIX = ".index"
+
     class ParameterLocation:
 
         def __init__(self):
@@ -25,9 +43,13 @@ class SerializerIni(SerializerBase, MixinCachedValues, MixinDelayedWrite):
             return self.full_name
 
     def __init__(self, filename):
-        SerializerBase.__init__(self, filename)
-        MixinCachedValues.__init__(self)
-        MixinDelayedWrite.__init__(self, delayed_write_enabled=False)
+        super().__init__(filename)
+        # hash of the model, set if sidecar cache is enabled
+        self._schema_hash = None
+        # sections not parsed yet {section: (start offset, end offset)}, set if lazy loading is used
+        self._unparsed_sections = None
+        # (mtime, size) of the file when byte ranges of unparsed sections were found
+        self._section_index_stat = None
 
     @staticmethod
     def _get_parameter_location(path):
@@ -50,81 +72,361 @@ class SerializerIni(SerializerBase, MixinCachedValues, MixinDelayedWrite):
         """
         Write cached values to INI file
         """
-        Log.debug(f"Writing cached values to INI file: {self.filename}")
-        ini = configparser.ConfigParser()
-        ini.read(self.filename)
-        for full_name, cached_value in self._cached_values.items():
-            location = self._get_parameter_location(cached_value.path)
-            if not ini.has_section(location.section):
-                ini.add_section(location.section)
-            do_write = False
-            # write value if it is dirty
-            if cached_value.is_dirty:
-                do_write = True
-            # also write value if it is not in INI file
-            if not ini.has_option(location.section, location.parameter):
-                do_write = True
-            # write value
-            if do_write:
-                ini.set(location.section, location.parameter, str(cached_value.value))
-        with open(self.filename, "w") as config_file:
-            ini.write(config_file)
-        self._set_not_dirty()
+        with self._committing_dirty_values() as dirty_values:
+            logger.debug("Writing cached values to INI file: %s", self.filename)
+            document = self._load_document()
+            changes = []
+            # copy items, values could be added from other threads while writing
+            for full_name, cached_value in list(self._cached_values.items()):
+                # write value if it is dirty, also write value if it is not in INI file
+                if full_name in dirty_values:
+                    changes.append((cached_value.path, dirty_values[full_name]))
+                elif not self._document_has_value(document, cached_value.path):
+                    changes.append((cached_value.path, cached_value.value))
+            self._write_document(document, changes)
 
-    def set_value(self, path, value):
-        if not path:
-            raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
-        # set cached value
-        self.set_cached_value(path, value, is_dirty=True)
-        # initiate delayed write
-        self._restart_delayed_timer()
+    def _load_document(self, filename=None):
+        """
+        Parse INI file
+
+        :rtype: IniTokenizer.Document | IniTokenizer.ConfigParserDocument
+        """
+        return IniTokenizer.load(filename or self.filename, self.mmap_enabled)
+
+    @classmethod
+    def _document_has_value(cls, document, path):
+        location = cls._get_parameter_location(path)
+        return document.has_option(location.section, location.parameter)
+
+    def _write_document(self, document, changes):
+        """
+        Write changed values (list of (path, value)) to INI file.
+        Changed lines are replaced in place, the rest of the file is preserved.
+        """
+        locations = []
+        for path, value in changes:
+            location = self._get_parameter_location(path)
+            locations.append((location.section, location.parameter, str(value)))
+        lines = document.set_values(locations)
+        with open(self.filename, "w") as config_file:
+            config_file.writelines(lines)
+        if self._metrics is not None:
+            self._metrics.add_bytes_written(os.path.getsize(self.filename))
+        # byte ranges of unparsed sections are changed
+        self._section_index_stat = None
+        if self._schema_hash is not None:
+            self._write_sidecar_cache(self._read_cached_values(IniTokenizer.load_lines(lines)))
 
     def get_value(self, path):
-        if not path:
-            raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
-        Log.debug(f"Getting value of field '{path}'")
-        # get cached value
-        cached_value = self.get_cached_value(path)
+        # reads are not logged, this is the hottest path (see benchmarks/bench_logging.py)
+        cached_value = super().get_value(path)
+        if cached_value is None and self._unparsed_sections:
+            # value could be in a section which is not parsed yet
+            self._load_section(self._get_parameter_location(path).section)
+            cached_value = self.get_cached_value(path)
         return cached_value
 
+    @classmethod
+    def _read_cached_values(cls, document):
+        """
+        Convert all values of parsed INI file to cached values
+        """
+        cached_values = {}
+        for section, parameter, value in document.iter_values():
+            parameter_path = parameter.split(".")
+            if section != SerializerIni.DEFAULT_SECTION:
+                parameter_path.insert(0, section)
+            cached_values[cls._path_to_str(parameter_path)] = cls.CachedValue(parameter_path, value, False)
+        return cached_values
+
+    @classmethod
+    def read_values(cls, filename):
+        """
+        Read all values from INI file as list of (path, value)
+        """
+        document = IniTokenizer.load(filename, cls.mmap_enabled)
+        return [(cached_value.path, cached_value.value) for cached_value in cls._read_cached_values(document).values()]
+
+    def _read_stored_values(self):
+        self._unparsed_sections = None
+        return self._read_cached_values(self._load_document())
+
+    def get_hash_tree(self):
+        # all sections must be parsed for comparison
+        self._load_all_sections()
+        return super().get_hash_tree()
+
+    def diff_file(self, filename):
+        """
+        Get list of ConfigDiff.Change turning cached values into values of another INI file
+        """
+        return ConfigDiff.compare_trees(self.get_hash_tree(), ConfigDiff.build_tree(self.read_values(filename)))
+
+    @classmethod
+    def diff_files(cls, old_filename, new_filename):
+        """
+        Get list of ConfigDiff.Change turning values of one INI file into values of another
+        """
+        return ConfigDiff.diff(cls.read_values(old_filename), cls.read_values(new_filename))
+
+    def reload(self):
+        """
+        Read values changed in INI file by other programs.
+        Values changed by the application, but not written yet, are preserved.
+        """
+        logger.debug("Reloading INI file: %s", self.filename)
+        file_values = None
+        if self._unparsed_sections is not None:
+            file_values = self._reload_parsed_sections()
+        if file_values is None:
+            self._unparsed_sections = None
+            file_values = self._read_cached_values(self._load_document())
+        self._merge_reloaded_values(file_values)
+
+    def _get_section_index_filename(self):
+        return self.filename + self.SECTION_INDEX_SUFFIX
+
+    def _get_section_index(self):
+        """
+        Get byte ranges of sections of INI file, read from persistent index if it's up to date.
+
+        :return: dictionary {section: (start offset, end offset)} or None, if the file can't be loaded lazily
+        """
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        file_stat = (stat.st_mtime_ns, stat.st_size)
+        index_filename = self._get_section_index_filename()
+        if self.section_index_persistent:
+            try:
+                with open(index_filename, "rb") as f:
+                    index_stat, index = marshal.load(f)
+                if index_stat == file_stat:
+                    self._section_index_stat = file_stat
+                    return index
+            except (OSError, EOFError, ValueError, TypeError):
+                pass
+        index = IniTokenizer.build_section_index(self.filename)
+        if index is None:
+            return None
+        self._section_index_stat = file_stat
+        if self.section_index_persistent:
+            try:
+                self._write_marshal_atomically(index_filename, (file_stat, index), stat.st_mode)
+            except OSError as e:
+                logger.error("Failed to write section index file %s: %s", index_filename, e)
+        return index
+
+    def _parse_section(self, section, byte_range):
+        """
+        Parse single section of INI file
+
+        :return: cached values of the section or None, if it can't be parsed separately
+        """
+        try:
+            return self._read_cached_values(IniTokenizer.parse_section(self.filename, section, *byte_range))
+        except IniTokenizer.UnsupportedSyntax:
+            return None
+
+    def _load_section(self, section):
+        """
+        Parse section, which was not parsed on load, and add its values to cache
+        """
+        if section not in self._unparsed_sections:
+            return
+        try:
+            stat = os.stat(self.filename)
+            file_stat = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            file_stat = None
+        if file_stat != self._section_index_stat:
+            # file was changed, byte ranges are outdated
+            index = self._get_section_index()
+            if index is None:
+                self._load_all_sections()
+                return
+            self._unparsed_sections = {name: byte_range for name, byte_range in index.items() if name in self._unparsed_sections}
+        byte_range = self._unparsed_sections.pop(section, None)
+        if byte_range is None:
+            return
+        logger.debug("Loading section [%s] of INI file: %s", section, self.filename)
+        section_values = self._parse_section(section, byte_range)
+        if section_values is None:
+            self._load_all_sections()
+            return
+        for full_name, cached_value in section_values.items():
+            # keep values set by the application
+            self._cached_values.setdefault(full_name, cached_value)
+
+    def _load_all_sections(self):
+        """
+        Parse all sections, which were not parsed on load
+        """
+        if self._unparsed_sections is None:
+            return
+        self._unparsed_sections = None
+        for full_name, cached_value in self._read_cached_values(self._load_document()).items():
+            self._cached_values.setdefault(full_name, cached_value)
+
+    def _reload_parsed_sections(self):
+        """
+        Parse sections of INI file, which were already parsed, and update byte ranges of unparsed sections
+
+        :return: cached values of parsed sections or None, if the file can't be loaded lazily anymore
+        """
+        index = self._get_section_index()
+        if index is None:
+            return None
+        cached_values = {}
+        unparsed_sections = {}
+        for section, byte_range in index.items():
+            if section in self._unparsed_sections:
+                unparsed_sections[section] = byte_range
+                continue
+            section_values = self._parse_section(section, byte_range)
+            if section_values is None:
+                return None
+            cached_values.update(section_values)
+        self._unparsed_sections = unparsed_sections
+        return cached_values
+
+    def _write_default_values_lazily(self, default_values):
+        """
+        Parse only sections used by the model, other sections are parsed on first access
+
+        :return: False, if the file can't be loaded lazily or default values must be written
+        """
+        index = self._get_section_index()
+        if index is None:
+            return False
+        cached_values = {}
+        parsed_sections = {}
+        for field in default_values:
+            section = self._get_parameter_location(field.path).section
+            if section not in parsed_sections:
+                if section not in index:
+                    # default values must be written
+                    return False
+                parsed_sections[section] = IniTokenizer.parse_section(self.filename, section, *index[section])
+            if not self._document_has_value(parsed_sections[section], field.path):
+                # default values must be written
+                return False
+        for document in parsed_sections.values():
+            cached_values.update(self._read_cached_values(document))
+        for field in default_values:
+            cached_values.setdefault(self._path_to_str(field.path), self.CachedValue(field.path, field.value, False))
+        self.assign_cached_values(cached_values)
+        self._unparsed_sections = {section: byte_range for section, byte_range in index.items() if section not in parsed_sections}
+        logger.debug("Loaded %d of %d sections of INI file: %s", len(parsed_sections), len(index), self.filename)
+        return True
+
+    @staticmethod
+    def _get_schema_hash(default_values):
+        """
+        Get hash of paths and default values of the model
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for field in default_values:
+            h.update(repr((field.path, field.value)).encode())
+        return h.hexdigest()
+
+    def _get_sidecar_cache_filename(self):
+        return self.filename + self.SIDECAR_CACHE_SUFFIX
+
+    def _read_sidecar_cache(self):
+        """
+        Read cached values from sidecar cache file.
+
+        :return: cached values or None, if sidecar cache doesn't exist or is outdated
+        """
+        try:
+            with open(self._get_sidecar_cache_filename(), "rb") as f:
+                cache_format, mtime_ns, size, schema_hash, values = marshal.load(f)
+            stat = os.stat(self.filename)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if cache_format != self.SIDECAR_CACHE_FORMAT or schema_hash != self._schema_hash:
+            return None
+        if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+            return None
+        cached_values = {}
+        for path, value in values:
+            cached_values[self._path_to_str(path)] = self.CachedValue(path, value, False)
+        return cached_values
+
+    def _write_sidecar_cache(self, cached_values):
+        """
+        Write values of INI file (which was just written) to sidecar cache file
+        """
+        values = [(cached_value.path, cached_value.value) for cached_value in cached_values.values()]
+        cache_filename = self._get_sidecar_cache_filename()
+        try:
+            stat = os.stat(self.filename)
+            self._write_marshal_atomically(cache_filename, (self.SIDECAR_CACHE_FORMAT, stat.st_mtime_ns, stat.st_size,
+                                                            self._schema_hash, values), stat.st_mode)
+        except OSError as e:
+            logger.error("Failed to write sidecar cache file %s: %s", cache_filename, e)
+
+    @staticmethod
+    def _write_marshal_atomically(filename, data, mode):
+        """
+        Write data to a unique temporary file next to the file and replace the file by it,
+        so processes writing the same file at the same time don't use the same temporary file.
+        The file gets permissions of the INI file (mode).
+        """
+        file_descriptor, temp_filename = tempfile.mkstemp(prefix=os.path.basename(filename) + ".", suffix=".tmp",
+                                                          dir=os.path.dirname(os.path.abspath(filename)))
+        try:
+            with os.fdopen(file_descriptor, "wb") as f:
+                marshal.dump(data, f)
+            os.chmod(temp_filename, mode & 0o7777)
+            os.replace(temp_filename, filename)
+        except BaseException:
+            os.unlink(temp_filename)
+            raise
+
     def write_default_values_from_model(self, default_values):
         """
         Write default values to configuration file, if they are not already set
         """
-        if not os.path.exists(self.filename):
-            Log.debug(f"Creating new configuration file: {self.filename}")
-            open(self.filename, "w").close()
-        ini = configparser.ConfigParser()
-        ini.read(self.filename)
+        if self.sidecar_cache_enabled:
+            self._schema_hash = self._get_schema_hash(default_values)
+            cached_values = self._read_sidecar_cache()
+            if cached_values is not None:
+                # INI file and model are not changed, default values are already in the file
+                logger.debug("Using sidecar cache of configuration file: %s", self.filename)
+                self.assign_cached_values(cached_values)
+                return
+        if self.lazy_loading_enabled:
+            try:
+                if self._write_default_values_lazily(default_values):
+                    return
+            except IniTokenizer.UnsupportedSyntax:
+                pass
+        self._unparsed_sections = None
+        is_new_file = not os.path.exists(self.filename)
+        if is_new_file:
+            logger.debug("Creating new configuration file: %s", self.filename)
+        document = self._load_document()
 
         # read all values from INI file to cache
-        cached_values = {}
-        for section in ini.sections():
-            section_path = []
-            if section != SerializerIni.DEFAULT_SECTION:
-                section_path = [section]
-            for parameter in ini[section]:
-                parameter_path = section_path + parameter.split(".")
-                value = ini[section][parameter]
-                full_name = self._path_to_str(parameter_path)
-                cached_values[full_name] = self.CachedValue(parameter_path, value, False)
+        cached_values = self._read_cached_values(document)
 
         # write default values, if not already set in INI file
+        changes = []
         for field in default_values:
-            location = self._get_parameter_location(field.path)
-            if not ini.has_section(location.section):
-                ini.add_section(location.section)
-            if not ini.has_option(location.section, location.parameter):
-                Log.debug(f"Writing default value of field '{field.path}' to '{field.value}', location: {location}")
-                ini.set(location.section, location.parameter, str(field.value))
+            if not self._document_has_value(document, field.path):
+                logger.debug("Writing default value of field '%s' to '%s'", field.path, field.value)
+                changes.append((field.path, field.value))
             # add to cached values (if not already there)
             full_name = self._path_to_str(field.path)
             if full_name not in cached_values:
                 cached_values[full_name] = self.CachedValue(field.path, field.value, False)
+        # write INI file (only if something has changed)
+        if changes or is_new_file:
+            self._write_document(document, changes)
+        elif self._schema_hash is not None:
+            self._write_sidecar_cache(self._read_cached_values(document))
         # assign cached values
         self.assign_cached_values(cached_values)
-        # write INI file
-        with open(self.filename, "w") as config_file:
-            ini.write(config_file)
-
-
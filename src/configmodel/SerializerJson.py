@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import json
+
+from configmodel.SerializerNestedBase import SerializerNestedBase
+
+
+class SerializerJson(SerializerNestedBase):
+    """
+    Stores values in JSON file, nested objects are mapped to nested config models
+    """
+    INDENT = 4
+
+    def _load_data(self):
+        try:
+            with open(self.filename, "r", encoding="utf-8") as config_file:
+                data = json.load(config_file)
+        except FileNotFoundError:
+            return {}
+        if not isinstance(data, dict):
+            raise Exception(f"JSON file must contain an object: {self.filename}")
+        return data
+
+    def _dump_data(self, data):
+        with open(self.filename, "w", encoding="utf-8") as config_file:
+            json.dump(data, config_file, indent=self.INDENT, ensure_ascii=False, default=str)
+            config_file.write("\n")
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from configmodel.ConfigDiff import ConfigDiff
+from configmodel.SerializerBase import SerializerBase
+
+
+class SerializerLayered(SerializerBase):
+    """
+    Combines several serializers (layers), e.g. shipped file, host override file, environment variables.
+    Value of a path is taken from the last layer which has it, default values of the model are the lowest layer.
+
+    Resolved values of all paths are cached, so reading costs a single lookup regardless of the number of layers.
+    When a value of a layer is changed (or reloaded), only this path is resolved again.
+    Values are written to a single layer (the last one by default), default values are not written to layers.
+
+    Usage: AppConfig(SerializerLayered.from_filenames(["app.ini", "/etc/app/override.ini"]))
+    """
+
+    def __init__(self, layers, write_layer=-1):
+        """
+        :param layers: list of serializers, from the lowest to the highest priority
+        :param write_layer: index of the layer, which values are written to
+        """
+        if not layers:
+            raise ValueError("At least one layer is required")
+        self.layers = list(layers)
+        self.write_layer = self.layers[write_layer]
+        super().__init__(self.write_layer.filename)
+        # {full name: (path, value)} of default values of the model
+        self._default_values = {}
+        # {full name: (path, value)} of resolved values
+        self._resolved_values = {}
+        # {full name: layer} providing resolved values, values missing here are default values of the model
+        self._value_layers = {}
+        # values are resolved again from listeners of layers, which could be called from other threads
+        self._resolve_lock = threading.RLock()
+        self._layers_loaded = False
+
+    @classmethod
+    def from_filenames(cls, filenames, write_layer=-1):
+        """
+        Create layers from filenames, serializers are selected by extensions of files
+        """
+        from configmodel.SerializersFactory import SerializersFactory
+        return cls([SerializersFactory.get_serializer_by_filename(filename) for filename in filenames], write_layer)
+
+    def _load_layers(self, default_values):
+        for layer in self.layers:
+            layer.set_model_schema(default_values)
+            layer.reload()
+            layer.add_change_listener(self._on_layer_changed)
+        self._layers_loaded = True
+
+    def _on_layer_changed(self, change):
+        self._resolve_value(change.path)
+
+    def _resolve_value(self, path):
+        """
+        Resolve value of a single path again, notify change listeners if the resolved value was changed
+        """
+        full_name = ".".join(path)
+        with self._resolve_lock:
+            for layer in reversed(self.layers):
+                value = layer.get_value(path)
+                if value is not None:
+                    resolved_value = (path, value)
+                    self._value_layers[full_name] = layer
+                    break
+            else:
+                resolved_value = self._default_values.get(full_name)
+                self._value_layers.pop(full_name, None)
+            old_value = self._resolved_values.get(full_name)
+            if resolved_value is None:
+                self._resolved_values.pop(full_name, None)
+            else:
+                self._resolved_values[full_name] = resolved_value
+        if resolved_value is not None and (old_value is None or old_value[1] != resolved_value[1]):
+            self._notify_change(path, resolved_value[1])
+
+    def get_layer(self, path):
+        """
+        Get the layer which provides the value of the path, None if default value is used
+        """
+        return self._value_layers.get(".".join(path))
+
+    def get_value(self, path):
+        if not path:
+            raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
+        resolved_value = self._resolved_values.get(".".join(path))
+        if resolved_value is None:
+            return None
+        return resolved_value[1]
+
+    def set_value(self, path, value):
+        self.write_layer.set_value(path, value)
+
+    def set_values(self, values):
+        self.write_layer.set_values(values)
+
+    def flush(self):
+        for layer in self.layers:
+            layer.flush()
+
+    def reload(self):
+        # changed values are resolved again by listeners
+        for layer in self.layers:
+            layer.reload()
+
+    def get_hash_tree(self):
+        return ConfigDiff.build_tree(self._resolved_values.values())
+
+    def write_default_values_from_model(self, default_values):
+        if not self._layers_loaded:
+            self._load_layers(default_values)
+        with self._resolve_lock:
+            for default_value in default_values:
+                self._default_values[".".join(default_value.path)] = (default_value.path, default_value.value)
+            # resolve all values of all layers
+            resolved_values = dict(self._default_values)
+            value_layers = {}
+            for layer in self.layers:
+                for path, value in layer.get_hash_tree().iter_values():
+                    full_name = ".".join(path)
+                    resolved_values[full_name] = (path, value)
+                    value_layers[full_name] = layer
+            self._resolved_values = resolved_values
+            self._value_layers = value_layers
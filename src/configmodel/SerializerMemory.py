@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import weakref
+
+from configmodel.SerializerCachedBase import SerializerCachedBase
+
+
+class SerializerMemory(SerializerCachedBase):
+    """
+    Keeps values only in memory, used for ":memory:" filenames and in tests (see configmodel.pytest_plugin).
+    """
+    FILENAME = ":memory:"
+    # every model has its own values
+    shared_by_filename = False
+
+    # all instances, so tests can restore their values
+    _instances = weakref.WeakSet()
+
+    def __init__(self, filename=FILENAME):
+        super().__init__(filename)
+        self._cached_values = {}
+        SerializerMemory._instances.add(self)
+
+    @classmethod
+    def get_instances(cls):
+        return list(cls._instances)
+
+    def _commit_delayed_write(self):
+        self._set_not_dirty()
+
+    def reload(self):
+        pass
+
+    def _read_stored_values(self):
+        # values are stored only in cache
+        return dict(self._cached_values)
+
+    def write_default_values_from_model(self, default_values):
+        for field in default_values:
+            full_name = self._path_to_str(field.path)
+            if full_name not in self._cached_values:
+                self._cached_values[full_name] = self.CachedValue(field.path, field.value, False)
+        self._hash_tree = None
+
+    def get_snapshot(self):
+        """
+        Get copy of all values, which can be restored by restore_snapshot()
+        """
+        return dict((full_name, (cached_value.path, cached_value.value)) for full_name, cached_value in self._cached_values.items())
+
+    def restore_snapshot(self, snapshot):
+        """
+        Restore values of get_snapshot(), change listeners are notified about changed values
+        """
+        for full_name in list(self._cached_values):
+            if full_name not in snapshot:
+                del self._cached_values[full_name]
+        self._hash_tree = None
+        self._set_not_dirty()
+        for full_name, (path, value) in snapshot.items():
+            cached_value = self._cached_values.get(full_name)
+            if cached_value is None:
+                self._cached_values[full_name] = self.CachedValue(path, value, False)
+            elif type(cached_value.value) is type(value) and cached_value.value == value:
+                continue
+            else:
+                cached_value.value = value
+            self._notify_change(path, value)
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+import bisect
+import threading
+import weakref
+from collections import Counter
+
+from configmodel.ProfilingHooks import ProfilingHooks
+
+
+class SerializerMetrics(ProfilingHooks.Hook):
+    """
+    Metrics of a serializer: reads and writes per path, commits, bytes written, commit and load latency
+    and restarts of the delayed write timer.
+
+    Metrics are collected only if SerializersFactory.metrics_enabled is set before config models are initialized.
+    Metrics are then a hook of the serializer called by wrappers of ProfilingHooks, so serializers without metrics
+    don't pay anything for them.
+    """
+
+    class Histogram:
+        """
+        Histogram of durations in seconds with fixed buckets (upper bounds, like Prometheus histograms)
+        """
+        DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+        def __init__(self, buckets=DEFAULT_BUCKETS):
+            self.buckets = tuple(buckets)
+            # the last count is for values greater than all buckets
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+        def observe(self, value):
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+        def get_cumulative_counts(self):
+            """
+            Get list of (upper bound, number of values less than or equal to the bound), the last bound is infinity
+            """
+            cumulative_counts = []
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+                total += count
+                cumulative_counts.append((bound, total))
+            return cumulative_counts
+
+        def copy(self):
+            histogram = SerializerMetrics.Histogram(self.buckets)
+            histogram.counts = list(self.counts)
+            histogram.sum = self.sum
+            histogram.count = self.count
+            return histogram
+
+        def __repr__(self):
+            return f"Histogram(count={self.count}, sum={self.sum:.6f})"
+
+    class Stats:
+        """
+        Snapshot of metrics returned by ConfigModel.stats()
+        """
+        def __init__(self, filename, reads, writes, commits, bytes_written, reloads, timer_restarts, commit_latency, load_latency):
+            self.filename = filename
+            # {dotted path: count}
+            self.reads = reads
+            self.writes = writes
+            self.commits = commits
+            self.bytes_written = bytes_written
+            self.reloads = reloads
+            self.timer_restarts = timer_restarts
+            self.commit_latency = commit_latency
+            self.load_latency = load_latency
+
+        def __repr__(self):
+            return (f"Stats({self.filename!r}, reads={sum(self.reads.values())}, writes={sum(self.writes.values())}, "
+                    f"commits={self.commits}, bytes_written={self.bytes_written})")
+
+        def to_prometheus(self):
+            """
+            Format metrics in Prometheus text exposition format
+            """
+            return SerializerMetrics.format_prometheus([self])
+
+    # metrics of all serializers, used by format_prometheus()
+    _instances = weakref.WeakSet()
+
+    def __init__(self, filename):
+        self.filename = str(filename)
+        # {tuple of path: count}
+        self.reads = Counter()
+        self.writes = Counter()
+        self.commits = 0
+        self.bytes_written = 0
+        self.reloads = 0
+        self.timer_restarts = 0
+        self.commit_latency = self.Histogram()
+        self.load_latency = self.Histogram()
+        self._lock = threading.Lock()
+        # weak reference to the serializer, set by attach()
+        self._serializer = None
+
+    @classmethod
+    def attach(cls, serializer):
+        """
+        Start collecting metrics of serializer, returns metrics already attached to it
+        """
+        if serializer._metrics is None:
+            metrics = cls(serializer.filename)
+            metrics._serializer = weakref.ref(serializer)
+            serializer._metrics = metrics
+            ProfilingHooks.attach(serializer, metrics)
+            cls._instances.add(metrics)
+        return serializer._metrics
+
+    def before(self, event):
+        operation = event.operation
+        if operation == ProfilingHooks.GET_VALUE:
+            with self._lock:
+                self.reads[tuple(event.path)] += 1
+        elif operation == ProfilingHooks.SET_VALUE or operation == ProfilingHooks.ASET_VALUE:
+            with self._lock:
+                self.writes[tuple(event.path)] += 1
+        elif operation == ProfilingHooks.SET_VALUES:
+            with self._lock:
+                self.writes.update(tuple(path) for path, _ in event.values)
+        elif operation == ProfilingHooks.RESTART_TIMER:
+            # only restarts of a pending timer are counted, not creation of a new one
+            serializer = self._serializer()
+            if serializer is not None and serializer._timer is not None:
+                with self._lock:
+                    self.timer_restarts += 1
+
+    def after(self, event):
+        if event.error is not None:
+            return
+        operation = event.operation
+        if operation == ProfilingHooks.COMMIT:
+            with self._lock:
+                self.commits += 1
+                self.commit_latency.observe(event.duration)
+        elif operation == ProfilingHooks.RELOAD:
+            with self._lock:
+                self.reloads += 1
+                self.load_latency.observe(event.duration)
+        elif operation == ProfilingHooks.WRITE_DEFAULT_VALUES:
+            with self._lock:
+                self.load_latency.observe(event.duration)
+
+    def add_bytes_written(self, size):
+        """
+        Called by serializers after writing to storage
+        """
+        with self._lock:
+            self.bytes_written += size
+
+    def get_stats(self, path=None):
+        """
+        Get snapshot of metrics. Reads and writes can be limited to values under path (of a nested model).
+        """
+        prefix = tuple(path or ())
+
+        def _filter(counter):
+            return {".".join(value_path): count for value_path, count in counter.items() if value_path[:len(prefix)] == prefix}
+
+        with self._lock:
+            return self.Stats(self.filename, _filter(self.reads), _filter(self.writes), self.commits, self.bytes_written,
+                              self.reloads, self.timer_restarts, self.commit_latency.copy(), self.load_latency.copy())
+
+    @classmethod
+    def get_all_stats(cls):
+        """
+        Get snapshots of metrics of all serializers
+        """
+        return [metrics.get_stats() for metrics in list(cls._instances)]
+
+    @staticmethod
+    def _format_labels(**labels):
+        def _escape(value):
+            return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+    @classmethod
+    def format_prometheus(cls, stats_list=None):
+        """
+        Format list of Stats (metrics of all serializers by default) in Prometheus text exposition format
+        """
+        if stats_list is None:
+            stats_list = cls.get_all_stats()
+        lines = []
+
+        def _add_metric(name, metric_type, description, samples):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples)
+
+        def _counter_samples(name, attribute):
+            return [f"{name}{cls._format_labels(file=stats.filename)} {getattr(stats, attribute)}" for stats in stats_list]
+
+        def _path_samples(name, attribute):
+            return [f"{name}{cls._format_labels(file=stats.filename, path=path)} {count}"
+                    for stats in stats_list for path, count in sorted(getattr(stats, attribute).items())]
+
+        def _histogram_samples(name, attribute):
+            samples = []
+            for stats in stats_list:
+                histogram = getattr(stats, attribute)
+                for bound, count in histogram.get_cumulative_counts():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    samples.append(f"{name}_bucket{cls._format_labels(file=stats.filename, le=le)} {count}")
+                samples.append(f"{name}_sum{cls._format_labels(file=stats.filename)} {histogram.sum!r}")
+                samples.append(f"{name}_count{cls._format_labels(file=stats.filename)} {histogram.count}")
+            return samples
+
+        _add_metric("configmodel_reads_total", "counter", "Number of values read by path",
+                    _path_samples("configmodel_reads_total", "reads"))
+        _add_metric("configmodel_writes_total", "counter", "Number of values written by path",
+                    _path_samples("configmodel_writes_total", "writes"))
+        _add_metric("configmodel_commits_total", "counter", "Number of commits to storage",
+                    _counter_samples("configmodel_commits_total", "commits"))
+        _add_metric("configmodel_written_bytes_total", "counter", "Number of bytes written to storage",
+                    _counter_samples("configmodel_written_bytes_total", "bytes_written"))
+        _add_metric("configmodel_reloads_total", "counter", "Number of reloads from storage",
+                    _counter_samples("configmodel_reloads_total", "reloads"))
+        _add_metric("configmodel_timer_restarts_total", "counter", "Number of restarts of the delayed write timer",
+                    _counter_samples("configmodel_timer_restarts_total", "timer_restarts"))
+        _add_metric("configmodel_commit_duration_seconds", "histogram", "Duration of commits",
+                    _histogram_samples("configmodel_commit_duration_seconds", "commit_latency"))
+        _add_metric("configmodel_load_duration_seconds", "histogram", "Duration of loads and reloads",
+                    _histogram_samples("configmodel_load_duration_seconds", "load_latency"))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import os
+
+from configmodel.Logger import logger
+from configmodel.SerializerCachedBase import SerializerCachedBase
+
+
+class SerializerNestedBase(SerializerCachedBase):
+    """
+    Base class for serializers of formats with nested objects (JSON, TOML).
+    Nested objects are mapped to paths of ConfigModel, e.g. {"photos_api": {"client_id": 1}} -> photos_api.client_id.
+    Values keep their native types, lists are stored as single values.
+    Derived classes implement _load_data() and _dump_data().
+    """
+
+    def _load_data(self):
+        """
+        Parse the whole file to nested dictionaries. Missing file is treated as empty.
+        """
+        raise NotImplementedError()
+
+    def _dump_data(self, data):
+        """
+        Write nested dictionaries to the file
+        """
+        raise NotImplementedError()
+
+    def _write_data(self, data):
+        """
+        Write nested dictionaries to the file and count written bytes
+        """
+        self._dump_data(data)
+        if self._metrics is not None:
+            self._metrics.add_bytes_written(os.path.getsize(self.filename))
+
+    @classmethod
+    def _read_cached_values(cls, data, path=None, cached_values=None):
+        """
+        Flatten nested dictionaries to cached values
+        """
+        if cached_values is None:
+            cached_values = {}
+        for key, value in data.items():
+            value_path = (path or []) + [key]
+            if isinstance(value, dict):
+                cls._read_cached_values(value, value_path, cached_values)
+            else:
+                cached_values[cls._path_to_str(value_path)] = cls.CachedValue(value_path, value, False)
+        return cached_values
+
+    @staticmethod
+    def _has_value(data, path):
+        for key in path:
+            if not isinstance(data, dict) or key not in data:
+                return False
+            data = data[key]
+        return not isinstance(data, dict)
+
+    @staticmethod
+    def _set_data_value(data, path, value):
+        """
+        Set value in nested dictionaries, missing dictionaries are created
+        """
+        for key in path[:-1]:
+            data = data.setdefault(key, {})
+            if not isinstance(data, dict):
+                raise Exception(f"Can't set value of '{'.'.join(path)}', '{key}' is not an object")
+        if isinstance(data.get(path[-1]), dict):
+            raise Exception(f"Can't set value of '{'.'.join(path)}', it is an object")
+        data[path[-1]] = value
+
+    def _commit_delayed_write(self):
+        """
+        Write cached values to the file
+        """
+        with self._committing_dirty_values() as dirty_values:
+            logger.debug("Writing cached values to file: %s", self.filename)
+            # values could be changed by other processes, so the file is read again
+            data = self._load_data()
+            # copy items, values could be added from other threads while writing
+            for full_name, cached_value in list(self._cached_values.items()):
+                # write value if it is dirty, also write value if it is not in the file
+                if full_name in dirty_values:
+                    self._set_data_value(data, cached_value.path, dirty_values[full_name])
+                elif not self._has_value(data, cached_value.path):
+                    self._set_data_value(data, cached_value.path, cached_value.value)
+            self._write_data(data)
+
+    def _read_stored_values(self):
+        return self._read_cached_values(self._load_data())
+
+    def reload(self):
+        """
+        Read values changed in the file by other processes.
+        Values changed by the application, but not written yet, are preserved.
+        """
+        self._merge_reloaded_values(self._read_stored_values())
+
+    def write_default_values_from_model(self, default_values):
+        """
+        Write default values to the file, if they are not already set
+        """
+        is_new_file = not os.path.exists(self.filename)
+        if is_new_file:
+            logger.debug("Creating new configuration file: %s", self.filename)
+        data = self._load_data()
+        # read all values from the file to cache
+        cached_values = self._read_cached_values(data)
+        has_changes = False
+        for field in default_values:
+            full_name = self._path_to_str(field.path)
+            if full_name not in cached_values:
+                logger.debug("Writing default value of field '%s' to '%s'", field.path, field.value)
+                self._set_data_value(data, field.path, field.value)
+                cached_values[full_name] = self.CachedValue(field.path, field.value, False)
+                has_changes = True
+        # write file (only if something has changed)
+        if has_changes or is_new_file:
+            self._write_data(data)
+        self.assign_cached_values(cached_values)
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+import atexit
+import hashlib
+import os
+import time
+
+from configmodel.ConfigDiff import ConfigDiff
+from configmodel.Logger import logger
+from configmodel.SerializerBase import SerializerBase
+from configmodel.SharedConfigSegment import SharedConfigSegment
+
+
+class SerializerSharedMemory(SerializerBase):
+    """
+    Shares values of a config file between processes (e.g. workers of a pre-fork server).
+
+    The first process using the file becomes the writer: it reads and writes the file by its own serializer
+    and publishes all values to a shared memory segment after every change.
+    Other processes (and processes forked from the writer) are readers: they don't parse the file,
+    values are read from the last published snapshot. New snapshots are detected by a single integer check
+    of the generation counter, snapshot is decoded only once per generation.
+    Values can be changed only in the writer process.
+
+    If the writer is killed, a reader takes over when it changes a value, or when it can't read a snapshot
+    the writer didn't finish publishing. New serializers take over the segment of a dead writer immediately.
+    Readers which only read check the writer and the segment every WRITER_CHECK_INTERVAL seconds,
+    so they attach to the segment of a new writer (or become the writer) if the old writer was killed.
+    """
+    SEGMENT_NAME_PREFIX = "configmodel_"
+    WRITER_CHECK_INTERVAL = 1.0
+
+    def __init__(self, filename, serializer_class, segment_size=SharedConfigSegment.DEFAULT_SIZE):
+        super().__init__(filename)
+        self._segment_name = self.get_segment_name(filename)
+        self._serializer_class = serializer_class
+        self._segment_size = segment_size
+        # serializer of the file, used only by the writer
+        self._serializer = None
+        self._segment = None
+        # {full name: (path, value)} of the last snapshot read by this process
+        self._values = {}
+        self._generation = 0
+        # time.monotonic() of the next check of the writer by a reader
+        self._next_writer_check = 0.0
+        # {full name: (path, value)} of default values of the model, used by readers for values not published by the writer
+        self._default_values = {}
+        self._connect()
+
+    @classmethod
+    def get_segment_name(cls, filename):
+        """
+        Get name of shared memory segment of a file, the same in all processes
+        """
+        file_hash = hashlib.blake2b(os.path.abspath(filename).encode("utf-8"), digest_size=8).hexdigest()
+        return cls.SEGMENT_NAME_PREFIX + file_hash
+
+    @property
+    def is_writer(self):
+        return self._serializer is not None and self._segment.is_owner
+
+    def _connect(self):
+        """
+        Attach to the segment as a reader, or become the writer if there is no segment or its writer is dead
+        """
+        deadline = time.monotonic() + SharedConfigSegment.READ_TIMEOUT
+        while True:
+            try:
+                segment = SharedConfigSegment.attach(self._segment_name)
+            except FileNotFoundError:
+                segment = None
+            if segment is not None and segment.is_writer_alive():
+                logger.debug("Reading config values from shared memory segment '%s': %s", self._segment_name, self.filename)
+                self._segment = segment
+                return
+            if segment is not None:
+                segment.close()
+            if self._become_writer():
+                return
+            # another process is becoming the writer
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No process publishes config values to shared memory segment '{self._segment_name}'")
+            time.sleep(0.001)
+
+    def _become_writer(self):
+        """
+        Create the segment, or take over the segment of a dead writer.
+        Returns False if another process holds the writer lock.
+        """
+        if not SharedConfigSegment.acquire_writer_lock(self._segment_name):
+            return False
+        try:
+            try:
+                segment = SharedConfigSegment.attach(self._segment_name)
+            except FileNotFoundError:
+                # no segment, or it was removed after the writer was killed (e.g. by its resource tracker)
+                segment = SharedConfigSegment.create(self._segment_name, self._segment_size)
+                logger.debug("Publishing config values to shared memory segment '%s': %s", self._segment_name, self.filename)
+            else:
+                if not SharedConfigSegment.TAKEOVER_SUPPORTED:
+                    segment.close()
+                    SharedConfigSegment.release_writer_lock(self._segment_name)
+                    return False
+                logger.warning("Writer %d of shared memory segment '%s' is dead, publishing config values: %s",
+                               segment.writer_pid, self._segment_name, self.filename)
+                segment.take_over()
+        except BaseException:
+            SharedConfigSegment.release_writer_lock(self._segment_name)
+            raise
+        self._segment = segment
+        self._serializer = self._serializer_class(self.filename)
+        self._serializer.add_change_listener(self._on_serializer_change)
+        atexit.register(segment.close)
+        if self._default_values:
+            # the model was initialized while this process was a reader
+            self._serializer.write_default_values_from_model(
+                [SerializerBase.FieldDefaultValue(path, value) for path, value in self._default_values.values()])
+        if self._default_values or segment.generation != 0:
+            self._publish()
+        return True
+
+    def _reconnect(self):
+        """
+        Connect again after the writer was killed: take over the segment, or read the segment of the new writer
+        """
+        old_segment = self._segment
+        self._connect()
+        if self._segment is not old_segment:
+            old_segment.close()
+            if not self.is_writer:
+                self._generation = 0
+
+    def _publish(self):
+        values = {}
+        for path, value in self._serializer.get_hash_tree().iter_values():
+            values[".".join(path)] = (path, value)
+        self._generation = self._segment.publish(values)
+        self._values = values
+
+    def _on_serializer_change(self, change):
+        self._notify_change(change.path, change.value)
+
+    def _check_generation(self):
+        """
+        Read the last snapshot if a new one was published, notify change listeners about changed values
+        """
+        if self._segment.generation == self._generation:
+            now = time.monotonic()
+            if now < self._next_writer_check:
+                return
+            self._next_writer_check = now + self.WRITER_CHECK_INTERVAL
+            if self._segment.is_current():
+                return
+            logger.warning("Writer of shared memory segment '%s' is dead or the segment was removed, reconnecting",
+                           self._segment_name)
+            self._reconnect()
+            if self.is_writer or self._segment.generation == self._generation:
+                return
+        try:
+            generation, values = self._segment.read()
+        except TimeoutError:
+            logger.warning("Snapshot of shared memory segment '%s' is not complete, checking the writer", self._segment_name)
+            self._reconnect()
+            if self.is_writer:
+                return
+            try:
+                generation, values = self._segment.read()
+            except TimeoutError:
+                # the writer is alive, but doesn't finish publishing, values of the last snapshot are used
+                logger.warning("Writer %d of shared memory segment '%s' doesn't finish publishing",
+                               self._segment.writer_pid, self._segment_name)
+                return
+        if values is None:
+            return
+        old_values = self._values
+        self._values = values
+        self._generation = generation
+        if not self._change_listeners:
+            return
+        for full_name, (path, value) in values.items():
+            old_value = old_values.get(full_name)
+            if old_value is None or old_value[1] != value:
+                self._notify_change(path, value)
+
+    def _check_writer(self):
+        if not self.is_writer and not self._segment.is_writer_alive():
+            self._reconnect()
+        if not self.is_writer:
+            raise Exception(f"Config values of '{self.filename}' can be changed only in the process which publishes them "
+                            f"(shared memory segment '{self._segment.name}')")
+
+    def get_value(self, path):
+        if not path:
+            raise ValueError("Parameter path is empty. This is likely a bug in ConfigModel. Please report it.")
+        if not self.is_writer:
+            # a reader could become the writer if the writer was killed
+            self._check_generation()
+        if self.is_writer:
+            return self._serializer.get_value(path)
+        full_name = ".".join(path)
+        path_value = self._values.get(full_name) or self._default_values.get(full_name)
+        if path_value is None:
+            return None
+        return path_value[1]
+
+    def set_value(self, path, value):
+        self._check_writer()
+        self._serializer.set_value(path, value)
+        self._publish()
+
+    def set_values(self, values):
+        self._check_writer()
+        self._serializer.set_values(values)
+        self._publish()
+
+    def flush(self):
+        if self.is_writer:
+            self._serializer.flush()
+
+    def reload(self):
+        if self.is_writer:
+            self._serializer.reload()
+            self._publish()
+        else:
+            self._check_generation()
+
+    def get_hash_tree(self):
+        if not self.is_writer:
+            self._check_generation()
+        if self.is_writer:
+            return self._serializer.get_hash_tree()
+        values = dict(self._default_values)
+        values.update(self._values)
+        return ConfigDiff.build_tree(values.values())
+
+    def write_default_values_from_model(self, default_values):
+        for default_value in default_values:
+            self._default_values[".".join(default_value.path)] = (default_value.path, default_value.value)
+        if self.is_writer:
+            self._serializer.write_default_values_from_model(default_values)
+            self._publish()
+        else:
+            self._check_generation()
+
+    def read_values_from_model(self, default_values, stored_values=None):
+        for default_value in default_values:
+            self._default_values[".".join(default_value.path)] = (default_value.path, default_value.value)
+        if self.is_writer:
+            self._serializer.read_values_from_model(default_values, stored_values)
+            self._publish()
+        else:
+            self._check_generation()
+
+    def close(self):
+        """
+        Detach from shared memory segment, the writer also removes the segment
+        """
+        self._segment.close()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import sqlite3
+import threading
+
+from configmodel.Logger import logger
+from configmodel.SerializerCachedBase import SerializerCachedBase
+
+
+class SerializerSqlite(SerializerCachedBase):
+    """
+    Stores values in SQLite database, one row per path.
+    The database is used in WAL mode, so multiple processes can read and write it concurrently.
+    Commit writes only changed values in a single transaction.
+    """
+    TABLE_NAME = "config_values"
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self._connection = None
+        # connection is used from timer threads too
+        self._connection_lock = threading.Lock()
+
+    def _get_connection(self):
+        """
+        Open database and create the table, if it doesn't exist
+        """
+        if self._connection is None:
+            # transactions are started explicitly
+            self._connection = sqlite3.connect(self.filename, isolation_level=None, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(f"CREATE TABLE IF NOT EXISTS {self.TABLE_NAME} (path TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return self._connection
+
+    def _read_cached_values(self):
+        """
+        Read all rows to cached values
+        """
+        cached_values = {}
+        for full_name, value in self._get_connection().execute(f"SELECT path, value FROM {self.TABLE_NAME}"):
+            cached_values[full_name] = self.CachedValue(full_name.split("."), value, False)
+        return cached_values
+
+    @contextlib.contextmanager
+    def _immediate_transaction(self):
+        """
+        Transaction holding the write lock of the database from the start, so other processes can't write
+        values read in the transaction
+        """
+        connection = self._get_connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _insert_rows(self, connection, rows, overwrite=True):
+        """
+        Write list of (path string, value) in the current transaction
+        """
+        if overwrite:
+            statement = f"INSERT INTO {self.TABLE_NAME} (path, value) VALUES (?, ?) ON CONFLICT(path) DO UPDATE SET value = excluded.value"
+        else:
+            statement = f"INSERT OR IGNORE INTO {self.TABLE_NAME} (path, value) VALUES (?, ?)"
+        connection.executemany(statement, rows)
+        if self._metrics is not None:
+            self._metrics.add_bytes_written(sum(len(full_name.encode()) + len(value.encode()) for full_name, value in rows))
+
+    def _write_rows(self, rows):
+        """
+        Write list of (path string, value) in a single transaction
+        """
+        with self._immediate_transaction() as connection:
+            self._insert_rows(connection, rows)
+
+    def _commit_delayed_write(self):
+        """
+        Write changed values to database
+        """
+        with self._committing_dirty_values() as dirty_values:
+            rows = [(full_name, str(value)) for full_name, value in dirty_values.items()]
+            logger.debug("Writing %d changed values to database: %s", len(rows), self.filename)
+            with self._connection_lock:
+                self._write_rows(rows)
+
+    def _read_stored_values(self):
+        with self._connection_lock:
+            return self._read_cached_values()
+
+    def reload(self):
+        """
+        Read values changed in database by other processes.
+        Values changed by the application, but not written yet, are preserved.
+        """
+        self._merge_reloaded_values(self._read_stored_values())
+
+    def write_default_values_from_model(self, default_values):
+        """
+        Write default values to database, if they are not already set
+        """
+        # values are read and missing values are written in one transaction, so another process can't write
+        # the same values in between and values of the database are always cached
+        with self._connection_lock, self._immediate_transaction() as connection:
+            cached_values = self._read_cached_values()
+            rows = []
+            for field in default_values:
+                full_name = self._path_to_str(field.path)
+                if full_name not in cached_values:
+                    logger.debug("Writing default value of field '%s' to '%s'", field.path, field.value)
+                    rows.append((full_name, str(field.value)))
+                    cached_values[full_name] = self.CachedValue(field.path, field.value, False)
+            if rows:
+                self._insert_rows(connection, rows, overwrite=False)
+        self.assign_cached_values(cached_values)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+import math
+import re
+import sys
+
+from configmodel.SerializerNestedBase import SerializerNestedBase
+
+if sys.version_info[:2] >= (3, 11):
+    import tomllib
+else:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+class SerializerToml(SerializerNestedBase):
+    """
+    Stores values in TOML file, tables are mapped to nested config models.
+    Files are read by tomllib (tomli before Python 3.11), written by a minimal writer.
+    Comments are not preserved when the file is written.
+    """
+    _BARE_KEY_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+    def _load_data(self):
+        if tomllib is None:
+            raise ImportError("Reading TOML files requires Python 3.11 or package 'tomli'")
+        try:
+            with open(self.filename, "rb") as config_file:
+                return tomllib.load(config_file)
+        except FileNotFoundError:
+            return {}
+
+    def _dump_data(self, data):
+        with open(self.filename, "w", encoding="utf-8") as config_file:
+            config_file.write(self.dumps(data))
+
+    @classmethod
+    def dumps(cls, data):
+        """
+        Format nested dictionaries as TOML document
+        """
+        lines = []
+        cls._format_table(data, [], lines)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    @classmethod
+    def _format_table(cls, data, path, lines):
+        tables = []
+        for key, value in data.items():
+            if isinstance(value, dict):
+                tables.append((key, value))
+            else:
+                lines.append(f"{cls.format_key(key)} = {cls.format_value(value)}")
+        for key, value in tables:
+            table_path = path + [key]
+            # header of a table containing only tables is optional
+            if not value or any(not isinstance(item, dict) for item in value.values()):
+                if lines:
+                    lines.append("")
+                lines.append("[" + ".".join(cls.format_key(item) for item in table_path) + "]")
+            cls._format_table(value, table_path, lines)
+
+    @classmethod
+    def format_key(cls, key):
+        key = str(key)
+        if cls._BARE_KEY_RE.match(key):
+            return key
+        return cls._format_string(key)
+
+    @staticmethod
+    def _format_string(value):
+        # JSON escapes are a subset of TOML basic string escapes, except DEL which must be escaped in TOML
+        return json.dumps(value, ensure_ascii=False).replace("\x7f", "\\u007f")
+
+    @classmethod
+    def format_value(cls, value):
+        """
+        Format value as TOML, unsupported types are written as strings
+        """
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, int):
+            return str(value)
+        if isinstance(value, float):
+            if math.isnan(value):
+                return "nan"
+            if math.isinf(value):
+                return "inf" if value > 0 else "-inf"
+            return repr(value)
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, (list, tuple)):
+            return "[" + ", ".join(cls.format_value(item) for item in value) + "]"
+        if isinstance(value, dict):
+            return "{" + ", ".join(f"{cls.format_key(key)} = {cls.format_value(item)}" for key, item in value.items()) + "}"
+        return cls._format_string(str(value))
@@ -1,35 +1,153 @@
 # -*- coding: utf-8 -*-
-
-from configmodel.SerializerIni import SerializerIni
+import importlib
+import os
+import sys
+import threading
+import weakref
 
 
 class SerializersFactory:
 
+    # serializer classes by names of their modules (in configmodel package), modules are imported only when used
     SUPPORTED_SERIALIZERS = [
-        [SerializerIni, [".ini"]]
+        ["SerializerIni", [".ini"]],
+        ["SerializerSqlite", [".sqlite", ".db"]],
+        ["SerializerJson", [".json"]],
+        ["SerializerToml", [".toml"]],
+        ["SerializerClient", [".sock"]],
+        ["SerializerDirectory", [".d"]],
+        ["SerializerMemory", [":memory:"]],
     ]
 
+    # Serializers of other packages are registered in this entry point group, names of entry points are extensions
+    # (e.g. "yaml = mypackage.SerializerYaml:SerializerYaml"). Plugins are looked up only for unknown extensions.
+    ENTRY_POINT_GROUP = "configmodel.serializers"
+
+    # Share values of config files between processes using shared memory (see SerializerSharedMemory).
+    # Must be set before config models are initialized.
+    shared_memory_enabled = False
+
+    # Keep values of all config files only in memory, files are not read or written (see configmodel.pytest_plugin)
+    memory_only = False
+
+    # Collect metrics of serializers used by config models (see ConfigModel.stats() and SerializerMetrics).
+    # Must be set before config models are initialized.
+    metrics_enabled = False
+
+    # {extension: serializer class, its name or entry point}, built on first use
+    _serializers_by_extension = None
+    _plugins_loaded = False
+    # serializers shared by all models using the same file {absolute path: serializer}
+    _shared_serializers = weakref.WeakValueDictionary()
+    _lock = threading.RLock()
+
+    @classmethod
+    def _get_serializers_by_extension(cls):
+        if cls._serializers_by_extension is None:
+            serializers_by_extension = {}
+            for serializer_class, extensions in cls.SUPPORTED_SERIALIZERS:
+                for extension in extensions:
+                    serializers_by_extension[extension] = serializer_class
+            cls._serializers_by_extension = serializers_by_extension
+        return cls._serializers_by_extension
+
+    @staticmethod
+    def _import_serializer(name):
+        """
+        Import serializer class from configmodel module of the same name
+        """
+        return getattr(importlib.import_module("configmodel." + name), name)
+
+    @classmethod
+    def register_serializer(cls, serializer_class, extensions):
+        """
+        Register serializer class for extensions (e.g. [".ini"]), replaces serializers already registered for them
+        """
+        with cls._lock:
+            serializers_by_extension = cls._get_serializers_by_extension()
+            for extension in extensions:
+                serializers_by_extension[extension] = serializer_class
+
+    @classmethod
+    def _load_plugins(cls):
+        """
+        Find serializers registered by other packages, they are not imported until used
+        """
+        if sys.version_info[:2] >= (3, 8):
+            from importlib.metadata import entry_points  # pragma: no cover
+        else:
+            from importlib_metadata import entry_points  # pragma: no cover
+        all_entry_points = entry_points()
+        if hasattr(all_entry_points, "select"):
+            plugin_entry_points = all_entry_points.select(group=cls.ENTRY_POINT_GROUP)
+        else:
+            plugin_entry_points = all_entry_points.get(cls.ENTRY_POINT_GROUP, [])
+        serializers_by_extension = cls._get_serializers_by_extension()
+        for entry_point in plugin_entry_points:
+            extension = "." + entry_point.name.lstrip(".")
+            # built-in serializers and serializers registered by the application have priority
+            serializers_by_extension.setdefault(extension, entry_point)
+        cls._plugins_loaded = True
+
+    @classmethod
+    def get_serializer_class(cls, filename):
+        """
+        Get serializer class by extension of filename, None if not supported
+        """
+        with cls._lock:
+            serializers_by_extension = cls._get_serializers_by_extension()
+            # extension, or the whole name for special names like ":memory:"
+            keys = (os.path.splitext(filename)[1], os.path.basename(filename))
+            while True:
+                for key in keys:
+                    serializer_class = serializers_by_extension.get(key)
+                    if serializer_class is not None:
+                        if isinstance(serializer_class, str):
+                            serializer_class = serializers_by_extension[key] = cls._import_serializer(serializer_class)
+                        elif not isinstance(serializer_class, type):
+                            # entry point of a plugin
+                            serializer_class = serializers_by_extension[key] = serializer_class.load()
+                        return serializer_class
+                if cls._plugins_loaded:
+                    return None
+                cls._load_plugins()
+
     @classmethod
     def get_all_supported_extensions(cls):
         """
         Get all supported extensions
         """
-        extensions = []
-        for serializer in cls.SUPPORTED_SERIALIZERS:
-            extensions += serializer[1]
-        return extensions
+        with cls._lock:
+            if not cls._plugins_loaded:
+                cls._load_plugins()
+            return list(cls._get_serializers_by_extension())
 
     @classmethod
     def get_serializer_by_filename(cls, filename):
         """
-        Get serializer by filename
+        Get serializer by filename.
+        All models using the same file share the same serializer (unless serializer_class.shared_by_filename is False).
         """
-        for serializer in cls.SUPPORTED_SERIALIZERS:
-            for extension in serializer[1]:
-                if filename.endswith(extension):
-                    return serializer[0](filename)
-        else:
+        if cls.memory_only:
+            return cls._import_serializer("SerializerMemory")(filename)
+        serializer_class = cls.get_serializer_class(filename)
+        if serializer_class is None:
             raise Exception("Unknown file extension for filename: %s. Supported extensions: %s" % (
                 filename,
                 ", ".join(["'%s'" % extension for extension in cls.get_all_supported_extensions()])
             ))
+        if not serializer_class.shared_by_filename:
+            return serializer_class(filename)
+        path = os.path.realpath(filename)
+        with cls._lock:
+            serializer = cls._shared_serializers.get(path)
+            if serializer is not None:
+                # the new model reads the file again, pending changes must be written first
+                serializer.flush()
+                return serializer
+            if cls.shared_memory_enabled:
+                serializer = cls._import_serializer("SerializerSharedMemory")(filename, serializer_class)
+            else:
+                serializer = serializer_class(filename)
+            cls._shared_serializers[path] = serializer
+            return serializer
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import shared_memory
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Windows, writers can't be taken over
+    fcntl = None
+
+
+class SharedConfigSegment:
+    """
+    Shared memory segment holding a snapshot of config values, published by a single writer process
+    and read by any number of processes.
+
+    The segment starts with a header (sequence, generation, data length, writer PID) followed by pickled values.
+    Readers detect a new snapshot by comparing the generation counter. Consistency of a copied snapshot
+    is verified by a seqlock: the sequence is odd while the writer changes the segment,
+    readers retry if the sequence was odd or changed while copying.
+
+    The writer holds a lock file (see acquire_writer_lock()), which is released by the system if the writer
+    is killed. Another process can then take over the segment. If the segment was removed meanwhile
+    (e.g. by the resource tracker of the killed writer), the new writer creates a new one and readers
+    of the removed segment must attach again (see is_current()).
+    """
+    DEFAULT_SIZE = 1024 * 1024
+    # readers give up if the writer doesn't finish publishing in this time (e.g. it was killed while writing)
+    READ_TIMEOUT = 1.0
+    LOCK_SUFFIX = ".lock"
+    # directory of POSIX shared memory objects, used to detect removed segments
+    SHM_DIRECTORY = "/dev/shm"
+    TAKEOVER_SUPPORTED = fcntl is not None
+
+    _HEADER = struct.Struct("<QQQQ")
+    _GENERATION_OFFSET = 8
+    _WRITER_PID_OFFSET = 24
+    # names of segments created by this process (or the process it was forked from),
+    # they share registration in the resource tracker with the owner
+    _created_names = set()
+    # {segment name: (pid, lock file)} of writer locks held by this process
+    _writer_locks = {}
+    _writer_locks_lock = threading.Lock()
+
+    def __init__(self, memory, is_owner):
+        self._memory = memory
+        # processes forked from the writer inherit the segment, but they don't own it
+        self._owner_pid = os.getpid() if is_owner else None
+        # only one thread of the writer process can publish at a time
+        self._publish_lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    @property
+    def size(self):
+        return self._memory.size
+
+    @property
+    def is_owner(self):
+        """
+        True in the process which created the segment, only this process can publish values
+        """
+        return self._owner_pid == os.getpid()
+
+    @classmethod
+    def create(cls, name, size=DEFAULT_SIZE):
+        """
+        Create a new segment, raises FileExistsError if it already exists
+        """
+        memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        cls._HEADER.pack_into(memory.buf, 0, 0, 0, 0, os.getpid())
+        cls._created_names.add(name)
+        return cls(memory, is_owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attach to an existing segment, raises FileNotFoundError if it doesn't exist
+        """
+        if sys.version_info[:2] >= (3, 13):
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            memory = shared_memory.SharedMemory(name=name)
+            if name not in cls._created_names:
+                # segment is owned by the writer, it must not be removed when this process exits
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(memory._name, "shared_memory")
+        return cls(memory, is_owner=False)
+
+    @classmethod
+    def acquire_writer_lock(cls, name):
+        """
+        Acquire lock of the writer of a segment, it is released by close() of the owner or when the writer exits
+        (or is killed). Returns False if the lock is held by another process or by another writer of this process.
+        """
+        with cls._writer_locks_lock:
+            held_lock = cls._writer_locks.get(name)
+            if held_lock is not None and held_lock[0] == os.getpid():
+                return False
+            lock_file = None
+            if fcntl is not None:
+                lock_file = open(os.path.join(tempfile.gettempdir(), name + cls.LOCK_SUFFIX), "ab")
+                try:
+                    # record locks are not inherited by forked processes, unlike flock()
+                    fcntl.lockf(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock_file.close()
+                    return False
+            cls._writer_locks[name] = (os.getpid(), lock_file)
+            return True
+
+    @classmethod
+    def release_writer_lock(cls, name):
+        with cls._writer_locks_lock:
+            held_lock = cls._writer_locks.get(name)
+            if held_lock is None or held_lock[0] != os.getpid():
+                return
+            del cls._writer_locks[name]
+        if held_lock[1] is not None:
+            held_lock[1].close()
+
+    @property
+    def writer_pid(self):
+        return struct.unpack_from("<Q", self._memory.buf, self._WRITER_PID_OFFSET)[0]
+
+    def is_writer_alive(self):
+        """
+        Check that the process which publishes values is running.
+        Always True if writers can't be taken over on this platform.
+        """
+        pid = self.writer_pid
+        if not self.TAKEOVER_SUPPORTED or pid == os.getpid():
+            return True
+        if pid == 0:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # process of another user
+            return True
+        return True
+
+    def is_current(self):
+        """
+        Check that the writer is alive and the segment was not removed, or replaced by a new segment of the same name.
+        Removed segments are detected only on systems with SHM_DIRECTORY (Linux).
+        """
+        if not self.is_writer_alive():
+            return False
+        file_descriptor = getattr(self._memory, "_fd", -1)
+        if file_descriptor < 0 or not os.path.isdir(self.SHM_DIRECTORY):
+            return True
+        try:
+            stat = os.stat(os.path.join(self.SHM_DIRECTORY, self.name))
+        except FileNotFoundError:
+            return False
+        own_stat = os.fstat(file_descriptor)
+        return (stat.st_dev, stat.st_ino) == (own_stat.st_dev, own_stat.st_ino)
+
+    def take_over(self):
+        """
+        Become the owner of a segment whose writer is dead, the caller must hold the writer lock.
+        A snapshot left incomplete by the dead writer stays invalid until the next publish().
+        """
+        struct.pack_into("<Q", self._memory.buf, self._WRITER_PID_OFFSET, os.getpid())
+        self._owner_pid = os.getpid()
+        if self.name not in self._created_names:
+            self._created_names.add(self.name)
+            if sys.version_info[:2] < (3, 13):
+                # unlink() by the owner unregisters the segment from the resource tracker
+                from multiprocessing import resource_tracker
+                resource_tracker.register(self._memory._name, "shared_memory")
+
+    @property
+    def generation(self):
+        """
+        Generation of the last published snapshot, 0 if nothing was published yet
+        """
+        return struct.unpack_from("<Q", self._memory.buf, self._GENERATION_OFFSET)[0]
+
+    def publish(self, values):
+        """
+        Publish new snapshot of values (any picklable object) and get its generation
+        """
+        if not self.is_owner:
+            raise Exception(f"Only the process which created shared memory segment '{self.name}' can publish values")
+        data = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._HEADER.size + len(data) > self._memory.size:
+            raise Exception(f"Config values ({len(data)} bytes) don't fit into shared memory segment "
+                            f"'{self.name}' ({self._memory.size} bytes)")
+        buf = self._memory.buf
+        with self._publish_lock:
+            sequence, generation, _, writer_pid = self._HEADER.unpack_from(buf, 0)
+            # odd sequence marks the segment as being written, it is already odd if the previous writer was killed meanwhile
+            sequence |= 1
+            self._HEADER.pack_into(buf, 0, sequence, generation, 0, writer_pid)
+            buf[self._HEADER.size:self._HEADER.size + len(data)] = data
+            generation += 1
+            self._HEADER.pack_into(buf, 0, sequence + 1, generation, len(data), writer_pid)
+        return generation
+
+    def read(self):
+        """
+        Get (generation, values) of the last published snapshot, values are None if nothing was published yet
+        """
+        buf = self._memory.buf
+        deadline = None
+        while True:
+            sequence, generation, length, _ = self._HEADER.unpack_from(buf, 0)
+            if sequence % 2 == 0:
+                data = bytes(buf[self._HEADER.size:self._HEADER.size + length])
+                if self._HEADER.unpack_from(buf, 0)[0] == sequence:
+                    break
+            # the writer is publishing right now
+            if deadline is None:
+                deadline = time.monotonic() + self.READ_TIMEOUT
+            elif time.monotonic() > deadline:
+                raise TimeoutError(f"Shared memory segment '{self.name}' is being written for too long")
+            time.sleep(0)
+        if generation == 0:
+            return 0, None
+        return generation, pickle.loads(data)
+
+    def close(self):
+        """
+        Detach from the segment, the writer also removes the segment
+        """
+        if self._memory is None:
+            return
+        memory = self._memory
+        self._memory = None
+        memory.close()
+        if self.is_owner:
+            memory.unlink()
+            self._created_names.discard(memory.name)
+            self.release_writer_lock(memory.name)
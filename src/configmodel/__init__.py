@@ -1,19 +1,25 @@
 import sys
 
-if sys.version_info[:2] >= (3, 8):
-    # TODO: Import directly (no need for conditional) when `python_requires = >= 3.8`
-    from importlib.metadata import PackageNotFoundError, version  # pragma: no cover
-else:
-    from importlib_metadata import PackageNotFoundError, version  # pragma: no cover
 
-try:
-    # Change here if project is renamed and does not equal the package name
-    dist_name = "ConfigModel"
-    __version__ = version(dist_name)
-except PackageNotFoundError:  # pragma: no cover
-    __version__ = "unknown"
-finally:
-    del version, PackageNotFoundError
+def __getattr__(name):
+    # version is looked up only when used, importlib.metadata is slow to import
+    if name == "__version__":
+        global __version__
+        if sys.version_info[:2] >= (3, 8):
+            # TODO: Import directly (no need for conditional) when `python_requires = >= 3.8`
+            from importlib.metadata import PackageNotFoundError, version  # pragma: no cover
+        else:
+            from importlib_metadata import PackageNotFoundError, version  # pragma: no cover
+
+        try:
+            # Change here if project is renamed and does not equal the package name
+            dist_name = "ConfigModel"
+            __version__ = version(dist_name)
+        except PackageNotFoundError:  # pragma: no cover
+            __version__ = "unknown"
+        return __version__
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # list submodules to be imported when using `from configmodel import *`
 from .ConfigModel import ConfigModel
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Offline tools for INI files of a config model: validate, migrate and dump whole directory trees.
+
+Usage:
+    python -m configmodel validate myapp.config:AppConfig /etc/myapp/tenants
+    python -m configmodel migrate myapp.config:AppConfig /etc/myapp/tenants --rename photos_api=photos --drop-unknown
+    python -m configmodel dump /etc/myapp/tenants > values.jsonl
+"""
+import argparse
+import json
+import logging
+import sys
+
+from configmodel.ConfigTool import ConfigTool
+from configmodel.Logger import logger
+
+
+def _parse_rename(value):
+    old_path, separator, new_path = value.partition("=")
+    if not separator or not old_path or not new_path:
+        raise argparse.ArgumentTypeError(f"rename must be given as old.path=new.path, got {value!r}")
+    return old_path, new_path
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m configmodel", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--verbose", action="store_true", help="print debug messages")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name, help_text, model_required=True):
+        command_parser = subparsers.add_parser(name, help=help_text)
+        if model_required:
+            command_parser.add_argument("model", help="config model class as module:Class")
+        else:
+            command_parser.add_argument("--model", help="config model class as module:Class")
+        command_parser.add_argument("paths", nargs="+", help="config files or directories searched recursively")
+        command_parser.add_argument("--pattern", default=ConfigTool.DEFAULT_PATTERN,
+                                    help=f"pattern of files in directories (default: {ConfigTool.DEFAULT_PATTERN})")
+        command_parser.add_argument("--workers", type=int, help="number of processes (default: number of CPUs)")
+        return command_parser
+
+    validate_parser = add_command("validate", "check values of files against the model")
+    validate_parser.add_argument("--require-all", action="store_true", help="report values missing in files")
+    migrate_parser = add_command("migrate", "rewrite files to match the model")
+    migrate_parser.add_argument("--rename", type=_parse_rename, action="append", default=[], metavar="OLD=NEW",
+                                help="move value or nested model (paths joined by dots), can be repeated")
+    migrate_parser.add_argument("--add-defaults", action="store_true", help="write default values missing in files")
+    migrate_parser.add_argument("--drop-unknown", action="store_true", help="remove values which are not fields of the model")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="print changes without writing files")
+    dump_parser = add_command("dump", "print values of files as JSON lines", model_required=False)
+    dump_parser.add_argument("--include-defaults", action="store_true", help="add default values of the model")
+
+    parsed_args = parser.parse_args(args)
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if parsed_args.verbose:
+        logger.setLevel(logging.DEBUG)
+
+    model_class = None
+    if parsed_args.model is not None:
+        try:
+            model_class = ConfigTool.import_model_class(parsed_args.model)
+        except (ImportError, AttributeError, ValueError) as e:
+            parser.error(f"can't import model {parsed_args.model}: {e}")
+    tool = ConfigTool(model_class, parsed_args.workers)
+    filenames = ConfigTool.find_files(parsed_args.paths, parsed_args.pattern)
+
+    if parsed_args.command == "validate":
+        results = tool.validate(filenames, require_all=parsed_args.require_all)
+    elif parsed_args.command == "migrate":
+        results = tool.migrate(filenames, renames=parsed_args.rename, add_defaults=parsed_args.add_defaults,
+                               drop_unknown=parsed_args.drop_unknown, dry_run=parsed_args.dry_run)
+    else:
+        results = tool.dump(filenames, include_defaults=parsed_args.include_defaults)
+
+    file_count = 0
+    failed_count = 0
+    changed_count = 0
+    # results are printed as soon as they are ready
+    for result in results:
+        file_count += 1
+        if result.error is not None:
+            failed_count += 1
+            print(f"{result.filename}: error: {result.error}", flush=True)
+        elif parsed_args.command == "dump":
+            print(json.dumps({"file": result.filename, "values": result.values}, default=str), flush=True)
+        elif result.problems:
+            failed_count += 1
+            for problem in result.problems:
+                print(f"{result.filename}: {problem}", flush=True)
+        elif result.changes:
+            changed_count += 1
+            for change in result.changes:
+                print(f"{result.filename}: {change}", flush=True)
+
+    if parsed_args.command == "validate":
+        print(f"{file_count} files validated, {failed_count} invalid", file=sys.stderr)
+    elif parsed_args.command == "migrate":
+        verb = "would be changed" if parsed_args.dry_run else "changed"
+        print(f"{file_count} files migrated, {changed_count} {verb}, {failed_count} failed", file=sys.stderr)
+    elif failed_count:
+        print(f"{failed_count} of {file_count} files failed", file=sys.stderr)
+    return 1 if failed_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Pytest plugin for tests of applications using ConfigModel.
+
+With ``--configmodel-memory`` option (or ``configmodel_memory = true`` in pytest configuration)
+all config models, including models decorated by @config_file, keep values only in memory,
+so tests don't read or write config files and can run in parallel.
+Values changed by a test are restored after the test. Without the option the plugin doesn't affect tests.
+
+The ``configmodel_memory`` fixture keeps models created by a single test in memory.
+"""
+import contextlib
+
+import pytest
+
+from configmodel.SerializerMemory import SerializerMemory
+from configmodel.SerializersFactory import SerializersFactory
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("configmodel")
+    group.addoption("--configmodel-memory", action="store_true", default=None,
+                    help="keep values of config models in memory instead of config files")
+    parser.addini("configmodel_memory", type="bool", default=False,
+                  help="keep values of config models in memory instead of config files")
+
+
+# value of SerializersFactory.memory_only before the option enabled it
+_previous_memory_only_key = pytest.StashKey[bool]()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_load_initial_conftests(early_config, parser, args):
+    # conftest.py files could import modules with decorated config models
+    option = early_config.known_args_namespace.configmodel_memory
+    if option or (option is None and early_config.getini("configmodel_memory")):
+        early_config.stash[_previous_memory_only_key] = SerializersFactory.memory_only
+        SerializersFactory.memory_only = True
+
+
+def pytest_configure(config):
+    if _previous_memory_only_key in config.stash:
+        config.pluginmanager.register(_RestoreValuesPlugin(), "configmodel-restore-values")
+
+
+def pytest_unconfigure(config):
+    if _previous_memory_only_key in config.stash:
+        SerializersFactory.memory_only = config.stash[_previous_memory_only_key]
+        del config.stash[_previous_memory_only_key]
+
+
+@contextlib.contextmanager
+def restored_memory_values():
+    """
+    Restore values of all existing in-memory models when the context exits
+    """
+    snapshots = [(serializer, serializer.get_snapshot()) for serializer in SerializerMemory.get_instances()]
+    try:
+        yield
+    finally:
+        for serializer, snapshot in snapshots:
+            serializer.restore_snapshot(snapshot)
+
+
+class _RestoreValuesPlugin:
+    """
+    Registered only with --configmodel-memory, so projects which just have the package installed
+    don't get an autouse fixture
+    """
+
+    @pytest.fixture(autouse=True)
+    def _configmodel_restore_values(self):
+        with restored_memory_values():
+            yield
+
+
+@pytest.fixture
+def configmodel_memory():
+    """
+    Keep values of config models created by the test in memory
+    """
+    memory_only = SerializersFactory.memory_only
+    SerializersFactory.memory_only = True
+    try:
+        yield
+    finally:
+        SerializersFactory.memory_only = memory_only
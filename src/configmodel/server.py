@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Config daemon owning a config file, used by processes of the same host through SerializerClient.
+
+Usage: python -m configmodel.server config.ini [--socket config.ini.sock]
+"""
+import argparse
+import logging
+import os
+import signal
+import socketserver
+import sys
+import threading
+
+from configmodel.Logger import logger
+from configmodel.SerializerBase import SerializerBase
+from configmodel.SerializerClient import SerializerClient
+from configmodel.SerializersFactory import SerializersFactory
+
+
+class ConfigServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves values of a config file over a Unix domain socket.
+
+    Messages are JSON objects prefixed by their length (4 bytes, big endian).
+    Requests have "id" and "op", every request gets a reply with the same "id" ("error" is set if it failed):
+
+    * {"op": "defaults", "values": [[path, value], ...]} - write default values, reply has all "values"
+    * {"op": "get"} - reply has all "values"
+    * {"op": "set", "values": [[path, value], ...]} - set values in a single commit
+    * {"op": "reload"} - read values changed in the file
+    * {"op": "flush"} - write pending changes
+
+    Changes are pushed to all clients as {"op": "changed", "values": [[path, value], ...]},
+    a client receives changes caused by its request before the reply.
+    """
+    SOCKET_SUFFIX = ".sock"
+    daemon_threads = True
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+
+        def setup(self):
+            super().setup()
+            # replies and pushed changes are written from different threads
+            self.write_lock = threading.Lock()
+            self.server.add_client(self)
+
+        def finish(self):
+            self.server.remove_client(self)
+            super().finish()
+
+        def handle(self):
+            while True:
+                request = SerializerClient.receive_message(self.rfile)
+                if request is None:
+                    return
+                reply = self.server.handle_request(request)
+                self.send(reply)
+
+        def send(self, message):
+            with self.write_lock:
+                SerializerClient.send_message(self.wfile, message)
+
+    def __init__(self, filename, socket_path=None):
+        if socket_path is None:
+            socket_path = filename + self.SOCKET_SUFFIX
+        self.filename = filename
+        self.socket_path = socket_path
+        self.serializer = SerializersFactory.get_serializer_by_filename(filename)
+        self.serializer.add_change_listener(self._on_value_changed)
+        # serializer is used by one request at a time
+        self._serializer_lock = threading.RLock()
+        self._pending_changes = []
+        self._clients = set()
+        self._clients_lock = threading.Lock()
+        if os.path.exists(socket_path):
+            # socket of a server which wasn't shut down properly
+            os.unlink(socket_path)
+        super().__init__(socket_path, self.RequestHandler)
+
+    def add_client(self, client):
+        with self._clients_lock:
+            self._clients.add(client)
+
+    def remove_client(self, client):
+        with self._clients_lock:
+            self._clients.discard(client)
+
+    def _on_value_changed(self, change):
+        self._pending_changes.append([change.path, change.value])
+
+    def _get_values(self):
+        return [[path, value] for path, value in self.serializer.get_hash_tree().iter_values()]
+
+    def handle_request(self, request):
+        reply = {"id": request.get("id")}
+        with self._serializer_lock:
+            try:
+                op = request.get("op")
+                if op == "defaults":
+                    default_values = [SerializerBase.FieldDefaultValue(path, value) for path, value in request["values"]]
+                    self.serializer.write_default_values_from_model(default_values)
+                    reply["values"] = self._get_values()
+                elif op == "get":
+                    reply["values"] = self._get_values()
+                elif op == "set":
+                    self.serializer.set_values(request["values"])
+                elif op == "reload":
+                    self.serializer.reload()
+                elif op == "flush":
+                    self.serializer.flush()
+                else:
+                    raise ValueError(f"Unknown operation: {op}")
+            except Exception as e:
+                logger.error("Request %s failed: %s", request, e)
+                reply["error"] = str(e)
+            self._push_changes()
+        return reply
+
+    def _push_changes(self):
+        """
+        Send pending changes to all clients in a single message
+        """
+        if not self._pending_changes:
+            return
+        message = {"op": "changed", "values": self._pending_changes}
+        self._pending_changes = []
+        with self._clients_lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.send(message)
+            except OSError:
+                # client disconnected, its handler removes it
+                pass
+
+    def server_close(self):
+        super().server_close()
+        with self._serializer_lock:
+            self.serializer.flush()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m configmodel.server", description="Serve config file to local processes")
+    parser.add_argument("filename", help="config file")
+    parser.add_argument("--socket", help="path of Unix domain socket (default: <filename>.sock)")
+    parser.add_argument("--verbose", action="store_true", help="print debug messages")
+    parsed_args = parser.parse_args(args)
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if parsed_args.verbose:
+        logger.setLevel(logging.DEBUG)
+
+    server = ConfigServer(os.path.abspath(parsed_args.filename), parsed_args.socket)
+
+    def on_signal(signum, frame):
+        # shutdown() waits for serve_forever() to finish, it must be called from another thread
+        threading.Thread(target=server.shutdown).start()
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    print(f"Serving {server.filename} on {server.socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import unittest
 
-from configmodel.Logger import Log
+from configmodel.Logger import logger
 from configmodel.SerializerBase import SerializerBase
 from configmodel.SerializersFactory import SerializersFactory
 
@@ -22,11 +22,12 @@ class MockSerializer(SerializerBase):
 
     @staticmethod
     def register_in_factory():
-        SerializersFactory.SUPPORTED_SERIALIZERS.append([MockSerializer, [".mock"]])
+        SerializersFactory.register_serializer(MockSerializer, [".mock"])
 
     def set_value(self, path, value):
         self.cached_values[path_to_string(path)] = value
-        Log.debug("MockSerializer.set_value: path: {}, value: {}".format(path, value))
+        self._notify_change(path, value)
+        logger.debug("MockSerializer.set_value: path: %s, value: %s", path, value)
 
     def get_value(self, path):
         path_str = path_to_string(path)
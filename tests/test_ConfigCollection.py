@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import os
+import statistics
+import tempfile
+import unittest
+
+from configmodel import ConfigModel
+from configmodel.ConfigCollection import ConfigCollection
+
+
+class TestConfigCollection(unittest.TestCase):
+
+    class TenantConfig(ConfigModel):
+        font_size = 12
+        dark_mode = False
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+
+        photos_api = GoogleApi()
+
+    def setUp(self):
+        super().setUp()
+        self.tenants = [self.TenantConfig(":memory:") for _ in range(5)]
+        for index, tenant in enumerate(self.tenants):
+            tenant.font_size = 10 + index
+            tenant.photos_api.client_id = f"client {index}"
+        self.tenants[1].dark_mode = True
+        self.tenants[3].dark_mode = True
+        self.collection = ConfigCollection(self.TenantConfig, self.tenants)
+        self.addCleanup(self.collection.close)
+
+    def test_rows(self):
+        self.assertEqual(5, len(self.collection))
+        row = self.collection[2]
+        self.assertEqual(12, row.font_size)
+        self.assertEqual("client 2", row.photos_api.client_id)
+        self.assertIs(self.tenants[2], row._get_model())
+        self.assertEqual("client 4", self.collection[-1].photos_api.client_id)
+        self.assertEqual([10, 11, 12, 13, 14], [row.font_size for row in self.collection])
+        with self.assertRaises(AttributeError):
+            row.unknown_field
+        with self.assertRaises(IndexError):
+            self.collection[5]
+
+    def test_queries(self):
+        self.assertEqual([10, 11, 12, 13, 14], self.collection.column("font_size"))
+        self.assertEqual(["client 0"], self.collection.column(["photos_api", "client_id"])[:1])
+        dark_mode = self.collection.mask("dark_mode", True)
+        self.assertEqual([False, True, False, True, False], dark_mode)
+        self.assertEqual([self.tenants[1], self.tenants[3]], [row._get_model() for row in self.collection.filter("dark_mode", True)])
+        large_font = self.collection.mask("font_size", lambda value: value >= 12)
+        rows = self.collection.select([a and b for a, b in zip(dark_mode, large_font)])
+        self.assertEqual(["client 3"], [row.photos_api.client_id for row in rows])
+        self.assertEqual(12, self.collection.aggregate("font_size", statistics.mean))
+        self.assertEqual(13, self.collection.aggregate("font_size", max, mask=dark_mode))
+        self.assertEqual({False: 3, True: 2}, self.collection.value_counts("dark_mode"))
+        with self.assertRaises(KeyError):
+            self.collection.column("photos_api.unknown")
+
+    def test_changes(self):
+        """
+        Test that values changed after the collection was created are updated
+        """
+        self.tenants[0].dark_mode = True
+        self.assertEqual(3, self.collection.value_counts("dark_mode")[True])
+        self.assertTrue(self.collection[0].dark_mode)
+        self.collection.close()
+        self.tenants[0].dark_mode = False
+        self.assertTrue(self.collection[0].dark_mode)
+
+    def test_ini_files(self):
+        """
+        Test that values stored in INI files as strings are converted to types of default values
+        """
+        with tempfile.TemporaryDirectory(prefix="test_ConfigCollection_") as temp_dir:
+            filename = os.path.join(temp_dir, "stored.ini")
+            with open(filename, "w") as f:
+                f.write("[Global]\nfont_size = 14\ndark_mode = True\n\n[photos_api]\nclient_id = 1234\n")
+            tenants = [self.TenantConfig(filename), self.TenantConfig(os.path.join(temp_dir, "new.ini"))]
+            with ConfigCollection(self.TenantConfig, tenants) as collection:
+                self.assertEqual([14, 12], collection.column("font_size"))
+                self.assertEqual(14, collection.aggregate("font_size", max))
+                self.assertEqual([tenants[0]], [row._get_model() for row in collection.filter("dark_mode", True)])
+                self.assertEqual({True: 1, False: 1}, collection.value_counts("dark_mode"))
+                # client_id has a string default value
+                self.assertEqual(["1234", "<client id>"], collection.column("photos_api.client_id"))
+
+                # values written and reloaded are converted too
+                tenants[1].font_size = 14
+                tenants[1].dark_mode = True
+                tenants[1]._get_serializer().reload()
+                self.assertEqual({14: 2}, collection.value_counts("font_size"))
+                self.assertEqual([True, True], collection.mask("dark_mode", True))
+                with open(filename, "w") as f:
+                    f.write("[Global]\nfont_size = large\ndark_mode = off\n")
+                tenants[0].reload()
+                # values which can't be converted are kept
+                self.assertEqual(["large", 14], collection.column("font_size"))
+                self.assertEqual([False, True], collection.column("dark_mode"))
+
+    def test_other_models(self):
+        class OtherConfig(ConfigModel):
+            font_size = 12
+
+        with self.assertRaises(ValueError):
+            self.collection.add(OtherConfig(":memory:"))
+        with self.assertRaises(ValueError):
+            self.collection.add(self.tenants[0].photos_api)
+        with self.assertRaises(ValueError):
+            self.collection.add(self.TenantConfig())
+
+
+if __name__ == '__main__':
+    unittest.main()
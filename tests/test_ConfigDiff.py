@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from configmodel import ConfigModel
+from configmodel.ConfigDiff import ConfigDiff
+from configmodel.SerializerIni import SerializerIni
+
+MISSING = ConfigDiff.MISSING
+
+
+class TestConfigDiff(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_ConfigDiff_")
+
+    def tearDown(self):
+        super().tearDown()
+        self._temp_dir.cleanup()
+
+    def _write_file(self, filename, content):
+        full_path = os.path.join(self._temp_dir.name, filename)
+        with open(full_path, "w") as f:
+            f.write(content)
+        return full_path
+
+    def test_diff(self):
+        """
+        Test that diff() finds changed, added and removed values
+        """
+        old_values = [(["a"], "1"), (["b", "c"], "2"), (["b", "d"], "3"), (["e", "f"], "4")]
+        new_values = [(["a"], "1"), (["b", "c"], "20"), (["b", "g"], "5"), (["h"], "6")]
+        changes = ConfigDiff.diff(old_values, new_values)
+        self.assertCountEqual([
+            ConfigDiff.Change(["b", "c"], "2", "20"),
+            ConfigDiff.Change(["b", "d"], "3", MISSING),
+            ConfigDiff.Change(["b", "g"], MISSING, "5"),
+            ConfigDiff.Change(["e", "f"], "4", MISSING),
+            ConfigDiff.Change(["h"], MISSING, "6"),
+        ], changes)
+        self.assertTrue(ConfigDiff.Change(["h"], MISSING, "6").is_added)
+        self.assertTrue(ConfigDiff.Change(["e", "f"], "4", MISSING).is_removed)
+
+    def test_values_compared_as_strings(self):
+        """
+        Test that values are compared as they are written to config files
+        """
+        self.assertEqual([], ConfigDiff.diff([(["a"], 12)], [(["a"], "12")]))
+
+    def test_unchanged_subtrees_skipped(self):
+        """
+        Test that only subtrees with different hashes are compared
+        """
+        old_tree = ConfigDiff.build_tree(([f"section_{i}", f"value_{j}"], j) for i in range(100) for j in range(10))
+        new_tree = ConfigDiff.build_tree(([f"section_{i}", f"value_{j}"], j) for i in range(100) for j in range(10))
+        new_tree.set_value(["section_50", "value_5"], "changed")
+
+        with patch.object(ConfigDiff, "_compare_nodes", wraps=ConfigDiff._compare_nodes) as mock_compare:
+            changes = ConfigDiff.compare_trees(old_tree, new_tree)
+        self.assertEqual([ConfigDiff.Change(["section_50", "value_5"], 5, "changed")], changes)
+        # root, 100 sections, 10 values of the changed section
+        self.assertEqual(1 + 100 + 10, mock_compare.call_count)
+
+    def test_diff_files(self):
+        """
+        Test that SerializerIni compares INI files
+        """
+        old_filename = self._write_file("old.ini", "[Global]\nfont_size = 12\n[photos_api]\nclient_id = 1\nsecret = s\n")
+        new_filename = self._write_file("new.ini", "[Global]\nfont_size = 12\n[photos_api]\nclient_id = 2\nsecret = s\n")
+        self.assertEqual([ConfigDiff.Change(["photos_api", "client_id"], "1", "2")],
+                         SerializerIni.diff_files(old_filename, new_filename))
+
+    def test_model_diff_and_patch(self):
+        """
+        Test that models are compared and patched in a single commit
+        """
+        class AppConfig(ConfigModel):
+            font_size = 12
+
+            class GoogleApi(ConfigModel):
+                client_id = "<client id>"
+                secret = "<secret>"
+
+            photos_api = GoogleApi()
+            maps_api = GoogleApi()
+
+        config1 = AppConfig(os.path.join(self._temp_dir.name, "config1.ini"))
+        config2 = AppConfig(os.path.join(self._temp_dir.name, "config2.ini"))
+        self.assertEqual([], config1.diff(config2))
+
+        config2.font_size = 14
+        config2.maps_api.secret = "maps secret"
+        changes = config1.diff(config2)
+        self.assertCountEqual([
+            ConfigDiff.Change(["font_size"], 12, 14),
+            ConfigDiff.Change(["maps_api", "secret"], "<secret>", "maps secret"),
+        ], changes)
+
+        # nested models are compared by relative paths
+        config1.maps_api.client_id = "maps"
+        self.assertEqual([ConfigDiff.Change(["client_id"], "<client id>", "maps")],
+                         config1.photos_api.diff(config1.maps_api))
+
+        serializer = config1._serializer
+        with patch.object(serializer, "_commit_delayed_write", wraps=serializer._commit_delayed_write) as mock_commit:
+            config1.patch(changes)
+            mock_commit.assert_called_once()
+        self.assertEqual(14, config1.font_size)
+        self.assertEqual("maps secret", config1.maps_api.secret)
+        self.assertEqual([ConfigDiff.Change(["maps_api", "client_id"], "maps", "<client id>")], config1.diff(config2))
+
+        # compare with file
+        self.assertEqual([], serializer.diff_file(serializer.filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
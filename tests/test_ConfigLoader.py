@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from configmodel import ConfigModel
+from configmodel.ConfigLoader import ConfigLoader
+
+
+class TestConfigLoader(unittest.TestCase):
+
+    class TenantConfig(ConfigModel):
+        font_size = 12
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+
+        photos_api = GoogleApi()
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_ConfigLoader_")
+        self.filenames = []
+        for index in range(10):
+            filename = os.path.join(self._temp_dir.name, f"tenant_{index}.ini")
+            with open(filename, "w") as f:
+                f.write(f"[Global]\nfont_size = {index}\n")
+            self.filenames.append(filename)
+
+    def tearDown(self):
+        super().tearDown()
+        self._temp_dir.cleanup()
+
+    def _check_models(self, result):
+        self.assertEqual(self.filenames, list(result.models))
+        self.assertEqual({}, result.errors)
+        for index, model in enumerate(result.models.values()):
+            self.assertIsInstance(model, self.TenantConfig)
+            self.assertEqual(str(index), model.font_size)
+            self.assertEqual("<client id>", model.photos_api.client_id)
+        schemas = {id(model._schema) for model in result.models.values()}
+        self.assertEqual(1, len(schemas))
+
+    def test_threads(self):
+        result = ConfigLoader(self.TenantConfig, max_workers=4).load(self.filenames)
+        self._check_models(result)
+        # default values are written
+        with open(self.filenames[0]) as f:
+            self.assertIn("client_id", f.read())
+
+    def test_processes(self):
+        result = ConfigLoader(self.TenantConfig, executor=ConfigLoader.PROCESS, max_workers=2, chunk_size=3).load(self.filenames)
+        self._check_models(result)
+        with open(self.filenames[0]) as f:
+            self.assertIn("client_id", f.read())
+        # models are bound to their files
+        model = result.models[self.filenames[1]]
+        model.font_size = 20
+        with open(self.filenames[1]) as f:
+            self.assertIn("font_size = 20", f.read())
+
+    def test_skip_default_values(self):
+        for executor in [ConfigLoader.THREAD, ConfigLoader.PROCESS]:
+            result = ConfigLoader(self.TenantConfig, executor=executor, write_default_values=False).load(self.filenames)
+            self._check_models(result)
+            with open(self.filenames[0]) as f:
+                self.assertEqual("[Global]\nfont_size = 0\n", f.read())
+
+    def test_errors(self):
+        # directory can't be read as a config file
+        invalid_filename = os.path.join(self._temp_dir.name, "invalid.ini")
+        os.mkdir(invalid_filename)
+        filenames = self.filenames[:5] + [invalid_filename] + self.filenames[5:]
+        for executor in [ConfigLoader.THREAD, ConfigLoader.PROCESS]:
+            with self.assertRaises(ConfigLoader.LoadError) as context:
+                ConfigLoader(self.TenantConfig, executor=executor).load(filenames)
+            self.assertEqual(invalid_filename, context.exception.filename)
+
+            result = ConfigLoader(self.TenantConfig, executor=executor, fail_fast=False).load(filenames)
+            self.assertEqual(self.filenames, list(result.models))
+            self.assertEqual([invalid_filename], list(result.errors))
+            self.assertIsInstance(result.errors[invalid_filename], OSError)
+
+
+if __name__ == '__main__':
+    unittest.main()
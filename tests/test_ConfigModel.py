@@ -1,5 +1,8 @@
+import gc
+import logging
 import os
 import unittest
+import weakref
 
 __author__ = "Vasily Maslyukov"
 __license__ = "MIT"
@@ -8,14 +11,14 @@ from unittest.mock import patch
 
 from configmodel import ConfigModel, config_file, nested_field
 from configmodel.FieldBase import FieldBase
-from configmodel.Logger import Log
+from configmodel.Logger import logger
 from mock_Serializer import mock_return_path_as_value, MockSerializer
 
 TEST_CONFIG_FILE = "config.mock"
 ANOTHER_CONFIG_FILE = "second_config.mock"
 
-# enable logging
-Log.logging_enabled = True
+# enable debug messages
+logger.setLevel(logging.DEBUG)
 
 
 class TestConfigModel(unittest.TestCase):
@@ -79,9 +82,10 @@ class TestConfigModel(unittest.TestCase):
         self.assertIsNone(instance1.NestedConfig._get_instance())
         self.assertIsNone(instance2.NestedConfig._get_instance())
 
-        # check that instances are different
-        self.assertIsNot(instance1._fields, instance2._fields)
+        # check that instances are different, but share the layout of fields
+        self.assertIs(instance1._fields, instance2._fields)
         self.assertIsNot(instance1.purple_config, instance2.purple_config)
+        self.assertIs(instance1.purple_config, instance1.purple_config)
 
         self.assertNotEqual(instance1.purple_config.color, instance2.purple_config.color)
 
@@ -404,6 +408,90 @@ class TestConfigModel(unittest.TestCase):
 
         self.assertEqual(expected_file_path, config_filename, "Config file was not created in the same directory as the script")
 
+    def test_versions(self):
+        """
+        Check that versions of the changed model and its parents are incremented
+        """
+        class AppConfig(ConfigModel):
+            font_size = 12
+
+            class GoogleApi(ConfigModel):
+                client_id = "<client id>"
+
+            photos_api = GoogleApi()
+            maps_api = GoogleApi()
+
+            @nested_field("account")
+            class AccountInfo(ConfigModel):
+                username = "guest"
+
+                class Limits(ConfigModel):
+                    quota = 10
+
+        config = AppConfig(TEST_CONFIG_FILE)
+        self.assertEqual(0, config._version)
+
+        config.photos_api.client_id = "1234"
+        self.assertEqual(1, config._version)
+        self.assertEqual(1, config.photos_api._version)
+        self.assertEqual(0, config.maps_api._version)
+
+        config.font_size = 14
+        self.assertEqual(2, config._version)
+        self.assertEqual(1, config.photos_api._version)
+
+        config.AccountInfo.Limits.quota = 20
+        self.assertEqual(3, config._version)
+        self.assertEqual(1, config.AccountInfo._version)
+        self.assertEqual(1, config.AccountInfo.Limits._version)
+        self.assertEqual(0, config.maps_api._version)
+
+        # values which are not part of the model change the root version only
+        config._serializer.set_value(["unknown_section", "unknown_value"], "1")
+        self.assertEqual(4, config._version)
+        self.assertEqual(1, config.photos_api._version)
+
+    def test_shared_schema(self):
+        """
+        Check that the layout of fields is built once per class and instances keep only their values
+        """
+        class TenantConfig(ConfigModel):
+            name = FieldBase("tenant_name", "guest")
+
+            class GoogleApi(ConfigModel):
+                client_id = "<client id>"
+
+            photos_api = GoogleApi()
+
+            class Limits(ConfigModel):
+                quota = 10
+
+        instance1 = TenantConfig(TEST_CONFIG_FILE)
+        instance2 = TenantConfig(ANOTHER_CONFIG_FILE)
+        self.assertIs(instance1._schema, instance2._schema)
+        # field definitions are not copied
+        self.assertIs(TenantConfig.__dict__["name"], instance1._fields["name"].definition)
+
+        # nested models are bound to their root instance
+        instance1.photos_api.client_id = "1234"
+        self.assertEqual("1234", instance1.photos_api.client_id)
+        self.assertEqual("<client id>", instance2.photos_api.client_id)
+        self.assertEqual(["photos_api"], instance1.photos_api._get_path())
+
+        # static instance of a nested class is bound to the latest instance
+        self.assertIs(TenantConfig.Limits._get_instance(), instance2.Limits)
+        self.assertIsNot(instance1.Limits, instance2.Limits)
+        instance2.Limits.quota = 20
+        self.assertEqual(20, int(instance2.Limits.quota))
+        self.assertEqual(20, int(TenantConfig.Limits.quota))
+        self.assertEqual(10, int(instance1.Limits.quota))
+
+        # the static instance doesn't keep earlier instances alive
+        instance1_ref = weakref.ref(instance1)
+        del instance1
+        gc.collect()
+        self.assertIsNone(instance1_ref())
+
 
 if __name__ == '__main__':
     unittest.main()
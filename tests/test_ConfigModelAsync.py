@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import configparser
+import tempfile
+import os
+import unittest
+
+from configmodel import ConfigModel, config_file
+from configmodel.MixinDelayedWrite import InterruptibleTimer, LoopTimer
+from configmodel.SerializerIni import SerializerIni
+
+
+class TestConfigModelAsync(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_ConfigModelAsync_")
+        self.filename = os.path.join(self._temp_dir.name, "config.ini")
+
+    def tearDown(self):
+        super().tearDown()
+        self._temp_dir.cleanup()
+
+    def _read_ini(self):
+        parser = configparser.ConfigParser()
+        parser.read(self.filename)
+        return parser
+
+    async def test_aset(self):
+        """
+        Test that aset() sets the value and writes it to file
+        """
+        class AppConfig(ConfigModel):
+            font_size = 12
+
+            class GoogleApi(ConfigModel):
+                client_id = "<client id>"
+
+            photos_api = GoogleApi()
+
+        config = AppConfig(self.filename)
+        await config.aset("font_size", 14)
+        await config.photos_api.aset("client_id", "1234")
+        self.assertEqual(14, config.font_size)
+        self.assertEqual("1234", config.photos_api.client_id)
+
+        parser = self._read_ini()
+        self.assertEqual("14", parser[SerializerIni.DEFAULT_SECTION]["font_size"])
+        self.assertEqual("1234", parser["photos_api"]["client_id"])
+
+        with self.assertRaises(AttributeError):
+            await config.aset("undefined_field", 1)
+        with self.assertRaises(Exception):
+            await config.aset("photos_api", 1)
+
+    async def test_aflush_delayed_write(self):
+        """
+        Test that delayed write is scheduled on the running loop and aflush() commits it
+        """
+        @config_file(self.filename)
+        class AppConfig(ConfigModel):
+            font_size = 12
+
+        serializer = AppConfig._get_instance()._serializer
+        serializer._set_delayed_write(True, delay_seconds=10)
+
+        AppConfig.font_size = 15
+        self.assertIsInstance(serializer._timer, LoopTimer)
+        self.assertEqual("12", self._read_ini()[SerializerIni.DEFAULT_SECTION]["font_size"])
+
+        # static configs forward public methods to the registered instance
+        await AppConfig.aflush()
+        self.assertIsNone(serializer._timer)
+        self.assertEqual("15", self._read_ini()[SerializerIni.DEFAULT_SECTION]["font_size"])
+
+    async def test_changes(self):
+        """
+        Test that changes() yields changes of the model and its nested models only
+        """
+        class AppConfig(ConfigModel):
+            font_size = 12
+
+            class GoogleApi(ConfigModel):
+                client_id = "<client id>"
+
+            photos_api = GoogleApi()
+            maps_api = GoogleApi()
+
+        config = AppConfig(self.filename)
+        all_changes = []
+        photos_api_changes = []
+
+        async def _collect(model, collected, count):
+            async for change in model.changes():
+                collected.append(change)
+                if len(collected) == count:
+                    break
+
+        tasks = [
+            asyncio.create_task(_collect(config, all_changes, 3)),
+            asyncio.create_task(_collect(config.photos_api, photos_api_changes, 1)),
+        ]
+        # let the iterators subscribe
+        await asyncio.sleep(0)
+
+        config.font_size = 13
+        config.maps_api.client_id = "maps"
+        await config.photos_api.aset("client_id", "photos")
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+
+        self.assertEqual([["font_size"], ["maps_api", "client_id"], ["photos_api", "client_id"]],
+                         [change.path for change in all_changes])
+        self.assertEqual(1, len(photos_api_changes))
+        self.assertEqual("photos", photos_api_changes[0].value)
+        # listeners are removed when iteration stops (only the listener of the model itself is left)
+        self.assertEqual(1, len(config._serializer._change_listeners))
+
+    def test_sync_write_after_loop_closed(self):
+        """
+        Test that a delayed write scheduled on a closed event loop doesn't break writes without a loop
+        """
+        class AppConfig(ConfigModel):
+            font_size = 12
+
+        config = AppConfig(self.filename)
+        serializer = config._serializer
+        serializer._set_delayed_write(True, delay_seconds=10)
+
+        async def _set_value():
+            config.font_size = 14
+        asyncio.run(_set_value())
+        loop_timer = serializer._timer
+        self.assertIsInstance(loop_timer, LoopTimer)
+
+        # timer of the closed loop is replaced, its value is committed by the new timer
+        config.font_size = 15
+        self.assertIsInstance(serializer._timer, InterruptibleTimer)
+        self.assertIsNone(loop_timer.callback)
+        serializer.flush()
+        self.assertEqual("15", self._read_ini()[SerializerIni.DEFAULT_SECTION]["font_size"])
+
+    def test_unbound_model(self):
+        """
+        Test that async API of a model without config file raises an exception
+        """
+        class AppConfig(ConfigModel):
+            font_size = 12
+
+        with self.assertRaises(Exception):
+            asyncio.run(AppConfig().aflush())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from configmodel import ConfigModel
+from configmodel.__main__ import main
+from configmodel.ConfigTool import ConfigTool
+
+
+class TestConfigTool(unittest.TestCase):
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+        dark_mode = False
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+            secret = "<secret>"
+
+        photos_api = GoogleApi()
+
+    MODEL_NAME = f"{__name__}:TestConfigTool.AppConfig"
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_ConfigTool_")
+        self.directory = self._temp_dir.name
+        os.mkdir(os.path.join(self.directory, "eu"))
+        self.valid_filename = self._write_file("eu/valid.ini", "[Global]\nfont_size = 14\n\n[photos_api]\nclient_id = 1234\n")
+        self.old_filename = self._write_file("old.ini", (
+            "# old layout\n"
+            "[Global]\n"
+            "font_size = large\n"
+            "legacy = 1\n"
+            "\n"
+            "[photos]\n"
+            "client_id = 5678\n"
+            "secret = zzzz\n"
+        ))
+        self._write_file("notes.txt", "not a config file\n")
+
+    def tearDown(self):
+        super().tearDown()
+        self._temp_dir.cleanup()
+
+    def _write_file(self, name, text):
+        filename = os.path.join(self.directory, name)
+        with open(filename, "w") as f:
+            f.write(text)
+        return filename
+
+    def _main(self, args):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            exit_code = main(args)
+        return exit_code, stdout.getvalue().splitlines()
+
+    def test_find_files(self):
+        self.assertEqual([self.valid_filename, self.old_filename], ConfigTool.find_files([self.directory]))
+        self.assertEqual([self.old_filename], ConfigTool.find_files([self.old_filename, self.old_filename]))
+
+    def test_validate(self):
+        """
+        Test that unknown keys and values of wrong types are reported
+        """
+        results = list(ConfigTool(self.AppConfig, max_workers=2).validate([self.valid_filename, self.old_filename]))
+        self.assertEqual([self.valid_filename, self.old_filename], [result.filename for result in results])
+        self.assertTrue(results[0].ok)
+        self.assertEqual(["invalid value of font_size: 'large' is not int", "unknown key: legacy",
+                          "unknown key: photos.client_id", "unknown key: photos.secret"], results[1].problems)
+
+        result, = ConfigTool(self.AppConfig).validate([self.valid_filename], require_all=True)
+        self.assertEqual(["missing key: dark_mode", "missing key: photos_api.secret"], result.problems)
+
+        exit_code, lines = self._main(["validate", self.MODEL_NAME, self.directory, "--workers", "1"])
+        self.assertEqual(1, exit_code)
+        self.assertEqual(4, len(lines))
+        self.assertTrue(all(line.startswith(self.old_filename + ": ") for line in lines))
+        self.assertEqual(0, self._main(["validate", self.MODEL_NAME, self.valid_filename])[0])
+
+    def test_migrate(self):
+        """
+        Test that values are moved, default values added and unknown keys removed in place
+        """
+        args = ["migrate", self.MODEL_NAME, self.directory, "--rename", "photos=photos_api", "--rename", "legacy=dark_mode",
+                "--add-defaults", "--drop-unknown"]
+        exit_code, lines = self._main(args + ["--dry-run"])
+        self.assertEqual(0, exit_code)
+        self.assertIn(f"{self.old_filename}: renamed photos.client_id to photos_api.client_id", lines)
+        self.assertIn(f"{self.valid_filename}: added default value of photos_api.secret", lines)
+        with open(self.old_filename) as f:
+            self.assertIn("[photos]\n", f.read())
+
+        exit_code, lines = self._main(args)
+        self.assertEqual(0, exit_code)
+        with open(self.old_filename) as f:
+            content = f.read()
+        self.assertTrue(content.startswith("# old layout\n[Global]\nfont_size = large\n"))
+        self.assertNotIn("[photos]", content)
+        self.assertEqual([], [name for name in os.listdir(self.directory) if name.endswith(".tmp")])
+        result, = ConfigTool(self.AppConfig).dump([self.old_filename])
+        self.assertEqual({"font_size": "large", "dark_mode": "1", "photos_api.client_id": "5678", "photos_api.secret": "zzzz"},
+                         result.values)
+        result, = ConfigTool(self.AppConfig).validate([self.valid_filename], require_all=True)
+        self.assertTrue(result.ok)
+
+        # migrated files are not changed again
+        exit_code, lines = self._main(args)
+        self.assertEqual([], lines)
+
+    def test_default_section(self):
+        """
+        Test that files with DEFAULT section are reported instead of validating its values once per section
+        """
+        text = "[DEFAULT]\nlegacy = 1\n\n[Global]\nfont_size = 14\n\n[photos_api]\nclient_id = 1234\n"
+        filename = self._write_file("default.ini", text)
+        tool = ConfigTool(self.AppConfig)
+        result, = tool.validate([filename])
+        self.assertEqual([], result.problems)
+        self.assertIn("[DEFAULT] section is not supported", result.error)
+        result, = tool.migrate([filename], drop_unknown=True, add_defaults=True)
+        self.assertEqual([], result.changes)
+        self.assertIsNotNone(result.error)
+        with open(filename) as f:
+            self.assertEqual(text, f.read())
+
+    def test_dump(self):
+        exit_code, lines = self._main(["dump", self.directory, os.path.join(self.directory, "missing.ini"),
+                                       "--model", self.MODEL_NAME, "--include-defaults"])
+        self.assertEqual(1, exit_code)
+        dumped = json.loads(lines[0])
+        self.assertEqual(self.valid_filename, dumped["file"])
+        self.assertEqual({"font_size": "14", "dark_mode": False, "photos_api.client_id": "1234", "photos_api.secret": "<secret>"},
+                         dumped["values"])
+        self.assertEqual(self.old_filename, json.loads(lines[1])["file"])
+        self.assertTrue(lines[2].endswith("missing.ini: error: FileNotFoundError: No such file: " + lines[2].split(": ")[0]))
+
+        with self.assertRaises(ValueError):
+            ConfigTool.import_model_class("configmodel:ConfigTool")
+
+
+if __name__ == '__main__':
+    unittest.main()
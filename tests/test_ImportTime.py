@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import unittest
+
+import configmodel
+
+
+class TestImportTime(unittest.TestCase):
+
+    # modules which are slow to import and are not needed until a config file is used
+    LAZY_MODULES = [
+        "importlib.metadata",
+        "asyncio",
+        "configparser",
+        "sqlite3",
+        "socket",
+        "json",
+        "multiprocessing",
+        "inspect",
+        "configmodel.SerializerIni",
+        "configmodel.MixinDelayedWrite",
+    ]
+
+    def _run(self, code):
+        src_dir = os.path.dirname(os.path.dirname(os.path.abspath(configmodel.__file__)))
+        env = dict(os.environ, PYTHONPATH=src_dir)
+        # -S: modules imported by site (and .pth files) are not reported
+        return subprocess.run([sys.executable, "-S", "-X", "importtime", "-c", code],
+                              env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+    def _get_imported_modules(self, code):
+        """
+        Get names of modules imported by the code, reported by python -X importtime
+        """
+        modules = set()
+        for line in self._run(code).stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                modules.add(line.rsplit("|", 1)[1].strip())
+        return modules
+
+    def test_lazy_imports(self):
+        """
+        Test that importing the package doesn't import serializers and slow standard modules
+        """
+        modules = self._get_imported_modules("import configmodel")
+        self.assertIn("configmodel.ConfigModel", modules)
+        self.assertEqual([], [module for module in self.LAZY_MODULES if module in modules])
+
+        # modules are imported when used (importlib.import_module() is not reported by -X importtime)
+        modules = self._run("import sys, configmodel; configmodel.__version__; configmodel.ConfigModel(':memory:'); "
+                            "print(' '.join(sys.modules))").stdout.split()
+        self.assertIn("importlib.metadata", modules)
+        self.assertIn("configmodel.SerializerMemory", modules)
+        self.assertNotIn("configmodel.SerializerIni", modules)
+
+    def test_version(self):
+        self.assertIsInstance(configmodel.__version__, str)
+        with self.assertRaises(AttributeError):
+            configmodel.unknown_attribute
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import configparser
+import os
+import tempfile
+import unittest
+
+from configmodel.IniTokenizer import IniTokenizer
+
+INI_CONTENT = """
+# comment
+[Global]
+product_key = 9810347
+Secret: zzzz
+empty =
+; another comment
+multiline = first line
+
+    second line
+    # comment inside value
+
+    third line
+
+[api_key]
+    client_id = 8298
+    secret = 98297821
+    url = http://example.com/?a=b
+[indented]
+        a = 1
+        b = 2
+      [after_indented]
+c = 3
+"""
+
+
+class TestIniTokenizer(unittest.TestCase):
+
+    def _parse_with_configparser(self, content):
+        ini = configparser.ConfigParser()
+        ini.read_string(content)
+        return [(section, option, ini[section][option]) for section in ini.sections() for option in ini[section]]
+
+    def test_same_values_as_configparser(self):
+        """
+        Test that values are the same as values parsed by configparser
+        """
+        document = IniTokenizer.parse_lines(INI_CONTENT.splitlines(keepends=True))
+        self.assertIsInstance(document, IniTokenizer.Document)
+        self.assertEqual(self._parse_with_configparser(INI_CONTENT), list(document.iter_values()))
+        self.assertTrue(document.has_option("Global", "SECRET"))
+        self.assertFalse(document.has_option("Global", "client_id"))
+        self.assertFalse(document.has_option("unknown", "client_id"))
+
+    def test_unsupported_syntax(self):
+        """
+        Test that syntax handled differently than in configparser falls back to configparser
+        """
+        unsupported_contents = [
+            "[DEFAULT]\na = 1\n[section]\nb = 2\n",
+            "[section]\na = 1%%\n",
+            "[section]\na = %(b)s\nb = 1\n",
+            "a = 1\n",
+            "[section]\nno delimiter\n",
+            "[section]\na = 1\nA = 2\n",
+            "[section]\n[section]\n",
+        ]
+        for content in unsupported_contents:
+            lines = content.splitlines(keepends=True)
+            with self.assertRaises(IniTokenizer.UnsupportedSyntax):
+                IniTokenizer.parse_lines(lines)
+
+        document = IniTokenizer.load_lines("[DEFAULT]\na = 1\n[section]\nb = 2%%\n".splitlines(keepends=True))
+        self.assertIsInstance(document, IniTokenizer.ConfigParserDocument)
+        self.assertEqual([("section", "b", "2%"), ("section", "a", "1")], list(document.iter_values()))
+
+        # errors are reported by configparser
+        with self.assertRaises(configparser.Error):
+            IniTokenizer.load_lines(["a = 1\n"])
+
+    def test_set_values_in_place(self):
+        """
+        Test that changed values are replaced in place, and the rest of the file is preserved
+        """
+        document = IniTokenizer.parse_lines(INI_CONTENT.splitlines(keepends=True))
+        lines = document.set_values([
+            ("Global", "multiline", "single line"),
+            ("Global", "new_option", "new value"),
+            ("api_key", "secret", "first\nsecond"),
+            ("api_key", "new_option", "new value"),
+            ("indented", "new_option", "new value"),
+            ("new_section", "new_option", "new value"),
+        ])
+        content = "".join(lines)
+        self.assertIn("# comment\n", content)
+        self.assertIn("; another comment\n", content)
+        self.assertIn("    secret = first\n    \tsecond\n", content)
+        self.assertIn("        b = 2\n        new_option = new value\n", content)
+
+        values = dict(((section, option), value) for section, option, value in self._parse_with_configparser(content))
+        self.assertEqual("single line", values[("Global", "multiline")])
+        self.assertEqual("new value", values[("Global", "new_option")])
+        self.assertEqual("first\nsecond", values[("api_key", "secret")])
+        self.assertEqual("new value", values[("api_key", "new_option")])
+        self.assertEqual("http://example.com/?a=b", values[("api_key", "url")])
+        self.assertEqual("new value", values[("indented", "new_option")])
+        self.assertEqual("3", values[("after_indented", "c")])
+        self.assertEqual("new value", values[("new_section", "new_option")])
+        self.assertEqual(list(IniTokenizer.parse_lines(lines).iter_values()), self._parse_with_configparser(content))
+
+        # values are validated the same way as in configparser
+        with self.assertRaises(ValueError):
+            document.set_values([("Global", "percent", "50%")])
+
+    def test_set_values_without_trailing_newline(self):
+        """
+        Test that options are appended on new lines
+        """
+        document = IniTokenizer.parse_lines(["[section]\n", "a = 1"])
+        content = "".join(document.set_values([("section", "b", "2"), ("other", "c", "3")]))
+        self.assertEqual("[section]\na = 1\nb = 2\n\n[other]\nc = 3\n", content)
+
+    def test_remove_options(self):
+        """
+        Test that options are removed in place, and sections left without options are removed
+        """
+        expected_values = [value for value in self._parse_with_configparser(INI_CONTENT)
+                           if value[:2] not in [("Global", "multiline"), ("Global", "secret"), ("indented", "a"), ("indented", "b")]]
+        for document in [IniTokenizer.parse_lines(INI_CONTENT.splitlines(keepends=True)),
+                         IniTokenizer.ConfigParserDocument(INI_CONTENT.splitlines(keepends=True))]:
+            lines = document.remove_options([
+                ("Global", "multiline"),
+                ("Global", "Secret"),
+                ("indented", "a"),
+                ("indented", "b"),
+                ("unknown", "a"),
+            ])
+            content = "".join(lines)
+            self.assertNotIn("[indented]", content)
+            self.assertNotIn("third line", content)
+            self.assertEqual(expected_values, self._parse_with_configparser(content))
+
+        # comments are preserved if following lines are not changed
+        document = IniTokenizer.parse_lines(INI_CONTENT.splitlines(keepends=True))
+        content = "".join(document.remove_options([("Global", "multiline"), ("api_key", "url")]))
+        self.assertIn("; another comment\n\n[api_key]\n", content)
+        self.assertIn("    secret = 98297821\n[indented]\n", content)
+
+    def test_read_file(self):
+        """
+        Test that files are read the same way with and without mmap
+        """
+        with tempfile.TemporaryDirectory(prefix="test_IniTokenizer_") as temp_dir:
+            filename = os.path.join(temp_dir, "config.ini")
+            self.assertEqual([], IniTokenizer.read_lines(filename))
+            self.assertEqual([], IniTokenizer.read_lines(filename, use_mmap=True))
+            with open(filename, "w") as f:
+                f.write(INI_CONTENT)
+            self.assertEqual(IniTokenizer.read_lines(filename), IniTokenizer.read_lines(filename, use_mmap=True))
+            self.assertEqual(self._parse_with_configparser(INI_CONTENT),
+                             list(IniTokenizer.parse_file(filename, use_mmap=True).iter_values()))
+
+    def test_section_index(self):
+        """
+        Test that sections are parsed separately using byte ranges
+        """
+        with tempfile.TemporaryDirectory(prefix="test_IniTokenizer_") as temp_dir:
+            filename = os.path.join(temp_dir, "config.ini")
+            self.assertEqual({}, IniTokenizer.build_section_index(filename))
+            content = "# comment\n[Global]\na = 1\n\n[section]\nb = 2\n  continuation\n[last] ; comment\nc = 3"
+            with open(filename, "w") as f:
+                f.write(content)
+            index = IniTokenizer.build_section_index(filename)
+            self.assertEqual(["Global", "section", "last"], list(index))
+            values = []
+            for section, byte_range in index.items():
+                values += IniTokenizer.parse_section(filename, section, *byte_range).iter_values()
+            self.assertEqual(self._parse_with_configparser(content), values)
+            with self.assertRaises(IniTokenizer.UnsupportedSyntax):
+                IniTokenizer.parse_section(filename, "section", *index["Global"])
+
+            # files which can't be parsed by sections
+            for content in ["a = 1\n[section]\n", "[a]\nb = 1\n  [c]\n", "[a]\n[a]\n", "[DEFAULT]\n", "a = 1\n"]:
+                with open(filename, "w") as f:
+                    f.write(content)
+                self.assertIsNone(IniTokenizer.build_section_index(filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
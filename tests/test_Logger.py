@@ -1,36 +1,53 @@
 # -*- coding: utf-8 -*-
+import logging
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
-from configmodel.Logger import Log
+from configmodel import ConfigModel
+from configmodel.Logger import logger
 
 
 class TestLogger(unittest.TestCase):
 
+    class AppConfig(ConfigModel):
+        font_size = 12
+
     def setUp(self):
         super().setUp()
         # save old value
-        self._old_logging_enabled = Log.logging_enabled
+        self._old_level = logger.level
 
     def tearDown(self):
         super().tearDown()
         # restore old value
-        Log.logging_enabled = self._old_logging_enabled
+        logger.setLevel(self._old_level)
+
+    def _use_config(self, temp_dir):
+        filename = os.path.join(temp_dir, "config.ini")
+        config = self.AppConfig(filename)
+        config.font_size = 14
+        self.assertEqual(14, config.font_size)
+        config._serializer.flush()
+        return filename
 
     def test_logger_disabled(self):
-        Log.logging_enabled = False
-        with patch('builtins.print') as mock_print:
-            Log.debug("debug message")
-            Log.error("error message")
-            mock_print.assert_not_called()
+        logger.setLevel(logging.INFO)
+        with tempfile.TemporaryDirectory(prefix="test_Logger_") as temp_dir:
+            with patch.object(logger, "makeRecord", wraps=logger.makeRecord) as mock_make_record:
+                self._use_config(temp_dir)
+            # messages are not created nor formatted
+            mock_make_record.assert_not_called()
 
     def test_logger_enabled(self):
-        Log.logging_enabled = True
-        with patch('builtins.print') as mock_print:
-            Log.debug("debug message")
-            Log.error("error message")
-            mock_print.assert_any_call("DEBUG: debug message")
-            mock_print.assert_any_call("ERROR: error message")
+        with tempfile.TemporaryDirectory(prefix="test_Logger_") as temp_dir:
+            with self.assertLogs(logger, logging.DEBUG) as logs:
+                filename = self._use_config(temp_dir)
+                logger.error("error message")
+        self.assertIn(f"DEBUG:configmodel:Creating new configuration file: {filename}", logs.output)
+        self.assertIn("DEBUG:configmodel:Writing default value of field '['font_size']' to '12'", logs.output)
+        self.assertIn("ERROR:configmodel:error message", logs.output)
 
 
 if __name__ == '__main__':
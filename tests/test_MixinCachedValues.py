@@ -43,6 +43,29 @@ class TestMixinCachedValues(unittest.TestCase):
         mixin1.set_cached_value(["z", "x"], "value2")
         self.assertEqual("value2", mixin1.get_cached_value(["z", "x"]))
 
+    def test_take_dirty_values(self):
+        """
+        Test that values set after _take_dirty_values() stay dirty
+        """
+        mixin1 = MixinCachedValues()
+        mixin1.set_cached_value(["a"], 1, is_dirty=False)
+        mixin1.set_cached_value(["b"], 2)
+        cached_value = mixin1._cached_values["b"]
+        self.assertEqual({"b": 2}, mixin1._take_dirty_values())
+        self.assertFalse(mixin1._is_dirty)
+        self.assertEqual({}, mixin1._take_dirty_values())
+
+        # value set while the taken values are being written
+        mixin1.set_cached_value(["b"], 3)
+        cached_value.is_dirty = False
+        self.assertTrue(mixin1._is_dirty)
+        self.assertEqual({"b": 3}, mixin1._take_dirty_values())
+
+        # values which could not be written are dirty again
+        mixin1._restore_dirty_values({"b": 3})
+        self.assertTrue(mixin1._is_dirty)
+        self.assertEqual({"b": 3}, mixin1._take_dirty_values())
+
 
 if __name__ == '__main__':
     unittest.main()
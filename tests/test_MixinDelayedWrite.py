@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import threading
 import time
 import unittest
 
-from configmodel.MixinDelayedWrite import MixinDelayedWrite
+from configmodel.MixinDelayedWrite import MixinDelayedWrite, LoopTimer, PendingTimers
 
 
 def ms(milliseconds):
@@ -22,9 +24,21 @@ class MockMixinDelayedWrite(MixinDelayedWrite):
             delay_seconds=delay_seconds
         )
         self.timer_fired_at = None
+        self.commit_count = 0
+        self._committed = threading.Condition()
 
     def _commit_delayed_write(self):
-        self.timer_fired_at = time.time()
+        with self._committed:
+            self.timer_fired_at = time.time()
+            self.commit_count += 1
+            self._committed.notify_all()
+
+    def wait_for_commits(self, commit_count, timeout=5):
+        """
+        Wait until the number of commits is reached, returns False on timeout
+        """
+        with self._committed:
+            return self._committed.wait_for(lambda: self.commit_count >= commit_count, timeout)
 
 
 class TestMixinDelayedWrite(unittest.TestCase):
@@ -99,6 +113,91 @@ class TestMixinDelayedWrite(unittest.TestCase):
         self.assertGreaterEqual(delta_time, expected_delay - ms(5))
         self.assertLess(delta_time, expected_delay + ms(20))
 
+    def test_restart_after_fired(self):
+        """
+        Test that writes after the timer has fired are committed too
+        """
+        mixin_delayed_write = MockMixinDelayedWrite(delayed_write_enabled=True, delay_seconds=ms(10))
+        mixin_delayed_write._restart_delayed_timer()
+        self.assertTrue(mixin_delayed_write.wait_for_commits(1))
+        mixin_delayed_write._restart_delayed_timer()
+        self.assertTrue(mixin_delayed_write.wait_for_commits(2))
+        self.assertEqual(2, mixin_delayed_write.commit_count)
+
+    def test_exit_handlers_removed(self):
+        """
+        Test that fired and cancelled timers are not kept to be fired at exit
+        """
+        mixin_delayed_write = MockMixinDelayedWrite(delayed_write_enabled=True, delay_seconds=ms(10))
+        pending_timers = set(PendingTimers._timers)
+        for commit_count in range(1, 11):
+            mixin_delayed_write._restart_delayed_timer()
+            timer = mixin_delayed_write._timer
+            self.assertTrue(mixin_delayed_write.wait_for_commits(commit_count))
+            timer.thread.join()
+        mixin_delayed_write._restart_delayed_timer()
+        mixin_delayed_write._flush_delayed_write()
+        self.assertEqual(pending_timers, PendingTimers._timers)
+
+        async def _main():
+            mixin_delayed_write._restart_delayed_timer()
+            mixin_delayed_write._restart_delayed_timer()
+            await mixin_delayed_write._aflush_delayed_write()
+            mixin_delayed_write._restart_delayed_timer()
+            await asyncio.get_running_loop().run_in_executor(None, mixin_delayed_write.wait_for_commits, 13)
+        asyncio.run(_main())
+        self.assertEqual(13, mixin_delayed_write.commit_count)
+        self.assertEqual(pending_timers, PendingTimers._timers)
+
+    def test_flush(self):
+        """
+        Test that flush commits immediately and cancels the timer
+        """
+        mixin_delayed_write = MockMixinDelayedWrite(delayed_write_enabled=True, delay_seconds=ms(50))
+        mixin_delayed_write._restart_delayed_timer()
+        mixin_delayed_write._flush_delayed_write()
+        self.assertEqual(1, mixin_delayed_write.commit_count)
+        time.sleep(ms(100))
+        self.assertEqual(1, mixin_delayed_write.commit_count)
+
+    def test_loop_timer(self):
+        """
+        Test that the timer is scheduled on the running event loop
+        """
+        mixin_delayed_write = MockMixinDelayedWrite(delayed_write_enabled=True, delay_seconds=ms(50))
+
+        async def _main():
+            loop = asyncio.get_running_loop()
+            mixin_delayed_write._restart_delayed_timer()
+            timer = mixin_delayed_write._timer
+            self.assertIsInstance(timer, LoopTimer)
+            first_handle = timer.handle
+            # the timer can't fire before the loop runs again
+            mixin_delayed_write._restart_delayed_timer()
+            self.assertTrue(first_handle.cancelled())
+            self.assertGreaterEqual(timer.handle.when(), first_handle.when())
+            # restart from another thread is scheduled in the loop
+            restarted_handle = timer.handle
+            await loop.run_in_executor(None, mixin_delayed_write._restart_delayed_timer)
+            await asyncio.sleep(0)
+            self.assertTrue(restarted_handle.cancelled())
+            self.assertIs(timer, mixin_delayed_write._timer)
+            self.assertEqual(0, mixin_delayed_write.commit_count)
+            self.assertTrue(await loop.run_in_executor(None, mixin_delayed_write.wait_for_commits, 1))
+            self.assertIsNone(mixin_delayed_write._timer)
+
+        asyncio.run(_main())
+        self.assertEqual(1, mixin_delayed_write.commit_count)
+
+    def test_loop_timer_immediate_write(self):
+        """
+        Test that the immediate write is offloaded to the executor of the loop
+        """
+        mixin_delayed_write = MockMixinDelayedWrite(delayed_write_enabled=False)
+        asyncio.run(mixin_delayed_write._arestart_delayed_timer())
+        self.assertEqual(1, mixin_delayed_write.commit_count)
+        self.assertIsNone(mixin_delayed_write._timer)
+
 
 if __name__ == '__main__':
     unittest.main()
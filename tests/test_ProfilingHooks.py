@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from configmodel import ConfigModel
+from configmodel.ProfilingHooks import ProfilingHooks
+
+
+class TestProfilingHooks(unittest.TestCase):
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+
+        photos_api = GoogleApi()
+
+    class RecordingHook(ProfilingHooks.Hook):
+
+        def __init__(self):
+            self.calls = []
+            self.durations = []
+
+        def before(self, event):
+            self.calls.append(("before", event.operation))
+
+        def after(self, event):
+            self.calls.append(("after", event.operation))
+            self.durations.append(event.duration)
+
+    class Tracer:
+
+        class Span:
+            def __init__(self, name, attributes):
+                self.name = name
+                self.attributes = dict(attributes)
+                self.exception = None
+                self.ended = False
+
+            def set_attribute(self, key, value):
+                self.attributes[key] = value
+
+            def record_exception(self, exception):
+                self.exception = exception
+
+            def end(self):
+                self.ended = True
+
+        def __init__(self):
+            self.spans = []
+
+        def start_span(self, name, attributes=None):
+            span = self.Span(name, attributes or {})
+            self.spans.append(span)
+            return span
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_ProfilingHooks_")
+        self.filename = os.path.join(self._temp_dir.name, "config.ini")
+        self._hooks = []
+
+    def tearDown(self):
+        super().tearDown()
+        for hook in self._hooks:
+            ProfilingHooks.remove_hook(hook)
+        self._temp_dir.cleanup()
+
+    def _add_hook(self, hook):
+        ProfilingHooks.add_hook(hook)
+        self._hooks.append(hook)
+        return hook
+
+    def test_disabled(self):
+        """
+        Test that serializers are not instrumented if there are no hooks
+        """
+        config = self.AppConfig(self.filename)
+        self.assertFalse(ProfilingHooks.is_enabled())
+        self.assertNotIn("get_value", vars(config._serializer))
+
+    def test_events(self):
+        """
+        Test that hooks are called before and after operations
+        """
+        hook = self._add_hook(self.RecordingHook())
+        config = self.AppConfig(self.filename)
+        self.assertEqual([("before", "initialize_fields"), ("before", "write_default_values"),
+                          ("after", "write_default_values"), ("after", "initialize_fields")], hook.calls)
+        hook.calls.clear()
+        config.font_size = 14
+        self.assertEqual(14, config.font_size)
+        config.reload()
+        config.patch([])
+        self.assertEqual([("before", "set_value"), ("before", "restart_timer"), ("before", "commit"),
+                          ("after", "commit"), ("after", "restart_timer"), ("after", "set_value"),
+                          ("before", "get_value"), ("after", "get_value"),
+                          ("before", "reload"), ("after", "reload"),
+                          ("before", "set_values"), ("before", "restart_timer"), ("before", "commit"),
+                          ("after", "commit"), ("after", "restart_timer"), ("after", "set_values")],
+                         hook.calls)
+        self.assertNotIn(None, hook.durations)
+
+    def test_tracer(self):
+        tracer = self.Tracer()
+        self._add_hook(ProfilingHooks.TracerHook(tracer, operations=["initialize_fields", "set_value"]))
+        config = self.AppConfig(self.filename)
+        config.photos_api.client_id = "1234"
+        self.assertEqual(["configmodel.initialize_fields", "configmodel.set_value"], [span.name for span in tracer.spans])
+        initialize_span, set_span = tracer.spans
+        self.assertEqual({"configmodel.file", "configmodel.model", "configmodel.duration"}, set(initialize_span.attributes))
+        self.assertEqual("AppConfig", initialize_span.attributes["configmodel.model"])
+        self.assertEqual("photos_api.client_id", set_span.attributes["configmodel.path"])
+        self.assertTrue(all(span.ended for span in tracer.spans))
+
+        # failed operations are recorded
+        with self.assertRaises(ValueError):
+            config._serializer.set_value([], 1)
+        self.assertIsInstance(tracer.spans[-1].exception, ValueError)
+        self.assertTrue(tracer.spans[-1].ended)
+
+    def test_cprofile(self):
+        hook = self._add_hook(ProfilingHooks.CProfileHook())
+        config = self.AppConfig(self.filename)
+        config.font_size = 14
+        functions = {function_name for _, _, function_name in hook.get_stats().stats}
+        self.assertIn("_write_document", functions)
+        self.assertIn("write_default_values_from_model", functions)
+        # get_value is not profiled by default
+        self.assertNotIn("get_value", functions)
+
+    def test_cprofile_threads(self):
+        """
+        Test that operations running in several threads at the same time are profiled in every thread
+        """
+        hook = ProfilingHooks.CProfileHook(operations=["commit"])
+        barrier = threading.Barrier(2)
+        profilers = []
+
+        def operation_a():
+            barrier.wait()
+
+        def operation_b():
+            barrier.wait()
+
+        def profile_operation(operation):
+            event = ProfilingHooks.Event("commit", self.filename)
+            hook.before(event)
+            barrier.wait()
+            operation()
+            hook.after(event)
+            profilers.append(sys.getprofile())
+
+        threads = [threading.Thread(target=profile_operation, args=(operation,)) for operation in (operation_a, operation_b)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        functions = {function_name for _, _, function_name in hook.get_stats().stats}
+        self.assertIn("operation_a", functions)
+        self.assertIn("operation_b", functions)
+        # profiling is disabled in both threads
+        self.assertEqual([None, None], profilers)
+
+
+if __name__ == '__main__':
+    unittest.main()
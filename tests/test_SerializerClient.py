@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import configparser
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+from configmodel import ConfigModel
+from configmodel.SerializerClient import SerializerClient
+from configmodel.SerializersFactory import SerializersFactory
+from configmodel.server import ConfigServer
+
+
+@unittest.skipUnless(hasattr(ConfigServer, "address_family"), "Unix domain sockets are not supported")
+class TestSerializerClient(unittest.TestCase):
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+            secret = "<secret>"
+
+        photos_api = GoogleApi()
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_SerializerClient_")
+        self.filename = os.path.join(self._temp_dir.name, "config.ini")
+        self.server = ConfigServer(self.filename)
+        self.socket_path = self.filename + ConfigServer.SOCKET_SUFFIX
+        self._server_thread = threading.Thread(target=self.server.serve_forever)
+        self._server_thread.start()
+
+    def tearDown(self):
+        super().tearDown()
+        self.server.shutdown()
+        self._server_thread.join()
+        self.server.server_close()
+        self._temp_dir.cleanup()
+
+    def _read_ini(self):
+        ini = configparser.ConfigParser()
+        ini.read(self.filename)
+        return ini
+
+    def test_factory(self):
+        self.assertIsInstance(SerializersFactory.get_serializer_by_filename(self.socket_path), SerializerClient)
+
+    def test_push_changes(self):
+        """
+        Test that values written by one client are pushed to other clients
+        """
+        config = self.AppConfig(self.socket_path)
+        # client of another process
+        other_config = self.AppConfig(SerializerClient(self.socket_path))
+        self.assertEqual(self.socket_path, config._serializer.filename)
+        self.assertEqual("<secret>", self._read_ini()["photos_api"]["secret"])
+        self.assertEqual(12, config.font_size)
+
+        changes = []
+        other_config._serializer.add_change_listener(changes.append)
+        config.photos_api.client_id = "1234"
+        # the writing client sees its change immediately
+        self.assertEqual("1234", config.photos_api.client_id)
+        self.assertEqual("1234", self._read_ini()["photos_api"]["client_id"])
+        for _ in range(100):
+            if changes:
+                break
+            time.sleep(0.01)
+        self.assertEqual("1234", other_config.photos_api.client_id)
+        self.assertEqual([["photos_api", "client_id"]], [change.path for change in changes])
+
+        # batched writes
+        config._serializer.set_values([(["font_size"], 14), (["photos_api", "secret"], "new")])
+        self.assertEqual(14, config.font_size)
+        self.assertEqual("new", self._read_ini()["photos_api"]["secret"])
+
+        # changes of the file are reloaded by the server
+        with open(self.filename, "w") as f:
+            f.write("[photos_api]\nclient_id = changed\n")
+        other_config.reload()
+        self.assertEqual("changed", other_config.photos_api.client_id)
+
+    def test_reconnect(self):
+        """
+        Test that the client reconnects if the connection was closed
+        """
+        config = self.AppConfig(self.socket_path)
+        serializer = config._serializer
+        serializer.close()
+        self.assertIsNone(serializer._file)
+        config.font_size = 16
+        self.assertEqual(16, config.font_size)
+        self.assertEqual("16", self._read_ini()["Global"]["font_size"])
+        with self.assertRaises(Exception):
+            serializer._send_request("unknown")
+
+    def test_connection_closed_while_connecting(self):
+        """
+        Test that a request fails immediately if the connection is closed before the reply to default values
+        """
+        socket_path = os.path.join(self._temp_dir.name, "closing.sock")
+        listening_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listening_socket.bind(socket_path)
+        listening_socket.listen(1)
+
+        def _close_connection():
+            connection, _ = listening_socket.accept()
+            # request of default values
+            connection.recv(4096)
+            connection.close()
+
+        thread = threading.Thread(target=_close_connection)
+        thread.start()
+        serializer = SerializerClient(socket_path)
+        start_time = time.monotonic()
+        try:
+            with unittest.mock.patch.object(SerializerClient, "REQUEST_TIMEOUT", 5.0):
+                with self.assertRaises(ConnectionError):
+                    serializer.flush()
+        finally:
+            thread.join()
+            listening_socket.close()
+        self.assertLess(time.monotonic() - start_time, SerializerClient.REQUEST_TIMEOUT / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import configparser
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from configmodel import ConfigModel
+from configmodel.SerializerDirectory import SerializerDirectory
+from configmodel.SerializerIni import SerializerIni
+
+
+class TestSerializerDirectory(unittest.TestCase):
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+        language = "en"
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+            secret = "<secret>"
+
+        photos_api = GoogleApi()
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_SerializerDirectory_")
+        self.directory = os.path.join(self._temp_dir.name, "app.d")
+        self.base_filename = os.path.join(self._temp_dir.name, "app.ini")
+        os.mkdir(self.directory)
+        self._write_file(self.base_filename, "[Global]\nfont_size = 14\nlanguage = de\n")
+        self._write_file(self._fragment("10-language.ini"), "[Global]\nlanguage = fr\n")
+        self._write_file(self._fragment("20-photos.ini"), "[photos_api]\nclient_id = fragment\n")
+        self._write_file(self._fragment("notes.txt"), "not a fragment\n")
+
+    def tearDown(self):
+        super().tearDown()
+        self._temp_dir.cleanup()
+
+    def _fragment(self, name):
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def _write_file(filename, text):
+        with open(filename, "w") as f:
+            f.write(text)
+        # modification time must change even on file systems with coarse timestamps
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, time.time_ns() + len(text)))
+
+    def test_merge(self):
+        """
+        Test that fragments are merged in lexical order and values are written to the override file
+        """
+        serializer = SerializerDirectory(self.directory, base_filename=self.base_filename)
+        config = self.AppConfig(serializer)
+        self.assertEqual([self._fragment("10-language.ini"), self._fragment("20-photos.ini")], serializer.get_fragments())
+        self.assertEqual("14", config.font_size)
+        self.assertEqual("fr", config.language)
+        self.assertEqual("fragment", config.photos_api.client_id)
+        self.assertEqual("<secret>", config.photos_api.secret)
+        # provenance of values
+        self.assertEqual(self.base_filename, serializer.get_layer(["font_size"]).filename)
+        self.assertEqual(self._fragment("10-language.ini"), serializer.get_layer(["language"]).filename)
+        self.assertIsNone(serializer.get_layer(["photos_api", "secret"]))
+
+        config.language = "es"
+        self.assertEqual("es", config.language)
+        override = configparser.ConfigParser()
+        override.read(self._fragment(SerializerDirectory.OVERRIDE_FILENAME))
+        self.assertEqual("es", override["Global"]["language"])
+        with open(self._fragment("10-language.ini")) as f:
+            self.assertEqual("[Global]\nlanguage = fr\n", f.read())
+
+    def test_filename(self):
+        """
+        Test that directories with .d extension are config directories
+        """
+        config = self.AppConfig(self.directory)
+        self.assertIsInstance(config._serializer, SerializerDirectory)
+        self.assertEqual("fr", config.language)
+        self.assertEqual(12, config.font_size)
+
+    def test_reload(self):
+        """
+        Test that only changed, added and removed fragments are parsed on reload
+        """
+        serializer = SerializerDirectory(self.directory, base_filename=self.base_filename)
+        config = self.AppConfig(serializer)
+        changes = []
+        serializer.add_change_listener(changes.append)
+
+        with patch.object(SerializerIni, "_load_document", autospec=True, side_effect=SerializerIni._load_document) as load_document:
+            config.reload()
+            self.assertEqual([], load_document.call_args_list)
+
+            # changed fragment, value removed from a fragment
+            self._write_file(self._fragment("20-photos.ini"), "[photos_api]\nsecret = fragment secret\n")
+            # added fragment
+            self._write_file(self._fragment("15-font.ini"), "[Global]\nfont_size = 16\n")
+            config.reload()
+            self.assertEqual({self._fragment("20-photos.ini"), self._fragment("15-font.ini")},
+                             {call.args[0].filename for call in load_document.call_args_list})
+        self.assertEqual("16", config.font_size)
+        self.assertEqual("<client id>", config.photos_api.client_id)
+        self.assertEqual("fragment secret", config.photos_api.secret)
+        self.assertEqual(sorted([["font_size"], ["photos_api", "client_id"], ["photos_api", "secret"]]),
+                         sorted(change.path for change in changes))
+
+        # removed fragment
+        os.remove(self._fragment("10-language.ini"))
+        config.reload()
+        self.assertEqual("de", config.language)
+        self.assertEqual(self.base_filename, serializer.get_layer(["language"]).filename)
+        self.assertEqual([self._fragment("15-font.ini"), self._fragment("20-photos.ini")], serializer.get_fragments())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+import warnings
+
+from configmodel import ConfigModel
+from configmodel.SerializerEnvironment import SerializerEnvironment
+from configmodel.SerializerIni import SerializerIni
+from configmodel.SerializerLayered import SerializerLayered
+
+
+class TestSerializerEnvironment(unittest.TestCase):
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+        ratio = 0.5
+        dark_mode = False
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+
+        photos_api = GoogleApi()
+
+    def test_typed_values(self):
+        """
+        Test that variables are mapped to fields and converted to types of default values
+        """
+        environ = {"APP_FONT_SIZE": "14", "APP_RATIO": "1.5", "APP_DARK_MODE": "Yes", "APP_PHOTOS_API__CLIENT_ID": "1234",
+                   "OTHER_FONT_SIZE": "20"}
+        serializer = SerializerEnvironment("app", environ=environ)
+        config = self.AppConfig(serializer)
+        self.assertEqual(14, config.font_size)
+        self.assertEqual(1.5, config.ratio)
+        self.assertIs(True, config.dark_mode)
+        self.assertEqual("1234", config.photos_api.client_id)
+        self.assertEqual("APP_PHOTOS_API__CLIENT_ID", serializer.get_variable_name(["photos_api", "client_id"]))
+        self.assertEqual([], serializer.unknown_variables)
+        with self.assertRaises(Exception):
+            config.font_size = 10
+
+        # variables are read only by refresh()
+        changes = []
+        serializer.add_change_listener(changes.append)
+        environ["APP_FONT_SIZE"] = "16"
+        del environ["APP_DARK_MODE"]
+        self.assertEqual(14, config.font_size)
+        serializer.refresh()
+        self.assertEqual(16, config.font_size)
+        self.assertIs(False, config.dark_mode)
+        self.assertEqual([(["font_size"], 16), (["dark_mode"], False)], [(change.path, change.value) for change in changes])
+
+        environ["APP_FONT_SIZE"] = "big"
+        with self.assertRaises(ValueError):
+            serializer.refresh()
+
+    def test_unknown_variables(self):
+        """
+        Test that variables with the prefix, which don't match fields, are reported
+        """
+        environ = {"APP_FONT_SIZ": "14", "APP_PHOTOS_API_CLIENT_ID": "1234"}
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter("always")
+            serializer = SerializerEnvironment("APP", environ=environ)
+            self.AppConfig(serializer)
+        self.assertEqual(["APP_FONT_SIZ", "APP_PHOTOS_API_CLIENT_ID"], serializer.unknown_variables)
+        self.assertEqual(1, len(caught_warnings))
+        with self.assertRaises(Exception):
+            self.AppConfig(SerializerEnvironment("APP", environ=environ, strict=True))
+
+    def test_layer(self):
+        """
+        Test that variables override values of files
+        """
+        with tempfile.TemporaryDirectory(prefix="test_SerializerEnvironment_") as temp_dir:
+            filename = os.path.join(temp_dir, "config.ini")
+            with open(filename, "w") as f:
+                f.write("[Global]\nfont_size = 20\nratio = 2.5\n")
+            environ = {"APP_FONT_SIZE": "14"}
+            environment = SerializerEnvironment(environ=environ)
+            config = self.AppConfig(SerializerLayered([SerializerIni(filename), environment], write_layer=0))
+            self.assertEqual(14, config.font_size)
+            self.assertEqual("2.5", config.ratio)
+            self.assertIs(False, config.dark_mode)
+            del environ["APP_FONT_SIZE"]
+            config.reload()
+            self.assertEqual("20", config.font_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,15 @@
 import configparser
 import os
 import random
+import stat
 import string
 import tempfile
+import threading
 import unittest
+from unittest.mock import patch
 
 from configmodel import config_file, ConfigModel
+from configmodel.IniTokenizer import IniTokenizer
 from configmodel.SerializerIni import SerializerIni
 
 
@@ -237,6 +241,293 @@ class TestSerializerIni(unittest.TestCase):
         with self.assertRaises(Exception):
             serializer.set_value([], "value")
 
+    def test_reload(self):
+        """
+        Test that reload() reads values changed by other programs, but preserves values not written yet
+        """
+        filename = self._get_temp_file()
+
+        class AppConfig(ConfigModel):
+            product_key = "1234"
+            secret = "abcd"
+
+            class ApiKey(ConfigModel):
+                client_id = "<insert client id>"
+
+        app_config = AppConfig(filename)
+        serializer = app_config._serializer
+        changes = []
+        serializer.add_change_listener(changes.append)
+
+        # nothing changed
+        app_config.reload()
+        self.assertEqual([], changes)
+
+        # change the file
+        parser = configparser.ConfigParser()
+        parser.read(filename)
+        parser[SerializerIni.DEFAULT_SECTION]["product_key"] = "changed value"
+        parser[SerializerIni.DEFAULT_SECTION]["secret"] = "changed secret"
+        parser["api_key"]["client_id"] = "changed client id"
+        with open(filename, "w") as f:
+            parser.write(f)
+
+        # secret is changed by the application, but not written yet
+        serializer._set_delayed_write(True, delay_seconds=10)
+        app_config.secret = "application secret"
+        changes.clear()
+
+        app_config.reload()
+        self.assertEqual([["api_key", "client_id"], ["product_key"]], sorted(change.path for change in changes))
+        self.assertEqual("changed value", app_config.product_key)
+        self.assertEqual("application secret", app_config.secret)
+        self.assertEqual("changed client id", app_config.ApiKey.client_id)
+        self.assertEqual(3, app_config._version)
+        self.assertEqual(1, app_config.ApiKey._version)
+
+        serializer.flush()
+        parser = configparser.ConfigParser()
+        parser.read(filename)
+        self.assertEqual("application secret", parser[SerializerIni.DEFAULT_SECTION]["secret"])
+
+    def test_sidecar_cache(self):
+        """
+        Test that INI file is parsed only if the file or the model was changed
+        """
+        filename = self._get_temp_file()
+        self.addCleanup(setattr, SerializerIni, "sidecar_cache_enabled", SerializerIni.sidecar_cache_enabled)
+        SerializerIni.sidecar_cache_enabled = True
+
+        class AppConfig(ConfigModel):
+            product_key = "1234"
+
+            class ApiKey(ConfigModel):
+                client_id = "<insert client id>"
+
+            api_key = ApiKey()
+
+        AppConfig(filename)
+        self.assertTrue(os.path.isfile(filename + SerializerIni.SIDECAR_CACHE_SUFFIX))
+
+        # file is not changed, values are loaded from sidecar cache
+        with patch.object(IniTokenizer, "read_lines") as mock_read:
+            app_config = AppConfig(filename)
+            mock_read.assert_not_called()
+        self.assertEqual("1234", app_config.product_key)
+        self.assertEqual("<insert client id>", app_config.api_key.client_id)
+
+        # sidecar cache is updated on commit
+        app_config.api_key.client_id = "98"
+        with patch.object(IniTokenizer, "read_lines") as mock_read:
+            app_config = AppConfig(filename)
+            mock_read.assert_not_called()
+        self.assertEqual("98", app_config.api_key.client_id)
+
+        # file is changed by another program
+        with open(filename, "a") as f:
+            f.write("[new_section]\nnew_parameter = new value\n")
+        with patch.object(IniTokenizer, "read_lines", wraps=IniTokenizer.read_lines) as mock_read:
+            app_config = AppConfig(filename)
+            mock_read.assert_called()
+        self.assertEqual("98", app_config.api_key.client_id)
+        self.assertEqual("new value", app_config._serializer.get_value(["new_section", "new_parameter"]))
+
+        # model is changed
+        class ChangedAppConfig(ConfigModel):
+            product_key = "1234"
+            secret = "abcd"
+
+        with patch.object(IniTokenizer, "read_lines", wraps=IniTokenizer.read_lines) as mock_read:
+            changed_config = ChangedAppConfig(filename)
+            mock_read.assert_called()
+        self.assertEqual("abcd", changed_config.secret)
+
+    def test_sidecar_cache_invalid(self):
+        """
+        Test that broken sidecar cache is ignored
+        """
+        filename = self._get_temp_file()
+        self.addCleanup(setattr, SerializerIni, "sidecar_cache_enabled", SerializerIni.sidecar_cache_enabled)
+        SerializerIni.sidecar_cache_enabled = True
+
+        class AppConfig(ConfigModel):
+            product_key = "1234"
+
+        AppConfig(filename)
+        with open(filename + SerializerIni.SIDECAR_CACHE_SUFFIX, "wb") as f:
+            f.write(b"garbage")
+        app_config = AppConfig(filename)
+        self.assertEqual("1234", app_config.product_key)
+
+    def test_sidecar_cache_temp_file(self):
+        """
+        Test that sidecar cache is written through a unique temporary file, which doesn't collide with other processes
+        """
+        filename = self._get_temp_file()
+        self.addCleanup(setattr, SerializerIni, "sidecar_cache_enabled", SerializerIni.sidecar_cache_enabled)
+        SerializerIni.sidecar_cache_enabled = True
+        cache_filename = filename + SerializerIni.SIDECAR_CACHE_SUFFIX
+        # temporary file name used by another process
+        os.mkdir(cache_filename + ".tmp")
+
+        class AppConfig(ConfigModel):
+            product_key = "1234"
+
+        AppConfig(filename)
+        self.assertTrue(os.path.isfile(cache_filename))
+        self.assertEqual(stat.S_IMODE(os.stat(filename).st_mode), stat.S_IMODE(os.stat(cache_filename).st_mode))
+        directory = os.path.dirname(filename)
+        self.assertEqual([cache_filename + ".tmp"],
+                         [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".tmp")])
+
+    def test_lazy_loading(self):
+        """
+        Test that only sections used by the model are parsed on load
+        """
+        filename = self._get_temp_file()
+        for attribute in ["lazy_loading_enabled", "section_index_persistent"]:
+            self.addCleanup(setattr, SerializerIni, attribute, getattr(SerializerIni, attribute))
+        SerializerIni.lazy_loading_enabled = True
+        SerializerIni.section_index_persistent = True
+
+        with open(filename, "w") as f:
+            f.write("[Global]\nproduct_key = 9810347\n[api_key]\nclient_id = 8298\n")
+            for section_index in range(100):
+                f.write(f"[generated_{section_index}]\nvalue = {section_index}\n")
+
+        class AppConfig(ConfigModel):
+            product_key = "1234"
+
+            class ApiKey(ConfigModel):
+                client_id = "<insert client id>"
+
+            api_key = ApiKey()
+
+        app_config = AppConfig(filename)
+        serializer = app_config._serializer
+        self.assertEqual(100, len(serializer._unparsed_sections))
+        self.assertTrue(os.path.isfile(filename + SerializerIni.SECTION_INDEX_SUFFIX))
+        self.assertEqual("9810347", app_config.product_key)
+        self.assertEqual("8298", app_config.api_key.client_id)
+
+        # section is parsed on first access
+        self.assertEqual("5", serializer.get_value(["generated_5", "value"]))
+        self.assertEqual(99, len(serializer._unparsed_sections))
+
+        # byte ranges are updated after writing
+        app_config.product_key = "a much longer product key"
+        self.assertEqual("50", serializer.get_value(["generated_50", "value"]))
+        self.assertIsNone(serializer.get_value(["generated_50", "unknown"]))
+        self.assertIsNone(serializer.get_value(["unknown", "unknown"]))
+
+        # and after the file is changed by another program
+        with open(filename, "a") as f:
+            f.write("[appended]\nvalue = appended\n")
+        app_config.reload()
+        self.assertEqual("appended", serializer.get_value(["appended", "value"]))
+        self.assertEqual("60", serializer.get_value(["generated_60", "value"]))
+
+        # persistent index is used by the next instance
+        with patch.object(IniTokenizer, "build_section_index") as mock_build_section_index:
+            app_config = AppConfig(filename)
+            mock_build_section_index.assert_not_called()
+        self.assertEqual("a much longer product key", app_config.product_key)
+        self.assertEqual("70", app_config._serializer.get_value(["generated_70", "value"]))
+
+        # all sections are parsed for comparison
+        self.assertEqual([], app_config._serializer.diff_file(filename))
+        self.assertIsNone(app_config._serializer._unparsed_sections)
+
+    def test_lazy_loading_fallback(self):
+        """
+        Test that files which can't be loaded lazily are loaded as usual
+        """
+        filename = self._get_temp_file()
+        self.addCleanup(setattr, SerializerIni, "lazy_loading_enabled", SerializerIni.lazy_loading_enabled)
+        SerializerIni.lazy_loading_enabled = True
+
+        class AppConfig(ConfigModel):
+            product_key = "1234"
+            secret = "abcd"
+
+        # new file, default values must be written
+        app_config = AppConfig(filename)
+        self.assertIsNone(app_config._serializer._unparsed_sections)
+
+        # interpolation is not supported in lazy sections
+        with open(filename, "a") as f:
+            f.write("[percent]\nvalue = 100%%\n")
+        app_config = AppConfig(filename)
+        self.assertEqual({"percent"}, set(app_config._serializer._unparsed_sections))
+        self.assertEqual("100%", app_config._serializer.get_value(["percent", "value"]))
+        self.assertIsNone(app_config._serializer._unparsed_sections)
+
+    def test_value_set_during_commit(self):
+        """
+        Test that a value set by another thread while values are being written is written by the next commit
+        """
+        filename = self._get_temp_file()
+
+        class AppConfig(ConfigModel):
+            font_size = 12
+
+        app_config = AppConfig(filename)
+        serializer = app_config._serializer
+        serializer._set_delayed_write(True, delay_seconds=10)
+        app_config.font_size = 14
+        write_document = serializer._write_document
+
+        def _write_document_and_set_value(document, changes):
+            write_document(document, changes)
+            serializer.set_cached_value(["font_size"], 16)
+
+        with patch.object(serializer, "_write_document", _write_document_and_set_value):
+            serializer.flush()
+        self.assertEqual("14", SerializerIni.read_values(filename)[0][1])
+        self.assertTrue(serializer._is_dirty)
+        serializer.flush()
+        self.assertEqual("16", SerializerIni.read_values(filename)[0][1])
+
+        # values which could not be written are written by the next commit
+        app_config.font_size = 18
+        with patch.object(serializer, "_write_document", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                serializer.flush()
+        serializer.flush()
+        self.assertEqual("18", SerializerIni.read_values(filename)[0][1])
+
+    def test_concurrent_writers(self):
+        """
+        Test that last values of all writers are written, while values are committed by another thread
+        """
+        filename = self._get_temp_file()
+        writer_count = 4
+        AppConfig = type("AppConfig", (ConfigModel,), {f"writer_{index}": 0 for index in range(writer_count)})
+        app_config = AppConfig(filename)
+        app_config._serializer._set_delayed_write(True, delay_seconds=0.001)
+        stop_event = threading.Event()
+
+        def _write(index):
+            for value in range(1, 501):
+                setattr(app_config, f"writer_{index}", value)
+
+        def _commit():
+            while not stop_event.is_set():
+                app_config._serializer.flush()
+
+        committer = threading.Thread(target=_commit)
+        committer.start()
+        writers = [threading.Thread(target=_write, args=(index,)) for index in range(writer_count)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        stop_event.set()
+        committer.join()
+        app_config._serializer.flush()
+        self.assertEqual({f"writer_{index}": "500" for index in range(writer_count)}, dict(
+            (".".join(path), value) for path, value in SerializerIni.read_values(filename)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import unittest
+
+from configmodel import ConfigModel
+from configmodel.SerializerJson import SerializerJson
+from configmodel.SerializersFactory import SerializersFactory
+
+
+class TestSerializerJson(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_SerializerJson_")
+        self.filename = os.path.join(self._temp_dir.name, "config.json")
+
+    def tearDown(self):
+        super().tearDown()
+        self._temp_dir.cleanup()
+
+    def _read_file(self):
+        with open(self.filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_file(self, data):
+        with open(self.filename, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+        dark_mode = False
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+            secret = "<secret>"
+
+        photos_api = GoogleApi()
+
+    def test_factory(self):
+        self.assertIsInstance(SerializersFactory.get_serializer_by_filename("config.json"), SerializerJson)
+
+    def test_default_values(self):
+        """
+        Test that default values are written as nested objects, existing values and unknown keys are preserved
+        """
+        config = self.AppConfig(self.filename)
+        self.assertEqual({"font_size": 12, "dark_mode": False, "photos_api": {"client_id": "<client id>", "secret": "<secret>"}},
+                         self._read_file())
+
+        self._write_file({"font_size": 14, "photos_api": {"client_id": 1234, "scopes": ["a", "b"]}, "unknown": None})
+        config = self.AppConfig(self.filename)
+        # values keep native types
+        self.assertEqual(14, config.font_size)
+        self.assertEqual(1234, config.photos_api.client_id)
+        self.assertEqual(["a", "b"], config._serializer.get_value(["photos_api", "scopes"]))
+        data = self._read_file()
+        self.assertEqual(False, data["dark_mode"])
+        self.assertEqual("<secret>", data["photos_api"]["secret"])
+        self.assertIsNone(data["unknown"])
+
+    def test_commit_and_reload(self):
+        """
+        Test that changed values are written and values changed by other processes are reloaded
+        """
+        config = self.AppConfig(self.filename)
+        serializer = config._serializer
+        serializer._set_delayed_write(True, delay_seconds=10)
+
+        config.font_size = 16
+        config.photos_api.secret = "new secret"
+        self.assertEqual(12, self._read_file()["font_size"])
+        serializer.flush()
+        data = self._read_file()
+        self.assertEqual(16, data["font_size"])
+        self.assertEqual("new secret", data["photos_api"]["secret"])
+
+        data["photos_api"]["client_id"] = "changed"
+        self._write_file(data)
+        changes = []
+        serializer.add_change_listener(changes.append)
+        config.reload()
+        self.assertEqual("changed", config.photos_api.client_id)
+        self.assertEqual([["photos_api", "client_id"]], [change.path for change in changes])
+
+    def test_conflicting_paths(self):
+        """
+        Test that values can't replace nested objects and vice versa
+        """
+        self._write_file({"photos_api": "not an object"})
+        with self.assertRaises(Exception):
+            self.AppConfig(self.filename)
+        self._write_file({"font_size": {"nested": 1}})
+        with self.assertRaises(Exception):
+            self.AppConfig(self.filename)
+        self._write_file([1, 2])
+        with self.assertRaises(Exception):
+            self.AppConfig(self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
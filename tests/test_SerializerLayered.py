@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import configparser
+import os
+import tempfile
+import unittest
+
+from configmodel import ConfigModel
+from configmodel.SerializerIni import SerializerIni
+from configmodel.SerializerLayered import SerializerLayered
+
+
+class TestSerializerLayered(unittest.TestCase):
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+        language = "en"
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+            secret = "<secret>"
+
+        photos_api = GoogleApi()
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_SerializerLayered_")
+        self.shipped_filename = os.path.join(self._temp_dir.name, "app.ini")
+        self.override_filename = os.path.join(self._temp_dir.name, "override.ini")
+        with open(self.shipped_filename, "w") as f:
+            f.write("[Global]\nfont_size = 14\nlanguage = de\n\n[photos_api]\nclient_id = shipped\n")
+        with open(self.override_filename, "w") as f:
+            f.write("[Global]\nlanguage = fr\n")
+
+    def tearDown(self):
+        super().tearDown()
+        self._temp_dir.cleanup()
+
+    def _read_ini(self, filename):
+        ini = configparser.ConfigParser()
+        ini.read(filename)
+        return ini
+
+    def test_resolve_values(self):
+        """
+        Test that values are taken from the highest layer which has them
+        """
+        serializer = SerializerLayered.from_filenames([self.shipped_filename, self.override_filename])
+        config = self.AppConfig(serializer)
+        self.assertEqual("14", config.font_size)
+        self.assertEqual("fr", config.language)
+        self.assertEqual("shipped", config.photos_api.client_id)
+        self.assertEqual("<secret>", config.photos_api.secret)
+        self.assertIs(serializer.layers[1], serializer.get_layer(["language"]))
+        self.assertIs(serializer.layers[0], serializer.get_layer(["font_size"]))
+        self.assertIsNone(serializer.get_layer(["photos_api", "secret"]))
+        # default values are not written to layers
+        self.assertFalse(self._read_ini(self.override_filename).has_section("photos_api"))
+        self.assertFalse(self._read_ini(self.shipped_filename).has_option("photos_api", "secret"))
+
+    def test_write_layer(self):
+        """
+        Test that values are written to the write layer and only changed paths are resolved again
+        """
+        serializer = SerializerLayered.from_filenames([self.shipped_filename, self.override_filename])
+        config = self.AppConfig(serializer)
+        changes = []
+        serializer.add_change_listener(changes.append)
+
+        config.photos_api.secret = "new secret"
+        self.assertEqual("new secret", config.photos_api.secret)
+        self.assertEqual("new secret", self._read_ini(self.override_filename)["photos_api"]["secret"])
+        self.assertFalse(self._read_ini(self.shipped_filename).has_option("photos_api", "secret"))
+        self.assertEqual([["photos_api", "secret"]], [change.path for change in changes])
+
+        # change of a lower layer is hidden by the override
+        shipped_layer = serializer.layers[0]
+        shipped_layer.set_value(["language"], "es")
+        self.assertEqual("fr", config.language)
+        shipped_layer.set_value(["font_size"], "16")
+        self.assertEqual("16", config.font_size)
+        self.assertEqual([["photos_api", "secret"], ["font_size"]], [change.path for change in changes])
+
+        # reloaded values of layers
+        with open(self.override_filename, "w") as f:
+            f.write("[Global]\nlanguage = it\n")
+        config.reload()
+        self.assertEqual("it", config.language)
+
+    def test_layers(self):
+        """
+        Test writing to a selected layer
+        """
+        override = SerializerIni(self.override_filename)
+        serializer = SerializerLayered([SerializerIni(self.shipped_filename), override], write_layer=0)
+        self.assertEqual(self.shipped_filename, serializer.filename)
+        config = self.AppConfig(serializer)
+        config.language = "cz"
+        # value is written, but the override has higher priority
+        self.assertEqual("cz", self._read_ini(self.shipped_filename)["Global"]["language"])
+        self.assertEqual("fr", config.language)
+        with self.assertRaises(ValueError):
+            SerializerLayered([])
+
+
+if __name__ == '__main__':
+    unittest.main()
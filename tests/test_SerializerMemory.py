@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from configmodel import ConfigModel
+from configmodel.SerializerMemory import SerializerMemory
+from configmodel.SerializersFactory import SerializersFactory
+from configmodel.pytest_plugin import restored_memory_values
+
+
+class TestSerializerMemory(unittest.TestCase):
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+
+        photos_api = GoogleApi()
+
+    def test_memory_filename(self):
+        """
+        Test that values of :memory: models are kept in memory
+        """
+        self.assertIsInstance(SerializersFactory.get_serializer_by_filename(":memory:"), SerializerMemory)
+        config = self.AppConfig(":memory:")
+        other_config = self.AppConfig(":memory:")
+        self.assertEqual(12, config.font_size)
+        config.font_size = 14
+        config.photos_api.client_id = "1234"
+        config.reload()
+        self.assertEqual(14, config.font_size)
+        self.assertEqual("1234", config.photos_api.client_id)
+        # every model has its own values
+        self.assertEqual(12, other_config.font_size)
+        self.assertEqual(2, len(config.diff(other_config)))
+        with self.assertRaises(ValueError):
+            config._serializer.set_value([], 1)
+
+    def test_memory_only(self):
+        """
+        Test that files are not created if all models are kept in memory
+        """
+        with tempfile.TemporaryDirectory(prefix="test_SerializerMemory_") as temp_dir:
+            filename = os.path.join(temp_dir, "config.ini")
+            SerializersFactory.memory_only = True
+            try:
+                config = self.AppConfig(filename)
+            finally:
+                SerializersFactory.memory_only = False
+            self.assertIsInstance(config._serializer, SerializerMemory)
+            config.font_size = 14
+            self.assertEqual(14, config.font_size)
+            self.assertFalse(os.path.exists(filename))
+
+    def test_restore_values(self):
+        """
+        Test that values changed in the context are restored
+        """
+        config = self.AppConfig(":memory:")
+        config.font_size = "14"
+        changes = []
+        config._serializer.add_change_listener(changes.append)
+        with restored_memory_values():
+            config.font_size = 14
+            config.photos_api.client_id = "1234"
+            config._serializer.set_value(["unknown"], 1)
+            config._serializer._set_delayed_write(True, delay_seconds=10)
+            config.photos_api.client_id = "5678"
+        self.assertEqual("14", config.font_size)
+        self.assertEqual("<client id>", config.photos_api.client_id)
+        self.assertIsNone(config._serializer.get_value(["unknown"]))
+        self.assertFalse(config._serializer._is_dirty)
+        self.assertEqual(["font_size", "photos_api.client_id"], [".".join(change.path) for change in changes[-2:]])
+
+    def test_pytest_plugin(self):
+        """
+        Test that models decorated by @config_file don't write files when the plugin is enabled
+        """
+        with tempfile.TemporaryDirectory(prefix="test_SerializerMemory_") as temp_dir:
+            with open(os.path.join(temp_dir, "test_app.py"), "w") as f:
+                f.write(textwrap.dedent("""
+                    from configmodel import ConfigModel, config_file
+                    from configmodel.SerializerMemory import SerializerMemory
+
+                    @config_file("config.ini")
+                    class AppConfig(ConfigModel):
+                        font_size = 12
+
+                    def test_change():
+                        assert isinstance(AppConfig._instance._serializer, SerializerMemory)
+                        AppConfig.font_size = 14
+
+                    def test_isolated():
+                        assert AppConfig.font_size == 12
+
+                    class OtherConfig(ConfigModel):
+                        font_size = 12
+
+                    def test_fixture(configmodel_memory):
+                        assert isinstance(OtherConfig("other.ini")._serializer, SerializerMemory)
+                """))
+            result = self._run_python(temp_dir, "-m", "pytest", "-q", "-p", "configmodel.pytest_plugin", "--configmodel-memory",
+                                      "-p", "no:cacheprovider", "test_app.py")
+            self.assertEqual(0, result.returncode, result.stdout)
+            self.assertIn("3 passed", result.stdout)
+            self.assertFalse(os.path.exists(os.path.join(temp_dir, "config.ini")))
+
+    def test_pytest_plugin_disabled(self):
+        """
+        Test that the plugin doesn't add fixtures to tests without the option,
+        and that the previous value of memory_only is restored when pytest ends
+        """
+        with tempfile.TemporaryDirectory(prefix="test_SerializerMemory_") as temp_dir:
+            with open(os.path.join(temp_dir, "test_app.py"), "w") as f:
+                f.write(textwrap.dedent("""
+                    def test_fixtures(request):
+                        assert "_configmodel_restore_values" not in request.fixturenames
+                """))
+            result = self._run_python(temp_dir, "-m", "pytest", "-q", "-p", "configmodel.pytest_plugin",
+                                      "-p", "no:cacheprovider", "test_app.py")
+            self.assertEqual(0, result.returncode, result.stdout)
+
+            with open(os.path.join(temp_dir, "test_memory.py"), "w") as f:
+                f.write(textwrap.dedent("""
+                    def test_fixtures(request):
+                        assert "_configmodel_restore_values" in request.fixturenames
+                """))
+            script = textwrap.dedent("""
+                import pytest
+                from configmodel.SerializersFactory import SerializersFactory
+
+                SerializersFactory.memory_only = True
+                exit_code = pytest.main(["-q", "-p", "configmodel.pytest_plugin", "--configmodel-memory", "-p", "no:cacheprovider", "test_memory.py"])
+                assert exit_code == 0, exit_code
+                assert SerializersFactory.memory_only
+            """)
+            result = self._run_python(temp_dir, "-c", script)
+            self.assertEqual(0, result.returncode, result.stdout)
+
+    def _run_python(self, cwd, *args):
+        src_dir = os.path.dirname(os.path.dirname(os.path.abspath(sys.modules[ConfigModel.__module__].__file__)))
+        env = dict(os.environ, PYTHONPATH=src_dir)
+        return subprocess.run([sys.executable, *args], cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from configmodel import ConfigModel
+from configmodel.ProfilingHooks import ProfilingHooks
+from configmodel.SerializerMetrics import SerializerMetrics
+from configmodel.SerializersFactory import SerializersFactory
+
+
+class TestSerializerMetrics(unittest.TestCase):
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+
+        photos_api = GoogleApi()
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_SerializerMetrics_")
+        self.filename = os.path.join(self._temp_dir.name, "config.ini")
+
+    def tearDown(self):
+        super().tearDown()
+        SerializersFactory.metrics_enabled = False
+        self._temp_dir.cleanup()
+
+    def test_disabled(self):
+        """
+        Test that serializers are not instrumented if metrics are disabled
+        """
+        config = self.AppConfig(self.filename)
+        self.assertIsNone(config.stats())
+        self.assertIsNone(config._serializer._metrics)
+        self.assertNotIn("get_value", vars(config._serializer))
+        self.assertNotIn("_commit_delayed_write", vars(config._serializer))
+
+    def test_stats(self):
+        """
+        Test that reads, writes, commits and latencies are counted
+        """
+        SerializersFactory.metrics_enabled = True
+        config = self.AppConfig(self.filename)
+        config.font_size
+        config.font_size
+        config.font_size = 14
+        config.photos_api.client_id = "1234"
+        config.reload()
+
+        stats = config.stats()
+        self.assertEqual(self.filename, stats.filename)
+        self.assertEqual({"font_size": 2}, stats.reads)
+        self.assertEqual({"font_size": 1, "photos_api.client_id": 1}, stats.writes)
+        self.assertEqual(2, stats.commits)
+        self.assertEqual(2, stats.commit_latency.count)
+        # the file is written when created and by both commits
+        self.assertGreaterEqual(stats.bytes_written, os.path.getsize(self.filename) * 3)
+        self.assertEqual(1, stats.reloads)
+        self.assertEqual(2, stats.load_latency.count)
+        self.assertEqual(stats.commits, stats.commit_latency.get_cumulative_counts()[-1][1])
+        # nested models count only their fields
+        self.assertEqual({"photos_api.client_id": 1}, config.photos_api.stats().writes)
+        # the same serializer is instrumented only once
+        other_config = self.AppConfig(self.filename)
+        other_config.font_size
+        self.assertEqual({"font_size": 3}, config.stats().reads)
+
+    def test_profiling_hooks(self):
+        """
+        Test that metrics and profiling hooks share wrappers of the serializer
+        """
+        hook = ProfilingHooks.Hook()
+        hook.before = unittest.mock.Mock()
+        SerializersFactory.metrics_enabled = True
+        ProfilingHooks.add_hook(hook)
+        try:
+            config = self.AppConfig(self.filename)
+            get_value = config._serializer.get_value
+            config.font_size
+        finally:
+            ProfilingHooks.remove_hook(hook)
+        self.assertIn("get_value", [call.args[0].operation for call in hook.before.call_args_list])
+        self.assertEqual((config._serializer._metrics,), config._serializer._hooks)
+        # metrics are still collected without profiling hooks
+        config.font_size
+        self.assertEqual({"font_size": 2}, config.stats().reads)
+        self.assertIs(get_value, config._serializer.get_value)
+
+    def test_timer_restarts(self):
+        SerializersFactory.metrics_enabled = True
+        config = self.AppConfig(self.filename)
+        config._serializer._set_delayed_write(True, delay_seconds=10)
+        for font_size in range(3):
+            config.font_size = font_size
+        config._serializer.flush()
+        stats = config.stats()
+        self.assertEqual(2, stats.timer_restarts)
+        self.assertEqual(1, stats.commits)
+
+    def test_prometheus(self):
+        SerializersFactory.metrics_enabled = True
+        config = self.AppConfig(self.filename)
+        config.font_size = 14
+        text = config.stats().to_prometheus()
+        self.assertIn("# TYPE configmodel_writes_total counter\n", text)
+        self.assertIn(f'configmodel_writes_total{{file="{self.filename}",path="font_size"}} 1\n', text)
+        self.assertIn(f'configmodel_commits_total{{file="{self.filename}"}} 1\n', text)
+        self.assertIn(f'configmodel_commit_duration_seconds_bucket{{file="{self.filename}",le="+Inf"}} 1\n', text)
+        self.assertIn(f'configmodel_load_duration_seconds_count{{file="{self.filename}"}} 1\n', text)
+        self.assertIn(f'configmodel_writes_total{{file="{self.filename}",path="font_size"}} 1\n', SerializerMetrics.format_prometheus())
+        self.assertEqual('{file="a\\"b\\\\c\\n"}', SerializerMetrics._format_labels(file='a"b\\c\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
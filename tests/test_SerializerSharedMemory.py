@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+import unittest.mock
+import uuid
+
+from configmodel import ConfigModel
+from configmodel.SerializerIni import SerializerIni
+from configmodel.SerializerSharedMemory import SerializerSharedMemory
+from configmodel.SerializersFactory import SerializersFactory
+from configmodel.SharedConfigSegment import SharedConfigSegment
+
+
+def _read_in_child_process(filename, queue):
+    config = TestSerializerSharedMemory.AppConfig(filename)
+    queue.put((config._serializer.is_writer, config.photos_api.client_id))
+
+
+def _write_in_child_process(filename, queue, publishing):
+    """
+    Become the writer and wait to be killed, optionally in the middle of publishing
+    """
+    config = TestSerializerSharedMemory.AppConfig(SerializerSharedMemory(filename, SerializerIni))
+    config.photos_api.client_id = "child"
+    if publishing:
+        buf = config._serializer._segment._memory.buf
+        sequence, generation, length, writer_pid = SharedConfigSegment._HEADER.unpack_from(buf, 0)
+        SharedConfigSegment._HEADER.pack_into(buf, 0, sequence + 1, generation, length, writer_pid)
+    queue.put(config._serializer.is_writer)
+    signal.pause()
+
+
+class TestSharedConfigSegment(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.segment = SharedConfigSegment.create(f"test_{uuid.uuid4().hex[:16]}", size=1024)
+
+    def tearDown(self):
+        super().tearDown()
+        self.segment.close()
+
+    def test_publish(self):
+        """
+        Test that readers see published values and generations
+        """
+        reader = SharedConfigSegment.attach(self.segment.name)
+        try:
+            self.assertEqual(0, reader.generation)
+            self.assertEqual((0, None), reader.read())
+            self.assertEqual(1, self.segment.publish({"a": 1}))
+            self.assertEqual(2, self.segment.publish({"a": 2, "b": [1, 2]}))
+            self.assertEqual(2, reader.generation)
+            self.assertEqual((2, {"a": 2, "b": [1, 2]}), reader.read())
+            self.assertFalse(reader.is_owner)
+            with self.assertRaises(Exception):
+                reader.publish({})
+        finally:
+            reader.close()
+        with self.assertRaises(FileExistsError):
+            SharedConfigSegment.create(self.segment.name)
+
+    def test_seqlock(self):
+        """
+        Test that snapshots are not read while they are being written, and too big snapshots are rejected
+        """
+        self.segment.publish({"a": 1})
+        # simulate writer killed while publishing
+        sequence, generation, length, writer_pid = SharedConfigSegment._HEADER.unpack_from(self.segment._memory.buf, 0)
+        self.assertEqual(os.getpid(), writer_pid)
+        SharedConfigSegment._HEADER.pack_into(self.segment._memory.buf, 0, sequence + 1, generation, length, writer_pid)
+        self.segment.READ_TIMEOUT = 0.01
+        with self.assertRaises(TimeoutError):
+            self.segment.read()
+        SharedConfigSegment._HEADER.pack_into(self.segment._memory.buf, 0, sequence + 2, generation, length, writer_pid)
+        self.assertEqual((1, {"a": 1}), self.segment.read())
+
+        with self.assertRaises(Exception):
+            self.segment.publish("x" * 2048)
+        self.assertEqual((1, {"a": 1}), self.segment.read())
+
+
+class TestSerializerSharedMemory(unittest.TestCase):
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+
+        photos_api = GoogleApi()
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_SerializerSharedMemory_")
+        self.filename = os.path.join(self._temp_dir.name, "config.ini")
+        SerializersFactory.shared_memory_enabled = True
+
+    def tearDown(self):
+        super().tearDown()
+        SerializersFactory.shared_memory_enabled = False
+        self._temp_dir.cleanup()
+
+    def test_writer_and_reader(self):
+        """
+        Test that the first serializer publishes values and other serializers read them
+        """
+        writer_config = self.AppConfig(self.filename)
+        writer = writer_config._serializer
+        self.assertIsInstance(writer, SerializerSharedMemory)
+        self.assertIsInstance(writer._serializer, SerializerIni)
+        try:
+            self.assertTrue(writer.is_writer)
+            self.assertTrue(os.path.exists(self.filename))
+
+            # serializer of another process
+            reader_config = self.AppConfig(SerializerSharedMemory(self.filename, SerializerIni))
+            reader = reader_config._serializer
+            self.assertFalse(reader.is_writer)
+            self.assertIsNone(reader._serializer)
+            self.assertEqual(writer_config.font_size, reader_config.font_size)
+            with self.assertRaises(Exception):
+                reader_config.font_size = 14
+
+            # changes are visible in readers immediately
+            changes = []
+            reader.add_change_listener(changes.append)
+            writer_config.photos_api.client_id = "1234"
+            self.assertEqual("1234", reader_config.photos_api.client_id)
+            self.assertEqual([["photos_api", "client_id"]], [change.path for change in changes])
+            self.assertEqual([], writer_config.diff(reader_config))
+
+            # readers read the snapshot only once per generation
+            generation = reader._generation
+            self.assertEqual("1234", reader_config.photos_api.client_id)
+            self.assertEqual(generation, reader._generation)
+            reader.close()
+        finally:
+            writer.close()
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork is not supported")
+    def test_forked_reader(self):
+        """
+        Test that processes forked from the writer are readers
+        """
+        writer_config = self.AppConfig(self.filename)
+        try:
+            writer_config.photos_api.client_id = "forked"
+            context = multiprocessing.get_context("fork")
+            queue = context.Queue()
+            process = context.Process(target=_read_in_child_process, args=(self.filename, queue))
+            process.start()
+            self.assertEqual((False, "forked"), queue.get(timeout=10))
+            process.join()
+            # segment is not removed by readers
+            segment = SharedConfigSegment.attach(writer_config._serializer._segment.name)
+            self.assertEqual(writer_config._serializer._generation, segment.generation)
+            segment.close()
+        finally:
+            writer_config._serializer.close()
+
+    def _kill_writer_process(self, publishing):
+        """
+        Start a writer process and kill it, the segment is left behind
+        """
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        process = context.Process(target=_write_in_child_process, args=(self.filename, queue, publishing))
+        process.start()
+        try:
+            self.assertTrue(queue.get(timeout=10))
+            reader_config = self.AppConfig(SerializerSharedMemory(self.filename, SerializerIni))
+            self.assertFalse(reader_config._serializer.is_writer)
+        finally:
+            process.kill()
+            process.join()
+        return reader_config
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods() and SharedConfigSegment.TAKEOVER_SUPPORTED,
+                         "fork or file locks are not supported")
+    def test_take_over(self):
+        """
+        Test that the segment of a killed writer is taken over by a reader changing a value and by new serializers
+        """
+        reader_config = self._kill_writer_process(publishing=False)
+        reader = reader_config._serializer
+        try:
+            self.assertEqual("child", reader_config.photos_api.client_id)
+            reader_config.font_size = 14
+            self.assertTrue(reader.is_writer)
+            self.assertEqual(os.getpid(), reader._segment.writer_pid)
+
+            other_reader = SerializerSharedMemory(self.filename, SerializerIni)
+            self.assertFalse(other_reader.is_writer)
+            self.assertEqual(14, self.AppConfig(other_reader).font_size)
+            other_reader.close()
+        finally:
+            reader.close()
+
+        # new serializer takes over the segment left behind
+        reader_config = self._kill_writer_process(publishing=False)
+        reader_config._serializer._segment.close()
+        new_config = self.AppConfig(SerializerSharedMemory(self.filename, SerializerIni))
+        try:
+            self.assertTrue(new_config._serializer.is_writer)
+            self.assertEqual("child", new_config.photos_api.client_id)
+        finally:
+            new_config._serializer.close()
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods() and SharedConfigSegment.TAKEOVER_SUPPORTED,
+                         "fork or file locks are not supported")
+    def test_take_over_incomplete_snapshot(self):
+        """
+        Test that readers take over the segment of a writer killed while publishing, instead of timing out
+        """
+        with unittest.mock.patch.object(SharedConfigSegment, "READ_TIMEOUT", 0.01):
+            # the snapshot being published by a live writer can't be read, values of the last snapshot are used
+            reader_config = self._kill_writer_process(publishing=True)
+            reader = reader_config._serializer
+            try:
+                self.assertFalse(reader.is_writer)
+                # the snapshot is read again only if the generation changes
+                reader._generation = 0
+                self.assertEqual("child", reader_config.photos_api.client_id)
+            except BaseException:
+                reader.close()
+                raise
+        try:
+            self.assertTrue(reader.is_writer)
+            generation, values = reader._segment.read()
+            self.assertEqual(reader._generation, generation)
+            self.assertEqual("child", values["photos_api.client_id"][1])
+        finally:
+            reader.close()
+
+    def _start_writer_process(self, font_size):
+        """
+        Start an independent writer process (not forked, it has its own resource tracker) publishing font_size
+        """
+        script = textwrap.dedent("""
+            import signal
+            import sys
+            from configmodel.SerializerBase import SerializerBase
+            from configmodel.SerializerIni import SerializerIni
+            from configmodel.SerializerSharedMemory import SerializerSharedMemory
+
+            serializer = SerializerSharedMemory(sys.argv[1], SerializerIni)
+            serializer.write_default_values_from_model([SerializerBase.FieldDefaultValue(["font_size"], 1)])
+            serializer.set_value(["font_size"], int(sys.argv[2]))
+            print(serializer.is_writer, flush=True)
+            signal.pause()
+        """)
+        src_dir = os.path.dirname(os.path.dirname(os.path.abspath(sys.modules[ConfigModel.__module__].__file__)))
+        process = subprocess.Popen([sys.executable, "-c", script, self.filename, str(font_size)], stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, env=dict(os.environ, PYTHONPATH=src_dir), text=True)
+        self.assertEqual("True", process.stdout.readline().strip())
+        return process
+
+    @unittest.skipUnless(SharedConfigSegment.TAKEOVER_SUPPORTED and os.path.isdir(SharedConfigSegment.SHM_DIRECTORY),
+                         "file locks or shared memory directory are not supported")
+    def test_passive_reader_of_replaced_segment(self):
+        """
+        Test that a reader which only reads attaches to the segment of a new writer after the writer was killed
+        """
+        process = self._start_writer_process(1)
+        try:
+            reader = SerializerSharedMemory(self.filename, SerializerIni)
+        finally:
+            process.kill()
+            process.wait()
+            process.stdout.close()
+        try:
+            self.assertFalse(reader.is_writer)
+            self.assertEqual(1, reader.get_value(["font_size"]))
+            segment_path = os.path.join(SharedConfigSegment.SHM_DIRECTORY, reader._segment.name)
+            # the segment of the killed writer is removed by its resource tracker (Python < 3.13), or by the new writer
+            for _ in range(500):
+                if not os.path.exists(segment_path):
+                    break
+                time.sleep(0.01)
+            process = self._start_writer_process(2)
+            try:
+                with unittest.mock.patch.object(SerializerSharedMemory, "WRITER_CHECK_INTERVAL", 0):
+                    self.assertEqual(2, reader.get_value(["font_size"]))
+                self.assertFalse(reader.is_writer)
+            finally:
+                process.kill()
+                process.wait()
+                process.stdout.close()
+        finally:
+            reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from configmodel import ConfigModel
+from configmodel.SerializerSqlite import SerializerSqlite
+from configmodel.SerializersFactory import SerializersFactory
+
+
+class TestSerializerSqlite(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_SerializerSqlite_")
+        self.filename = os.path.join(self._temp_dir.name, "config.sqlite")
+
+    def tearDown(self):
+        super().tearDown()
+        self._temp_dir.cleanup()
+
+    def _read_rows(self):
+        with sqlite3.connect(self.filename) as connection:
+            return dict(connection.execute(f"SELECT path, value FROM {SerializerSqlite.TABLE_NAME}"))
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+            secret = "<secret>"
+
+        photos_api = GoogleApi()
+
+    def test_factory(self):
+        """
+        Test that .sqlite and .db files use SerializerSqlite
+        """
+        self.assertIsInstance(SerializersFactory.get_serializer_by_filename("config.sqlite"), SerializerSqlite)
+        self.assertIsInstance(SerializersFactory.get_serializer_by_filename("config.db"), SerializerSqlite)
+
+    def test_default_values(self):
+        """
+        Test that default values are written, but existing values are preserved
+        """
+        config = self.AppConfig(self.filename)
+        self.assertEqual({"font_size": "12", "photos_api.client_id": "<client id>", "photos_api.secret": "<secret>"},
+                         self._read_rows())
+        self.assertEqual(12, config.font_size)
+        journal_mode = config._serializer._get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual("wal", journal_mode)
+
+        with sqlite3.connect(self.filename) as connection:
+            connection.execute(f"UPDATE {SerializerSqlite.TABLE_NAME} SET value = '1234' WHERE path = 'photos_api.client_id'")
+            connection.execute(f"INSERT INTO {SerializerSqlite.TABLE_NAME} VALUES ('unknown.value', 'x')")
+        config = self.AppConfig(self.filename)
+        self.assertEqual("1234", config.photos_api.client_id)
+        self.assertEqual("x", config._serializer.get_value(["unknown", "value"]))
+
+    def test_default_values_written_concurrently(self):
+        """
+        Test that another process can't write a value between reading values and writing default values,
+        so the cached value is the value in the database
+        """
+        serializer = SerializerSqlite(self.filename)
+        read_cached_values = serializer._read_cached_values
+        errors = []
+
+        def _read_cached_values_and_write():
+            cached_values = read_cached_values()
+            # another process
+            with sqlite3.connect(self.filename, timeout=0) as connection:
+                try:
+                    connection.execute(f"INSERT INTO {SerializerSqlite.TABLE_NAME} (path, value) VALUES ('font_size', '20')")
+                except sqlite3.OperationalError as e:
+                    errors.append(e)
+            return cached_values
+
+        serializer._read_cached_values = _read_cached_values_and_write
+        self.AppConfig(serializer)
+        self.assertEqual(1, len(errors))
+        self.assertEqual(self._read_rows()["font_size"], str(serializer.get_value(["font_size"])))
+
+    def test_commit_dirty_values(self):
+        """
+        Test that only changed values are written in a single commit
+        """
+        config = self.AppConfig(self.filename)
+        serializer = config._serializer
+        serializer._set_delayed_write(True, delay_seconds=10)
+
+        # value changed by another process must not be overwritten
+        with sqlite3.connect(self.filename) as connection:
+            connection.execute(f"UPDATE {SerializerSqlite.TABLE_NAME} SET value = 'other' WHERE path = 'photos_api.secret'")
+
+        config.font_size = 14
+        config.photos_api.client_id = "1234"
+        self.assertEqual("12", self._read_rows()["font_size"])
+        serializer.flush()
+        rows = self._read_rows()
+        self.assertEqual("14", rows["font_size"])
+        self.assertEqual("1234", rows["photos_api.client_id"])
+        self.assertEqual("other", rows["photos_api.secret"])
+        self.assertFalse(serializer._is_dirty)
+
+        # another process sees the changes
+        other_config = self.AppConfig(SerializerSqlite(self.filename))
+        self.assertEqual("14", other_config.font_size)
+
+        # and changes of other processes are reloaded
+        other_config.photos_api.secret = "new secret"
+        changes = []
+        serializer.add_change_listener(changes.append)
+        config.reload()
+        self.assertEqual("new secret", config.photos_api.secret)
+        self.assertEqual([["photos_api", "secret"]], [change.path for change in changes])
+
+    def test_invalid_parameters(self):
+        """
+        Test that empty paths are not allowed
+        """
+        serializer = self.AppConfig(self.filename)._serializer
+        with self.assertRaises(ValueError):
+            serializer.get_value([])
+        with self.assertRaises(ValueError):
+            serializer.set_value([], "value")
+
+
+if __name__ == '__main__':
+    unittest.main()
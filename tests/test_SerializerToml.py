@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import datetime
+import os
+import tempfile
+import unittest
+
+from configmodel import ConfigModel
+from configmodel.SerializerToml import SerializerToml, tomllib
+from configmodel.SerializersFactory import SerializersFactory
+
+
+@unittest.skipIf(tomllib is None, "tomllib is not available")
+class TestSerializerToml(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="test_SerializerToml_")
+        self.filename = os.path.join(self._temp_dir.name, "config.toml")
+
+    def tearDown(self):
+        super().tearDown()
+        self._temp_dir.cleanup()
+
+    def _read_file(self):
+        with open(self.filename, "rb") as f:
+            return tomllib.load(f)
+
+    class AppConfig(ConfigModel):
+        font_size = 12
+        ratio = 0.5
+
+        class GoogleApi(ConfigModel):
+            client_id = "<client id>"
+            secret = "<secret>"
+
+        photos_api = GoogleApi()
+
+    def test_factory(self):
+        self.assertIsInstance(SerializersFactory.get_serializer_by_filename("config.toml"), SerializerToml)
+
+    def test_dumps(self):
+        """
+        Test that written documents are parsed back to the same data
+        """
+        data = {
+            "int": -5,
+            "float": 1.5,
+            "inf": float("inf"),
+            "bool": True,
+            "string": "quote \" backslash \\ newline \n tab \t del \x7f unicode ž",
+            "date": datetime.date(2024, 1, 2),
+            "datetime": datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            "array": [1, [2, 3], {"a": "b"}],
+            "quoted key.with dot": 1,
+            "empty": {},
+            "a": {"b": {"c": 1}, "d": 2},
+        }
+        text = SerializerToml.dumps(data)
+        self.assertIn("[a.b]\n", text)
+        self.assertNotIn("[a]\n", text.split("d = 2")[1])
+        self.assertEqual(data, tomllib.loads(text))
+        self.assertEqual("", SerializerToml.dumps({}))
+
+    def test_default_values(self):
+        """
+        Test that default values are written to tables, existing values keep native types
+        """
+        self.AppConfig(self.filename)
+        self.assertEqual({"font_size": 12, "ratio": 0.5, "photos_api": {"client_id": "<client id>", "secret": "<secret>"}},
+                         self._read_file())
+
+        with open(self.filename, "w") as f:
+            f.write("font_size = 14\n\n[photos_api]\nclient_id = 1234\nscopes = [\"a\", \"b\"]\n")
+        config = self.AppConfig(self.filename)
+        self.assertEqual(14, config.font_size)
+        self.assertEqual(1234, config.photos_api.client_id)
+        self.assertEqual(["a", "b"], config._serializer.get_value(["photos_api", "scopes"]))
+
+        config.photos_api.secret = "new secret"
+        data = self._read_file()
+        self.assertEqual({"client_id": 1234, "scopes": ["a", "b"], "secret": "new secret"}, data["photos_api"])
+        self.assertEqual(0.5, data["ratio"])
+
+
+if __name__ == '__main__':
+    unittest.main()
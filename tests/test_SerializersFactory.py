@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
+import gc
+import os
+import tempfile
 import unittest
+import weakref
+from unittest.mock import patch
 
+from configmodel import ConfigModel
 from configmodel.SerializerIni import SerializerIni
+from configmodel.SerializerMemory import SerializerMemory
 from configmodel.SerializersFactory import SerializersFactory
 from mock_Serializer import MockSerializer
 
@@ -33,6 +40,99 @@ class TestSerializersFactory(unittest.TestCase):
         with self.assertRaises(Exception):
             SerializersFactory.get_serializer_by_filename("test.txt")
 
+    class AppConfig(ConfigModel):
+        font_size = 12
+
+    class OtherConfig(ConfigModel):
+        language = "en"
+
+    def test_shared_serializers(self):
+        """
+        Test that models using the same file share the serializer
+        """
+        with tempfile.TemporaryDirectory(prefix="test_SerializersFactory_") as temp_dir:
+            filename = os.path.join(temp_dir, "config.ini")
+            config = self.AppConfig(filename)
+            serializer = config._serializer
+            serializer._set_delayed_write(True, delay_seconds=10)
+            config.font_size = 14
+
+            # relative path of the same file, pending changes are written before the file is read by the other model
+            cwd = os.getcwd()
+            os.chdir(temp_dir)
+            try:
+                other_config = self.OtherConfig("config.ini")
+            finally:
+                os.chdir(cwd)
+            self.assertIs(serializer, other_config._serializer)
+            self.assertEqual("14", config.font_size)
+            self.assertEqual("en", other_config.language)
+            other_config.language = "de"
+            serializer.flush()
+            with open(filename) as f:
+                content = f.read()
+            self.assertIn("font_size = 14", content)
+            self.assertIn("language = de", content)
+
+            self.assertIsNot(serializer, SerializersFactory.get_serializer_by_filename(os.path.join(temp_dir, "other.ini")))
+            # in-memory models are not shared
+            self.assertIsNot(SerializersFactory.get_serializer_by_filename(":memory:"),
+                             SerializersFactory.get_serializer_by_filename(":memory:"))
+
+    def test_models_released(self):
+        """
+        Test that models of a shared serializer are released, and their change listeners removed
+        """
+        with tempfile.TemporaryDirectory(prefix="test_SerializersFactory_") as temp_dir:
+            filename = os.path.join(temp_dir, "config.ini")
+            config = self.AppConfig(filename)
+            serializer = config._serializer
+            listener_count = len(serializer._change_listeners)
+            for _ in range(100):
+                self.AppConfig(filename)
+            other_config = self.AppConfig(filename)
+            other_config_ref = weakref.ref(other_config)
+            del other_config
+            gc.collect()
+            self.assertIsNone(other_config_ref())
+            self.assertEqual(listener_count, len(serializer._change_listeners))
+            # listeners of living models are kept
+            version = config._version
+            config.font_size = 14
+            self.assertEqual(version + 1, config._version)
+
+    def test_plugins(self):
+        """
+        Test that serializers of entry points are loaded only when used
+        """
+        class EntryPoint:
+            def __init__(self, name):
+                self.name = name
+                self.load_count = 0
+
+            def load(self):
+                self.load_count += 1
+                return SerializerMemory
+
+        class EntryPoints(list):
+            def select(self, group):
+                return self if group == SerializersFactory.ENTRY_POINT_GROUP else []
+
+        entry_points = EntryPoints([EntryPoint("yaml"), EntryPoint("ini")])
+        with patch.object(SerializersFactory, "_serializers_by_extension", None), \
+                patch.object(SerializersFactory, "_plugins_loaded", False), \
+                patch("importlib.metadata.entry_points", return_value=entry_points) as mock_entry_points:
+            self.assertIsInstance(SerializersFactory.get_serializer_by_filename("config.ini"), SerializerIni)
+            mock_entry_points.assert_not_called()
+            self.assertIsInstance(SerializersFactory.get_serializer_by_filename("config.yaml"), SerializerMemory)
+            SerializersFactory.get_serializer_by_filename("other.yaml")
+            self.assertIn(".yaml", SerializersFactory.get_all_supported_extensions())
+            self.assertEqual(1, mock_entry_points.call_count)
+            self.assertEqual([1, 0], [entry_point.load_count for entry_point in entry_points])
+            with self.assertRaises(Exception):
+                SerializersFactory.get_serializer_by_filename("config.txt")
+            self.assertEqual(1, mock_entry_points.call_count)
+
 
 if __name__ == '__main__':
     unittest.main()